@@ -0,0 +1,187 @@
+import datetime
+from typing import Dict, List, Optional
+
+from bson.objectid import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from data_generator import EntityGenerator
+from mongo_database import MongoDatabase, rating_summary
+from performance_metrics import PerformanceMetrics, measure_execution_time
+from reference_data import ReferenceData
+
+
+class AsyncMongoDatabase:
+    def __init__(self, connection_string: str, database_name: str, seed: Optional[int] = None):
+        """
+        Асинхронний аналог MongoDatabase на motor з тими самими назвами методів.
+
+        Args:
+            connection_string (str): Рядок підключення до MongoDB
+            database_name (str): Назва бази даних
+            seed (int): Зерно генератора тестових даних
+        """
+        self.client = AsyncIOMotorClient(connection_string)
+        self.db = self.client[database_name]
+        self.anime_collection = self.db.anime
+        self.performance_metrics = PerformanceMetrics()
+        self.entity_generator = EntityGenerator(seed)
+        # Довідкові дані генератора (див. MongoDatabase.reference_data); завантажуються load_async
+        self.reference_data = ReferenceData({'users': self._reference_users}, seed)
+
+    @classmethod
+    async def create(cls, connection_string: str, database_name: str,
+                     seed: Optional[int] = None) -> 'AsyncMongoDatabase':
+        """Створення екземпляра з тією ж сигнатурою, що й AsyncMSSQLDatabase.create."""
+        return cls(connection_string, database_name, seed)
+
+    def get_performance_stats(self) -> Dict[str, Dict[str, float]]:
+        return self.performance_metrics.get_statistics()
+
+    async def close(self):
+        """Закриття клієнта MongoDB."""
+        self.client.close()
+
+    # READ операції
+    @measure_execution_time
+    async def fetch_anime_simple(self, filters=None, limit=10):
+        """Простий варіант читання записів з колекції Anime."""
+        cursor = self.anime_collection.find(filters or {}, {'reviews': 0, 'genres': 0}).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    @measure_execution_time
+    async def fetch_anime_with_relations(self, filters=None, limit=10):
+        """Читання записів з колекції Anime з вкладеними даними."""
+        return await self.anime_collection.find(filters or {}).limit(limit).to_list(length=limit)
+
+    @measure_execution_time
+    async def paginate_anime(self, page_size=100, after_id=None, filters=None):
+        """Keyset-пагінація по колекції Anime (див. MongoDatabase.paginate_anime)."""
+        query = dict(filters or {})
+        if after_id is not None:
+            query['_id'] = {'$gt': ObjectId(after_id)}
+
+        documents = await (
+            self.anime_collection.find(query, {'reviews': 0, 'genres': 0})
+            .sort('_id', 1)
+            .limit(page_size)
+            .to_list(length=page_size)
+        )
+        next_after_id = str(documents[-1]['_id']) if len(documents) == page_size else None
+        return documents, next_after_id
+
+    # CREATE операції
+    @measure_execution_time
+    async def insert_anime_simple(self, anime_data: dict) -> str:
+        """Простий варіант додавання запису в колекцію Anime."""
+        now = datetime.datetime.now()
+        document = {**anime_data, 'created_at': now, 'updated_at': now, 'genres': [], 'reviews': [],
+                    **rating_summary([])}
+        document.pop('_id', None)
+        result = await self.anime_collection.insert_one(document)
+        return str(result.inserted_id)
+
+    @measure_execution_time
+    async def insert_anime_with_relations(self, anime_data: dict, genres: List[dict], reviews: List[dict]) -> str:
+        """Додавання запису в колекцію Anime з вкладеними даними."""
+        now = datetime.datetime.now()
+        document = {
+            **anime_data,
+            'created_at': now,
+            'updated_at': now,
+            'genres': genres,
+            'reviews': [{**review, 'created_at': now, 'updated_at': now} for review in reviews],
+            **rating_summary(reviews)
+        }
+        result = await self.anime_collection.insert_one(document)
+        return str(result.inserted_id)
+
+    @measure_execution_time
+    async def insert_entities_batch(self, entities: List[dict]):
+        """Масове додавання колекції аніме."""
+        if entities:
+            await self.anime_collection.insert_many([
+                {**{key: value for key, value in entity.items() if key != '_id'},
+                 **rating_summary(entity.get('reviews', []))}
+                for entity in entities
+            ])
+
+    @measure_execution_time
+    async def insert_entities_batch_simple(self, entities: List[dict]):
+        """Масове додавання колекції аніме без вкладених даних."""
+        if entities:
+            await self.anime_collection.insert_many([
+                {**{key: value for key, value in entity.items() if key not in ('_id', 'genres', 'reviews')},
+                 **rating_summary([])}
+                for entity in entities
+            ])
+
+    # UPDATE операції
+    @measure_execution_time
+    async def update_anime_simple(self, anime_id: str, updates: dict):
+        """Простий варіант оновлення запису в колекції Anime."""
+        await self.anime_collection.update_one(
+            {'_id': ObjectId(anime_id)},
+            {'$set': {**updates, 'updated_at': datetime.datetime.now()}}
+        )
+
+    # DELETE операції
+    async def _delete_anime(self, anime_ids=None):
+        if anime_ids:
+            await self.anime_collection.delete_many({'_id': {'$in': [ObjectId(id_) for id_ in anime_ids]}})
+        else:
+            await self.anime_collection.delete_many({})
+
+    @measure_execution_time
+    async def delete_anime_simple(self, anime_ids=None):
+        """Видалення записів з колекції Anime."""
+        await self._delete_anime(anime_ids)
+
+    @measure_execution_time
+    async def delete_anime_with_relations(self, anime_ids=None):
+        """Вкладені дані зберігаються в тому ж документі, тому метод ідентичний delete_anime_simple."""
+        await self._delete_anime(anime_ids)
+
+    # Скидання стану після тестів
+    RESET_STRATEGIES = ('delete',)
+
+    async def reset(self, strategy: str = 'delete'):
+        """Очищення колекції anime, як MongoDatabase.reset('delete') (не вимірюється performance_metrics)."""
+        if strategy not in self.RESET_STRATEGIES:
+            raise ValueError(f"Невідома стратегія очищення: {strategy}")
+        await self.anime_collection.delete_many({})
+
+    # Допоміжні методи
+    async def fetch_existing_genres(self) -> List[dict]:
+        return await self.anime_collection.distinct('genres')
+
+    async def fetch_existing_users(self) -> List[str]:
+        return await self.anime_collection.distinct('reviews.user_id')
+
+    async def _reference_users(self) -> List[str]:
+        return await self.fetch_existing_users() or ['default_user']
+
+    async def generate_entities(self, num_entities: int) -> List[dict]:
+        """
+        Генерує колекцію сутностей аніме з вкладеними даними.
+        Користувачі читаються з бази лише при першому виклику, далі - з reference_data.
+        """
+        reference = await self.reference_data.load_async()
+        return self.entity_generator.generate_documents(num_entities, reference.get('users'))
+
+    @measure_execution_time
+    async def get_top_rated_anime(self, n=10) -> List[dict]:
+        """Отримує топ N аніме за середнім рейтингом зі зведення avg_rating (див. MongoDatabase.get_top_rated_anime)."""
+        documents = await MongoDatabase._top_rated_cursor(self.anime_collection, n).to_list(length=n)
+        return [MongoDatabase._top_rated_document(document) for document in documents]
+
+    @measure_execution_time
+    async def get_average_anime_rating(self, anime_id: str) -> Optional[float]:
+        """Отримує середній рейтинг для конкретного аніме зі зведення рейтингу документа."""
+        document = await self.anime_collection.find_one({'_id': ObjectId(anime_id)}, {'avg_rating': 1})
+        return document.get('avg_rating') if document else None
+
+    @measure_execution_time
+    async def get_anime_by_genre(self, genre_name: str) -> List[dict]:
+        """Отримує список аніме за назвою жанру (див. MongoDatabase.get_anime_by_genre)."""
+        return await self.anime_collection.find(
+            {'genres.name': genre_name}, {'_id': 1, 'title': 1, 'year': 1}).to_list(length=None)
@@ -0,0 +1,244 @@
+from contextlib import asynccontextmanager
+from typing import Dict
+
+import aioodbc
+
+from data_generator import EntityGenerator
+from ms_sql_database import (
+    CREATE_ANIME_ID_MAP, CREATE_TEMP_ANIME, INSERT_ANIME, INSERT_ANIME_BATCH, INSERT_ANIME_GENRE,
+    INSERT_REVIEW, INSERT_TEMP_ANIME, MERGE_TEMP_ANIME, SELECT_ANIME_ID_MAP, SELECT_MAX_ANIME_ID, MSSQLDatabase
+)
+from performance_metrics import PerformanceMetrics, measure_execution_time
+from reference_data import ReferenceData
+
+
+class AsyncMSSQLDatabase:
+    def __init__(self, connection_string, pool_size=10, seed=None):
+        """
+        Асинхронний аналог MSSQLDatabase на aioodbc з тими самими назвами методів.
+        Запити будуються тими самими функціями, що й у MSSQLDatabase, тому результати порівнянні.
+        Пул створюється асинхронно, тому екземпляр слід отримувати через AsyncMSSQLDatabase.create.
+
+        Args:
+            connection_string (str): рядок підключення ODBC
+            pool_size (int): максимальна кількість з'єднань у пулі aioodbc
+            seed (int): зерно генератора тестових даних
+        """
+        self.connection_string = connection_string
+        self.pool_size = pool_size
+        self.pool = None
+        self.performance_metrics = PerformanceMetrics()
+        self.entity_generator = EntityGenerator(seed)
+        # Довідкові дані генераторів (див. MSSQLDatabase.reference_data); завантажуються load_async
+        self.reference_data = ReferenceData({
+            'users': self.fetch_existing_users,
+            'genres': self._reference_genres
+        }, seed)
+        # Межа початкових даних для reset (див. MSSQLDatabase.reset_after_id), визначається в create
+        self.reset_after_id = None
+
+    @classmethod
+    async def create(cls, connection_string, pool_size=10, seed=None) -> 'AsyncMSSQLDatabase':
+        db = cls(connection_string, pool_size, seed)
+        db.pool = await aioodbc.create_pool(dsn=connection_string, minsize=0, maxsize=pool_size, autocommit=False)
+        db.reset_after_id = (await db._fetchall(SELECT_MAX_ANIME_ID))[0][0]
+        return db
+
+    async def close(self):
+        """Закриття всіх з'єднань пулу."""
+        self.pool.close()
+        await self.pool.wait_closed()
+
+    @asynccontextmanager
+    async def _cursor(self):
+        """Курсор з'єднання з пулу: commit при успішному виході, rollback при винятку."""
+        async with self.pool.acquire() as conn:
+            cursor = await conn.cursor()
+            try:
+                yield cursor
+            except BaseException:
+                await conn.rollback()
+                raise
+            else:
+                await conn.commit()
+            finally:
+                await cursor.close()
+
+    async def _fetchall(self, query, params=()):
+        async with self._cursor() as cursor:
+            await cursor.execute(query, params)
+            return await cursor.fetchall()
+
+    def get_performance_stats(self) -> Dict[str, Dict[str, float]]:
+        return self.performance_metrics.get_statistics()
+
+    # READ операції
+    @measure_execution_time
+    async def fetch_anime_simple(self, filters=None, limit=10):
+        """Простий варіант читання записів з таблиці Anime."""
+        return await self._fetchall(*MSSQLDatabase._build_fetch_simple_query(filters, limit))
+
+    @measure_execution_time
+    async def fetch_anime_with_relations(self, filters=None, limit=10):
+        """Читання записів з таблиці Anime з жанрами та відгуками, закодованими через STRING_AGG."""
+        return await self._fetchall(*MSSQLDatabase._build_fetch_with_relations_query(filters, limit))
+
+    @measure_execution_time
+    async def paginate_anime(self, page_size=100, after_id=None, filters=None):
+        """Keyset-пагінація по таблиці Anime (див. MSSQLDatabase.paginate_anime)."""
+        rows = await self._fetchall(*MSSQLDatabase._build_paginate_query(page_size, after_id, filters))
+        next_after_id = rows[-1][0] if len(rows) == page_size else None
+        return rows, next_after_id
+
+    # CREATE операції
+    @staticmethod
+    async def _insert_anime(cursor, anime_data):
+        await cursor.execute(INSERT_ANIME, MSSQLDatabase._anime_params(anime_data))
+        return (await cursor.fetchone())[0]
+
+    @staticmethod
+    async def _insert_multi_row(cursor, insert_prefix, rows):
+        for query, params in MSSQLDatabase._multi_row_statements(insert_prefix, rows):
+            await cursor.execute(query, params)
+
+    @measure_execution_time
+    async def insert_anime_simple(self, anime_data):
+        """Простий варіант додавання запису в таблицю Anime."""
+        async with self._cursor() as cursor:
+            return await self._insert_anime(cursor, anime_data)
+
+    @measure_execution_time
+    async def insert_anime_with_relations(self, anime_data, genres, reviews):
+        """Додавання аніме з жанрами та відгуками в одній транзакції багаторядковими INSERT."""
+        async with self._cursor() as cursor:
+            anime_id = await self._insert_anime(cursor, anime_data)
+            genre_rows, review_rows = MSSQLDatabase._relation_rows(anime_id, genres, reviews)
+            await self._insert_multi_row(cursor, "INSERT INTO AnimeGenre (anime_id, genre_id)", genre_rows)
+            await self._insert_multi_row(
+                cursor,
+                "INSERT INTO Review (anime_id, user_id, rating, content, created_at, updated_at)",
+                review_rows
+            )
+            return anime_id
+
+    @staticmethod
+    def _set_fast_executemany(cursor, fast_executemany):
+        # aioodbc не проксіює атрибут fast_executemany, тому він встановлюється на курсорі pyodbc
+        cursor._impl.fast_executemany = fast_executemany
+
+    @measure_execution_time
+    async def insert_entities_batch(self, entities, batch_size=1000, fast_executemany=True):
+        """Пакетна вставка аніме-сутностей з пов'язаними даними (див. MSSQLDatabase.insert_entities_batch)."""
+        async with self._cursor() as cursor:
+            self._set_fast_executemany(cursor, fast_executemany)
+            await cursor.execute(CREATE_TEMP_ANIME)
+            await cursor.execute(CREATE_ANIME_ID_MAP)
+
+            for i in range(0, len(entities), batch_size):
+                batch = entities[i:i + batch_size]
+                await cursor.executemany(
+                    INSERT_TEMP_ANIME, [(idx,) + row for idx, row in enumerate(MSSQLDatabase._anime_rows(batch))])
+                await cursor.execute(MERGE_TEMP_ANIME)
+                await cursor.execute(SELECT_ANIME_ID_MAP)
+                anime_ids = dict(await cursor.fetchall())
+
+                genre_data, review_data = MSSQLDatabase._batch_relation_rows(batch, anime_ids)
+                if genre_data:
+                    await cursor.executemany(INSERT_ANIME_GENRE, genre_data)
+                if review_data:
+                    await cursor.executemany(INSERT_REVIEW, review_data)
+
+                await cursor.execute("TRUNCATE TABLE #TempAnime")
+                await cursor.execute("TRUNCATE TABLE #AnimeIdMap")
+
+            await cursor.execute("DROP TABLE #TempAnime")
+            await cursor.execute("DROP TABLE #AnimeIdMap")
+
+    @measure_execution_time
+    async def insert_entities_batch_simple(self, entities, batch_size=1000, fast_executemany=True):
+        """Пакетна вставка аніме-сутностей без пов'язаних даних в одній транзакції."""
+        async with self._cursor() as cursor:
+            self._set_fast_executemany(cursor, fast_executemany)
+            for i in range(0, len(entities), batch_size):
+                await cursor.executemany(INSERT_ANIME_BATCH, MSSQLDatabase._anime_rows(entities[i:i + batch_size]))
+
+    # UPDATE операції
+    @measure_execution_time
+    async def update_anime_simple(self, anime_id, updates):
+        """Простий варіант оновлення запису в таблиці Anime."""
+        set_clause = ", ".join([f"{col} = ?" for col in updates.keys()])
+        async with self._cursor() as cursor:
+            await cursor.execute(f"UPDATE Anime SET {set_clause} WHERE id = ?", list(updates.values()) + [anime_id])
+
+    # DELETE операції
+    @measure_execution_time
+    async def delete_anime_simple(self, anime_ids=None):
+        """Простий варіант видалення записів з таблиці Anime."""
+        async with self._cursor() as cursor:
+            if anime_ids:
+                await cursor.execute(
+                    "DELETE FROM Anime WHERE id IN ({})".format(",".join("?" for _ in anime_ids)), anime_ids)
+            else:
+                await cursor.execute("DELETE FROM Anime")
+
+    @measure_execution_time
+    async def delete_anime_with_relations(self, anime_ids=None):
+        """Видалення записів з таблиці Anime разом з відгуками та жанрами."""
+        async with self._cursor() as cursor:
+            for table, column in (("Review", "anime_id"), ("AnimeGenre", "anime_id"), ("Anime", "id")):
+                if anime_ids:
+                    await cursor.execute(
+                        f"DELETE FROM {table} WHERE {column} IN ({','.join('?' for _ in anime_ids)})", anime_ids)
+                else:
+                    await cursor.execute(f"DELETE FROM {table}")
+
+    # Скидання стану після тестів
+    RESET_STRATEGIES = ('delete',)
+
+    async def reset(self, strategy='delete'):
+        """
+        Видалення аніме, доданих після create, з жанрами й відгуками (не вимірюється performance_metrics).
+        Ті самі запити, що й у MSSQLDatabase.reset('delete'), в одній транзакції.
+        """
+        if strategy not in self.RESET_STRATEGIES:
+            raise ValueError(f"Невідома стратегія очищення: {strategy}")
+        async with self._cursor() as cursor:
+            for query, params in MSSQLDatabase._scoped_reset_statements(self.reset_after_id):
+                await cursor.execute(query, params)
+
+    # Допоміжні методи
+    async def fetch_existing_genres(self):
+        return await self._fetchall("SELECT [id], [name] FROM [Genre]")
+
+    async def _reference_genres(self):
+        return [tuple(row) for row in await self.fetch_existing_genres()]
+
+    async def fetch_existing_users(self):
+        return [row[0] for row in await self._fetchall("SELECT [id] FROM [Users]")]
+
+    async def generate_entities(self, num_entities):
+        """
+        Генерує сутності аніме з пов'язаними даними (див. MSSQLDatabase.generate_entities).
+        Жанри й користувачі читаються з бази лише при першому виклику, далі - з reference_data.
+        """
+        reference = await self.reference_data.load_async()
+        return self.entity_generator.generate_relational(
+            num_entities, reference.get('genres'), reference.get('users'))
+
+    @measure_execution_time
+    async def get_top_rated_anime(self, n=10):
+        """Отримує топ N аніме за середнім рейтингом (функція GetTopRatedAnime)."""
+        return await self._fetchall("SELECT * FROM GetTopRatedAnime(?)", (n,))
+
+    @measure_execution_time
+    async def get_average_anime_rating(self, anime_id):
+        """Отримує середній рейтинг для конкретного аніме."""
+        async with self._cursor() as cursor:
+            await cursor.execute("SELECT dbo.GetAverageAnimeRating(?)", (anime_id,))
+            result = await cursor.fetchone()
+            return result[0] if result else None
+
+    @measure_execution_time
+    async def get_anime_by_genre(self, genre_name):
+        """Отримує список аніме за назвою жанру."""
+        return await self._fetchall("SELECT * FROM GetAnimeByGenre(?)", (genre_name,))
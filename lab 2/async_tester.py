@@ -0,0 +1,162 @@
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from load_generator import DEFAULT_WORKLOAD, insert_payload, load_report, print_load_result
+from performance_metrics import PerformanceMetrics
+from result_sink import JsonLinesSink
+
+
+class _AsyncLoadClient:
+    def __init__(self, db, metrics: PerformanceMetrics, workload: Dict[str, float],
+                 payloads: Sequence[Tuple[Dict[str, Any], list, list]], page_size: int, seed=None):
+        """Асинхронний аналог load_generator._LoadClient: одна корутина - один клієнт."""
+        self.db = db
+        self.metrics = metrics
+        self.operations = list(workload)
+        self.weights = list(workload.values())
+        self.payloads = payloads
+        self.page_size = page_size
+        self.rng = random.Random(seed)
+        self.inserted_ids: List[Any] = []
+
+    async def _execute(self, operation: str) -> str:
+        if operation == 'update_simple' and not self.inserted_ids:
+            operation = 'insert_simple'
+
+        if operation == 'fetch_simple':
+            await self.db.fetch_anime_simple(limit=self.page_size)
+        elif operation == 'fetch_with_relations':
+            await self.db.fetch_anime_with_relations(limit=self.page_size)
+        elif operation == 'paginate':
+            await self.db.paginate_anime(self.page_size)
+        elif operation in ('insert_simple', 'insert_with_relations'):
+            anime_data, genres, reviews = self.rng.choice(self.payloads)
+            anime_data = dict(anime_data, title=f"Load {anime_data.get('title', '')}")
+            if operation == 'insert_simple':
+                anime_id = await self.db.insert_anime_simple(anime_data)
+            else:
+                anime_id = await self.db.insert_anime_with_relations(
+                    anime_data, list(genres), [dict(review) for review in reviews])
+            if anime_id is not None:
+                self.inserted_ids.append(anime_id)
+        elif operation == 'update_simple':
+            await self.db.update_anime_simple(
+                self.rng.choice(self.inserted_ids), {'episodes': self.rng.randint(1, 100)})
+        else:
+            raise ValueError(f"Невідома операція навантаження: {operation}")
+        return operation
+
+    async def run(self, deadline: float, interval: Optional[float], start_time: float):
+        """Виконує операції до deadline (time.perf_counter); interval - як у _LoadClient.run."""
+        scheduled = start_time
+        while True:
+            if interval is None:
+                scheduled = time.perf_counter()
+            else:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if scheduled >= deadline:
+                return
+
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            try:
+                operation = await self._execute(operation)
+                self.metrics.add_execution_time(operation, time.perf_counter() - scheduled)
+            except Exception:
+                self.metrics.add_execution_time(f"{operation}_error", time.perf_counter() - scheduled)
+
+            if interval is not None:
+                scheduled += interval
+
+
+class AsyncLoadTester:
+    def __init__(self, db_factory: Callable[[], Awaitable[Any]], concurrency_levels: Sequence[int] = (1, 10, 100, 500),
+                 duration: float = 10.0, target_ops_per_sec: Optional[float] = None,
+                 workload: Optional[Dict[str, float]] = None, prefill_size: int = 1000, payload_count: int = 100,
+                 page_size: int = 10, seed: Optional[int] = None,
+                 output_file=f"db_async_load_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"):
+        """
+        Змішане навантаження на асинхронні бекенди (AsyncMSSQLDatabase, AsyncMongoDatabase):
+        кожен клієнт - корутина, тож в одному процесі й потоці одночасно виконуються сотні запитів.
+        Записи результатів мають ту саму форму, що й у ConcurrentLoadTester (test_info.mode = 'asyncio'),
+        тому їх можна порівнювати з синхронними бекендами в одному звіті.
+
+        Args:
+            db_factory: корутина без аргументів, що створює екземпляр бази,
+                напр. functools.partial(AsyncMSSQLDatabase.create, connection_string, pool_size=100)
+            concurrency_levels: кількості одночасних клієнтів (запитів у польоті)
+            інші аргументи - як у ConcurrentLoadTester
+        """
+        workload = dict(DEFAULT_WORKLOAD if workload is None else workload)
+        unknown = set(workload) - set(DEFAULT_WORKLOAD)
+        if unknown:
+            raise ValueError(f"Невідомі операції навантаження: {sorted(unknown)}")
+
+        self.db_factory = db_factory
+        self.concurrency_levels = list(concurrency_levels)
+        self.duration = duration
+        self.target_ops_per_sec = target_ops_per_sec
+        self.workload = workload
+        self.prefill_size = prefill_size
+        self.payload_count = payload_count
+        self.page_size = page_size
+        self.seed = seed
+        self.output_file = output_file
+        self.sink = JsonLinesSink(output_file)
+
+    async def _run_level(self, db, clients: int) -> PerformanceMetrics:
+        metrics = PerformanceMetrics()
+        payloads = [insert_payload(entity) for entity in await db.generate_entities(self.payload_count)]
+        interval = None if self.target_ops_per_sec is None else clients / self.target_ops_per_sec
+        start_time = time.perf_counter()
+        await asyncio.gather(*(
+            _AsyncLoadClient(db, metrics, self.workload, payloads, self.page_size,
+                             None if self.seed is None else f"{self.seed}-{clients}-{index}")
+            .run(start_time + self.duration, interval, start_time)
+            for index in range(clients)
+        ))
+        return metrics
+
+    async def run(self) -> List[Dict[str, Any]]:
+        """Запускає всі рівні паралельності (asyncio.run(tester.run()))."""
+        db = await self.db_factory()
+        results = []
+        try:
+            if self.prefill_size:
+                print(f"Prefilling {self.prefill_size} entities...")
+                await db.insert_entities_batch(await db.generate_entities(self.prefill_size))
+
+            for clients in self.concurrency_levels:
+                print(f"\nRunning asyncio load with {clients} client(s) for {self.duration} s...")
+                start_time = time.perf_counter()
+                metrics = await self._run_level(db, clients)
+                elapsed = time.perf_counter() - start_time
+
+                result = {
+                    'test_info': {
+                        'mode': 'asyncio',
+                        'clients': clients,
+                        'duration': self.duration,
+                        'target_ops_per_sec': self.target_ops_per_sec,
+                        'workload': self.workload,
+                        'backend': type(db).__name__,
+                        'timestamp': datetime.now().isoformat()
+                    },
+                    'performance_stats': metrics.get_statistics(),
+                    'load': load_report(metrics, self.workload, self.duration, elapsed),
+                    'histograms': metrics.get_histograms()
+                }
+                self.sink.write(result)
+                results.append(result)
+                print_load_result(result)
+        finally:
+            print("\nCleaning up database...")
+            await db.reset()
+            await db.close()
+
+        print(f"\nResults saved to {self.output_file}")
+        return results
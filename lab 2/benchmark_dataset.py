@@ -0,0 +1,227 @@
+import json
+import os
+import shutil
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from data_generator import EntityGenerator
+
+
+FORMAT_VERSION = 1
+
+# Колонки Anime з фіксованою шириною: назва -> dtype на диску
+# (None - ID користувача, dtype обирається за user_count, див. BenchmarkDataset.build)
+ANIME_COLUMNS = {
+    'year': np.int16,
+    'episodes': np.int16,
+    'duration': np.int16,
+    'is_deleted': np.bool_,
+    'created_at': 'datetime64[us]',
+    'updated_at': 'datetime64[us]',
+    'updated_by': None
+}
+
+ANIME_STRING_COLUMNS = ('title', 'original_title', 'synopsis')
+
+REVIEW_COLUMNS = {
+    'user_id': None,
+    'rating': np.uint8,
+    'created_at': 'datetime64[us]',
+    'updated_at': 'datetime64[us]'
+}
+
+
+class _StringPool:
+    """Пул рядків для побудови набору: однакові рядки зберігаються один раз, колонки містять їхні номери."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.chunks: List[bytes] = []
+
+    def add(self, values: Sequence[str]) -> np.ndarray:
+        ids = np.empty(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            string_id = self.ids.get(value)
+            if string_id is None:
+                string_id = self.ids[value] = len(self.chunks)
+                self.chunks.append(value.encode('utf-8'))
+            ids[i] = string_id
+        return ids
+
+    def save(self, path: str):
+        lengths = np.fromiter((len(chunk) for chunk in self.chunks), dtype=np.int64, count=len(self.chunks))
+        np.save(os.path.join(path, 'string_offsets.npy'), np.concatenate(([0], np.cumsum(lengths))))
+        with open(os.path.join(path, 'strings.bin'), 'wb') as file:
+            file.write(b''.join(self.chunks))
+
+
+class BenchmarkDataset:
+    def __init__(self, path: str):
+        """
+        Набір тестових даних на диску, спільний для всіх бекендів (див. build).
+        Колонки відкриваються через np.load(mmap_mode='r') і не читаються в пам'ять цілком:
+        вибірка перших n сутностей - це зрізи відображених у пам'ять масивів, а Python-об'єкти
+        створюються лише для рядків, які передаються драйверу бази.
+
+        Args:
+            path (str): каталог набору, створений BenchmarkDataset.build
+        """
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as file:
+            self.meta = json.load(file)
+        if self.meta['version'] != FORMAT_VERSION:
+            raise ValueError(f"Непідтримувана версія набору даних: {self.meta['version']}")
+
+        self.size: int = self.meta['size']
+        self.seed: int = self.meta['seed']
+        # Ідентифікатори користувачів 1..user_count однакові для всіх бекендів
+        self.user_ids: List[int] = list(range(1, self.meta['user_count'] + 1))
+
+        self._string_offsets = self._load('string_offsets')
+        strings_path = os.path.join(path, 'strings.bin')
+        self._strings = memoryview(
+            np.memmap(strings_path, dtype=np.uint8, mode='r') if os.path.getsize(strings_path) else b'')
+        self.genres: List[Dict[str, str]] = [
+            {'name': name, 'description': description}
+            for name, description in zip(self._decode(self._load('genre_name')),
+                                         self._decode(self._load('genre_description')))
+        ]
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')
+
+    def _decode(self, string_ids: np.ndarray) -> List[str]:
+        starts = self._string_offsets[string_ids].tolist()
+        ends = self._string_offsets[np.asarray(string_ids) + 1].tolist()
+        return [str(self._strings[start:end], 'utf-8') for start, end in zip(starts, ends)]
+
+    @classmethod
+    def build(cls, path: str, size: int, seed: int = 0, user_count: int = 3,
+              genre_count: int = 12) -> 'BenchmarkDataset':
+        """
+        Генерує size сутностей з зерном seed і записує їх у каталог path.
+        Менші розміри (рівні 10, 100, ...) - це перші n сутностей того самого набору,
+        тому один набір обслуговує всі розміри тесту.
+
+        Формат: по одному .npy на колонку, рядки - номери в пулі strings.bin (string_offsets.npy - межі),
+        жанри та відгуки - пласкі колонки з межами сутностей у genre_offsets.npy / review_offsets.npy.
+        Жанри зберігаються як номери в довіднику набору (genre_name / genre_description),
+        користувачі - як ідентифікатори 1..user_count.
+
+        Args:
+            path (str): каталог набору (перезаписується)
+            size (int): кількість сутностей (найбільший розмір тесту)
+            seed (int): зерно генератора
+            user_count (int): кількість користувачів, на яких посилаються відгуки та updated_by
+            genre_count (int): розмір довідника жанрів
+
+        Номери жанрів і ID користувачів зберігаються найменшим беззнаковим типом, що вміщує
+        genre_count - 1 та user_count.
+        """
+        if user_count < 1 or genre_count < 1:
+            raise ValueError("user_count і genre_count мають бути додатніми")
+        user_dtype = np.min_scalar_type(user_count)
+        genre_dtype = np.min_scalar_type(genre_count - 1)
+
+        generator = EntityGenerator(seed)
+        pool = _StringPool()
+        genres = generator.generate_genres(genre_count)
+        genre_names = [genre['name'] for genre in genres]
+        genre_descriptions = [genre['description'] for genre in genres]
+        user_ids = list(range(1, user_count + 1))
+        entities = generator.generate_relational(size, list(range(genre_count)), user_ids)
+
+        columns = {
+            'genre_name': pool.add(genre_names),
+            'genre_description': pool.add(genre_descriptions)
+        }
+        anime = [entity['anime'] for entity in entities]
+        for column, dtype in ANIME_COLUMNS.items():
+            columns[f'anime_{column}'] = np.array([row[column] for row in anime], dtype=dtype or user_dtype)
+        for column in ANIME_STRING_COLUMNS:
+            columns[f'anime_{column}'] = pool.add([row[column] for row in anime])
+
+        columns['genre_offsets'] = np.concatenate(([0], np.cumsum([len(entity['genres']) for entity in entities])))
+        columns['genre_index'] = np.array(
+            [genre for entity in entities for genre in entity['genres']], dtype=genre_dtype)
+
+        reviews = [review for entity in entities for review in entity['reviews']]
+        columns['review_offsets'] = np.concatenate(([0], np.cumsum([len(entity['reviews']) for entity in entities])))
+        for column, dtype in REVIEW_COLUMNS.items():
+            columns[f'review_{column}'] = np.array([review[column] for review in reviews], dtype=dtype or user_dtype)
+        columns['review_content'] = pool.add([review['content'] for review in reviews])
+
+        # Запис у тимчасовий каталог і перейменування, щоб перерваний запис не лишив напівготовий набір
+        temp_path = f'{path}.tmp'
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+        for name, values in columns.items():
+            np.save(os.path.join(temp_path, f'{name}.npy'), values)
+        pool.save(temp_path)
+        with open(os.path.join(temp_path, 'meta.json'), 'w', encoding='utf-8') as file:
+            json.dump({'version': FORMAT_VERSION, 'size': size, 'seed': seed,
+                       'user_count': user_count, 'genre_count': genre_count,
+                       'reviews': len(reviews), 'strings': len(pool.chunks)}, file)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(temp_path, path)
+        return cls(path)
+
+    @classmethod
+    def open_or_build(cls, path: str, size: int, seed: int = 0, **build_options) -> 'BenchmarkDataset':
+        """Відкриває набір з path, якщо він має щонайменше size сутностей і те саме зерно, інакше будує заново."""
+        if os.path.exists(os.path.join(path, 'meta.json')):
+            dataset = cls(path)
+            if dataset.size >= size and dataset.seed == seed:
+                return dataset
+        return cls.build(path, size, seed, **build_options)
+
+    def describe(self) -> Dict[str, object]:
+        """Опис набору для test_info результатів."""
+        return {'path': self.path, 'size': self.size, 'seed': self.seed}
+
+    def _columns(self, num_entities: int):
+        """Колонки аніме та відгуків для перших num_entities сутностей."""
+        if num_entities > self.size:
+            raise ValueError(f"Набір {self.path} містить лише {self.size} сутностей, потрібно {num_entities}")
+
+        anime = {column: self._load(f'anime_{column}')[:num_entities].tolist() for column in ANIME_COLUMNS}
+        for column in ANIME_STRING_COLUMNS:
+            anime[column] = self._decode(self._load(f'anime_{column}')[:num_entities])
+        names = list(anime)
+        anime_rows = [dict(zip(names, values)) for values in zip(*anime.values())]
+
+        review_offsets = self._load('review_offsets')[:num_entities + 1].tolist()
+        review_count = review_offsets[-1]
+        review_columns = {
+            column: self._load(f'review_{column}')[:review_count].tolist() for column in REVIEW_COLUMNS}
+        review_columns['content'] = self._decode(self._load('review_content')[:review_count])
+        review_names = list(review_columns)
+        reviews = [dict(zip(review_names, values)) for values in zip(*review_columns.values())]
+
+        genre_offsets = self._load('genre_offsets')[:num_entities + 1].tolist()
+        genre_index = self._load('genre_index')[:genre_offsets[-1]].tolist()
+        entity_genres = [genre_index[start:end] for start, end in zip(genre_offsets, genre_offsets[1:])]
+        entity_reviews = [reviews[start:end] for start, end in zip(review_offsets, review_offsets[1:])]
+        return anime_rows, entity_genres, entity_reviews
+
+    def relational(self, num_entities: int, genre_ids: Sequence[int]) -> List[dict]:
+        """
+        Перші num_entities сутностей у формі EntityGenerator.generate_relational.
+
+        Args:
+            genre_ids: ID жанрів бази в порядку self.genres
+        """
+        anime_rows, entity_genres, entity_reviews = self._columns(num_entities)
+        return [
+            {'anime': anime, 'genres': [genre_ids[genre] for genre in genres], 'reviews': reviews}
+            for anime, genres, reviews in zip(anime_rows, entity_genres, entity_reviews)
+        ]
+
+    def documents(self, num_entities: int) -> List[dict]:
+        """Перші num_entities сутностей у формі EntityGenerator.generate_documents."""
+        anime_rows, entity_genres, entity_reviews = self._columns(num_entities)
+        return [
+            {**anime, 'genres': [dict(self.genres[genre]) for genre in genres], 'reviews': reviews}
+            for anime, genres, reviews in zip(anime_rows, entity_genres, entity_reviews)
+        ]
@@ -1,13 +1,46 @@
-import json
+import glob
+import os
+
 import matplotlib.pyplot as plt
 import numpy as np
 
-# Load MongoDB and SQL performance logs
-with open('mongo_logs_new.json', 'r') as mongo_file:
-    mongo_logs = json.load(mongo_file)
+from raw_samples import load_samples, summarize_samples, write_summary_csv
+from result_sink import load_results
+
+RAW_SAMPLES_DIR = 'raw_samples'
+
+
+def load_logs(name):
+    """Читає name.jsonl, а якщо його ще немає - старий name.json з JSON-масивом."""
+    path = f'{name}.jsonl'
+    if not os.path.exists(path):
+        path = f'{name}.json'
+    return load_results(path)
+
 
-with open('sql_logs_new.json', 'r') as sql_file:
-    sql_logs = json.load(sql_file)
+def load_averages(backend, logs_name):
+    """
+    Середній час {(розмір даних, операція): секунди} для бекенду.
+    Рахується з окремих замірів у RAW_SAMPLES_DIR, а якщо їх немає - з агрегатів у логах.
+    """
+    paths = sorted(glob.glob(os.path.join(RAW_SAMPLES_DIR, f'{backend}_*.npz')))
+    if paths:
+        return {(row['data_size'], row['operation']): row['avg'] for row in summarize_samples(load_samples(paths))}
+    return {
+        (entry['test_info']['data_size'], operation): stats['avg']
+        for entry in load_logs(logs_name)
+        for operation, stats in entry['performance_stats'].items()
+    }
+
+
+# Load MongoDB and SQL performance results
+mongo_avgs = load_averages('MongoDatabase', 'mongo_logs_new')
+sql_avgs = load_averages('MSSQLDatabase', 'sql_logs_new')
+
+# Summary table over every raw sample of every backend
+all_sample_paths = sorted(glob.glob(os.path.join(RAW_SAMPLES_DIR, '*.npz')))
+if all_sample_paths:
+    write_summary_csv(load_samples(all_sample_paths), 'performance_metrics_summary.csv')
 
 # Prepare data for visualization
 data_sizes = [10, 100, 1000, 10000]
@@ -16,7 +49,7 @@ operations = [
     'insert_entities_batch_simple',
     'fetch_anime_simple',
     'fetch_anime_with_relations',
-    'delete_anime_with_relations'
+    'update_entities_batch'
 ]
 
 # Create visualization
@@ -32,20 +65,14 @@ for idx, operation in enumerate(operations, 1):
     plt.subplot(3, 2, idx)
 
     # Prepare data for MongoDB and SQL
-    mongo_avgs = []
-    sql_avgs = []
-
-    for entry in mongo_logs:
-        if operation in entry['performance_stats']:
-            mongo_avgs.append(entry['performance_stats'][operation]['avg'])
-
-    for entry in sql_logs:
-        if operation in entry['performance_stats']:
-            sql_avgs.append(entry['performance_stats'][operation]['avg'])
+    mongo_sizes = [size for size in data_sizes if (size, operation) in mongo_avgs]
+    sql_sizes = [size for size in data_sizes if (size, operation) in sql_avgs]
 
     # Plot comparison
-    plt.plot(data_sizes, mongo_avgs, marker='o', color=mongo_color, label='MongoDB')
-    plt.plot(data_sizes, sql_avgs, marker='s', color=sql_color, label='SQL')
+    plt.plot(mongo_sizes, [mongo_avgs[size, operation] for size in mongo_sizes],
+             marker='o', color=mongo_color, label='MongoDB')
+    plt.plot(sql_sizes, [sql_avgs[size, operation] for size in sql_sizes],
+             marker='s', color=sql_color, label='SQL')
 
     plt.title(f'Performance: {operation}', fontsize=10)
     plt.xlabel('Data Size', fontsize=8)
@@ -63,10 +90,12 @@ plt.close()
 print("Performance Comparison Summary:")
 for operation in operations:
     print(f"\n{operation}:")
-    for size, mongo_entry, sql_entry in zip(data_sizes, mongo_logs, sql_logs):
-        mongo_avg = mongo_entry['performance_stats'][operation]['avg']
-        sql_avg = sql_entry['performance_stats'][operation]['avg']
+    for size in data_sizes:
+        if (size, operation) not in mongo_avgs or (size, operation) not in sql_avgs:
+            continue
+        mongo_avg = mongo_avgs[size, operation]
+        sql_avg = sql_avgs[size, operation]
         print(f"Data Size {size}:")
         print(f"  MongoDB Average: {mongo_avg:.4f} seconds")
         print(f"  SQL Average:     {sql_avg:.4f} seconds")
-        print(f"  {'MongoDB Faster' if mongo_avg < sql_avg else 'SQL Faster'}")
\ No newline at end of file
+        print(f"  {'MongoDB Faster' if mongo_avg < sql_avg else 'SQL Faster'}")
@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Optional, Tuple
+
+from performance_metrics import PerformanceMetrics
+
+
+class PoolTimeoutError(Exception):
+    """Не вдалося отримати з'єднання з пулу за відведений час."""
+
+
+class ConnectionPool:
+    def __init__(self, factory: Callable[[], Any], max_size: int = 5, timeout: float = 30.0,
+                 max_idle_time: float = 300.0, health_check: Optional[Callable[[Any], bool]] = None,
+                 health_check_after: float = 1.0, metrics: Optional[PerformanceMetrics] = None):
+        """
+        Обмежений потокобезпечний пул з'єднань.
+
+        Args:
+            factory: функція, що створює нове з'єднання
+            max_size (int): максимальна кількість відкритих з'єднань
+            timeout (float): скільки секунд чекати на вільне з'єднання
+            max_idle_time (float): через скільки секунд простою з'єднання закривається
+            health_check: функція перевірки з'єднання при видачі (True - з'єднання робоче)
+            health_check_after (float): перевіряти лише з'єднання, що простоювали щонайменше стільки секунд;
+                щойно повернуте з'єднання видається без додаткового запиту до бази
+            metrics: окремий від метрик операцій бази PerformanceMetrics для часу очікування та лічильників пулу
+        """
+        if max_size < 1:
+            raise ValueError("max_size має бути додатнім")
+
+        self.factory = factory
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle_time = max_idle_time
+        self.health_check = health_check
+        self.health_check_after = health_check_after
+        self.metrics = metrics
+
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition(threading.Lock())
+
+    def _count(self, name: str):
+        if self.metrics is not None:
+            self.metrics.increment_counter(name)
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _evict_idle(self, now: float):
+        """Закриває з'єднання, що простоювали довше max_idle_time. Викликається під блокуванням."""
+        # Найстаріші з'єднання лежать на початку черги
+        while self._idle and now - self._idle[0][1] > self.max_idle_time:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._close_quietly(conn)
+            self._count('pool_evicted')
+
+    def acquire(self):
+        """Видає з'єднання з пулу, за потреби створюючи нове або чекаючи на звільнення."""
+        start_time = time.perf_counter()
+        deadline = start_time + self.timeout
+
+        while True:
+            conn = None
+            idle_since = None
+            create = False
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Пул з'єднань закрито")
+                    self._evict_idle(time.monotonic())
+                    if self._idle:
+                        # Беремо останнє повернуте з'єднання - воно "найтепліше"
+                        conn, idle_since = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                        break
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self._count('pool_timeout')
+                        raise PoolTimeoutError(
+                            f"Не вдалося отримати з'єднання за {self.timeout} с (max_size={self.max_size})")
+                    self._condition.wait(remaining)
+
+            if create:
+                try:
+                    conn = self.factory()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+                self._count('pool_miss')
+            elif (self.health_check is not None and time.monotonic() - idle_since >= self.health_check_after
+                  and not self._is_healthy(conn)):
+                self._count('pool_unhealthy')
+                self._discard(conn)
+                continue
+            else:
+                self._count('pool_hit')
+
+            if self.metrics is not None:
+                self.metrics.add_execution_time('pool_wait', time.perf_counter() - start_time)
+            return conn
+
+    def _is_healthy(self, conn) -> bool:
+        try:
+            return bool(self.health_check(conn))
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def release(self, conn, discard: bool = False):
+        """Повертає з'єднання в пул. Якщо discard=True, з'єднання закривається."""
+        if discard or self._closed:
+            self._discard(conn)
+            return
+        with self._condition:
+            self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Контекстний менеджер з семантикою `with pyodbc.connect(...)`:
+        commit при успішному виході, rollback при винятку, після чого з'єднання повертається в пул.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            try:
+                conn.rollback()
+            except Exception:
+                self.release(conn, discard=True)
+                raise
+            self.release(conn)
+            raise
+        else:
+            try:
+                conn.commit()
+            except Exception:
+                self.release(conn, discard=True)
+                raise
+            self.release(conn)
+
+    def close_all(self):
+        """Закриває всі вільні з'єднання і забороняє видачу нових."""
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._size -= 1
+                self._close_quietly(conn)
+            self._condition.notify_all()
+
+    @property
+    def size(self) -> int:
+        """Кількість відкритих з'єднань (вільних і виданих)."""
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        """Кількість вільних з'єднань у пулі."""
+        return len(self._idle)
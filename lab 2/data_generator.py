@@ -0,0 +1,249 @@
+import datetime
+import random
+import string
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+LETTERS = np.frombuffer(string.ascii_letters.encode('ascii'), dtype=np.uint8)
+SPACE = ord(' ')
+NEWLINE = ord('\n')
+
+
+class EntityGenerator:
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Векторизований генератор тестових даних для всіх бекендів.
+        Кожна колонка (довжини, символи, дати, рейтинги) генерується одним викликом NumPy.
+
+        Args:
+            seed (int): зерно генератора; з однаковим зерном і довідковими даними результат відтворюваний
+        """
+        self.rng = np.random.default_rng(seed)
+
+    def _strings(self, count: int, min_length: int, max_length: int) -> List[str]:
+        """Генерує count рядків з латинських літер довжиною від min_length до max_length."""
+        if count == 0:
+            return []
+        lengths = self.rng.integers(min_length, max_length + 1, count)
+        text = LETTERS[self.rng.integers(0, len(LETTERS), lengths.sum())].tobytes().decode('ascii')
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        return [text[start:end] for start, end in zip(starts.tolist(), ends.tolist())]
+
+    def _spaced_texts(self, letters_per_line: np.ndarray, lines_per_text: np.ndarray) -> List[str]:
+        """
+        Генерує тексти у форматі ' '.join(літери) з рядками, розділеними '\\n'.
+
+        Args:
+            letters_per_line: кількість літер у кожному рядку (для всіх текстів підряд)
+            lines_per_text: кількість рядків у кожному тексті
+        """
+        if len(lines_per_text) == 0:
+            return []
+        total = int(letters_per_line.sum())
+        separators = np.full(total, SPACE, dtype=np.uint8)
+        line_letter_ends = np.cumsum(letters_per_line)
+        separators[line_letter_ends - 1] = NEWLINE
+
+        buffer = np.empty(2 * total, dtype=np.uint8)
+        buffer[0::2] = LETTERS[self.rng.integers(0, len(LETTERS), total)]
+        buffer[1::2] = separators
+        text = buffer.tobytes().decode('ascii')
+
+        # Межі текстів у літерах; останній роздільник тексту відкидається
+        line_bounds = np.concatenate(([0], line_letter_ends))
+        text_line_ends = np.cumsum(lines_per_text)
+        letter_ends = line_bounds[text_line_ends]
+        letter_starts = line_bounds[text_line_ends - lines_per_text]
+        return [text[2 * start:2 * end - 1] for start, end in zip(letter_starts.tolist(), letter_ends.tolist())]
+
+    def _datetimes_before(self, now: datetime.datetime, count: int, max_days: int) -> List[datetime.datetime]:
+        """Генерує count моментів часу now - [0, max_days] днів."""
+        days = self.rng.integers(0, max_days + 1, count).astype('timedelta64[D]')
+        return (np.datetime64(now, 'us') - days).tolist()
+
+    def _choices(self, values: Sequence, count: int) -> list:
+        """Вибір count значень з values з поверненням."""
+        values = np.asarray(values, dtype=object)
+        return values[self.rng.integers(0, len(values), count)].tolist()
+
+    def _split(self, values: list, counts: np.ndarray) -> List[list]:
+        """Ділить плоский список на підсписки довжиною counts."""
+        ends = np.cumsum(counts).tolist()
+        starts = [0] + ends[:-1]
+        return [values[start:end] for start, end in zip(starts, ends)]
+
+    def _anime_columns(self, num_entities: int, user_ids: Sequence, now: datetime.datetime) -> Dict[str, list]:
+        """Генерує всі колонки Anime для num_entities записів."""
+        lines_per_synopsis = self.rng.integers(1, 6, num_entities)
+        return {
+            'title': self._strings(num_entities, 5, 20),
+            'original_title': self._strings(num_entities, 5, 20),
+            'year': self.rng.integers(1900, 2025, num_entities).tolist(),
+            'synopsis': self._spaced_texts(
+                self.rng.integers(10, 51, lines_per_synopsis.sum()), lines_per_synopsis),
+            'episodes': self.rng.integers(1, 101, num_entities).tolist(),
+            'duration': self.rng.integers(10, 121, num_entities).tolist(),
+            'is_deleted': self.rng.integers(0, 2, num_entities).astype(bool).tolist(),
+            'created_at': self._datetimes_before(now, num_entities, 365),
+            'updated_at': self._datetimes_before(now, num_entities, 30),
+            'updated_by': self._choices(user_ids, num_entities),
+        }
+
+    def _reviews(self, num_entities: int, user_ids: Sequence, now: datetime.datetime) -> List[List[dict]]:
+        """Генерує від 1 до 10 відгуків для кожної з num_entities сутностей."""
+        counts = self.rng.integers(1, 11, num_entities)
+        total = int(counts.sum())
+        reviews = [
+            {
+                'user_id': user_id,
+                'rating': rating,
+                'content': content,
+                'created_at': created_at,
+                'updated_at': updated_at
+            }
+            for user_id, rating, content, created_at, updated_at in zip(
+                self._choices(user_ids, total),
+                self.rng.integers(1, 11, total).tolist(),
+                self._spaced_texts(self.rng.integers(20, 101, total), np.ones(total, dtype=np.int64)),
+                self._datetimes_before(now, total, 365),
+                self._datetimes_before(now, total, 30)
+            )
+        ]
+        return self._split(reviews, counts)
+
+    def generate_relational(self, num_entities: int, genre_ids: Sequence[int], user_ids: Sequence) -> List[dict]:
+        """
+        Генерує сутності у реляційній формі {'anime': {...}, 'genres': [id, ...], 'reviews': [...]}.
+
+        Args:
+            num_entities (int): кількість сутностей
+            genre_ids: ID існуючих жанрів
+            user_ids: ID існуючих користувачів
+        """
+        if num_entities == 0:
+            return []
+        now = datetime.datetime.now()
+        columns = self._anime_columns(num_entities, user_ids, now)
+        reviews = self._reviews(num_entities, user_ids, now)
+
+        # Вибірка жанрів без повторень: перші k позицій випадкової перестановки
+        genre_ids = np.asarray(genre_ids, dtype=object)
+        genre_counts = self.rng.integers(1, min(5, len(genre_ids)) + 1, num_entities)
+        permutations = self.rng.random((num_entities, len(genre_ids))).argsort(axis=1)
+
+        names = list(columns)
+        return [
+            {
+                'anime': dict(zip(names, values)),
+                'genres': genre_ids[permutation[:count]].tolist(),
+                'reviews': entity_reviews
+            }
+            for values, permutation, count, entity_reviews in zip(
+                zip(*columns.values()), permutations, genre_counts.tolist(), reviews)
+        ]
+
+    def generate_genres(self, count: int) -> List[Dict[str, str]]:
+        """Генерує count жанрів {'name', 'description'} (назва 5-10 літер, опис 20-50)."""
+        return [
+            {'name': name, 'description': description}
+            for name, description in zip(self._strings(count, 5, 10), self._strings(count, 20, 50))
+        ]
+
+    def generate_documents(self, num_entities: int, user_ids: Sequence) -> List[dict]:
+        """
+        Генерує документи MongoDB з вкладеними жанрами ({'name', 'description'}) та відгуками.
+
+        Args:
+            num_entities (int): кількість документів
+            user_ids: ID користувачів для відгуків та updated_by
+        """
+        if num_entities == 0:
+            return []
+        now = datetime.datetime.now()
+        columns = self._anime_columns(num_entities, user_ids, now)
+        reviews = self._reviews(num_entities, user_ids, now)
+
+        genre_counts = self.rng.integers(1, 6, num_entities)
+        total_genres = int(genre_counts.sum())
+        genres = self._split(self.generate_genres(total_genres), genre_counts)
+
+        names = list(columns)
+        return [
+            {**dict(zip(names, values)), 'genres': entity_genres, 'reviews': entity_reviews}
+            for values, entity_genres, entity_reviews in zip(zip(*columns.values()), genres, reviews)
+        ]
+
+
+def generate_relational_python(num_entities: int, genre_ids: Sequence[int], user_ids: Sequence) -> List[dict]:
+    """Попередній посимвольний генератор з MSSQLDatabase.generate_entities; залишений як база для порівняння."""
+    entities = []
+    for _ in range(num_entities):
+        anime = {
+            'title': ''.join(random.choices(string.ascii_letters, k=random.randint(5, 20))),
+            'original_title': ''.join(random.choices(string.ascii_letters, k=random.randint(5, 20))),
+            'year': random.randint(1900, 2024),
+            'synopsis': '\n'.join([
+                ' '.join(random.choices(string.ascii_letters, k=random.randint(10, 50)))
+                for _ in range(random.randint(1, 5))
+            ]),
+            'episodes': random.randint(1, 100),
+            'duration': random.randint(10, 120),
+            'is_deleted': random.choice([True, False]),
+            'created_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 365)),
+            'updated_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 30)),
+            'updated_by': random.choice(user_ids)
+        }
+
+        genres = random.sample(list(genre_ids), k=random.randint(1, min(5, len(genre_ids))))
+
+        reviews = []
+        for _ in range(random.randint(1, 10)):
+            reviews.append({
+                'user_id': random.choice(user_ids),
+                'rating': random.randint(1, 10),
+                'content': ' '.join(random.choices(string.ascii_letters, k=random.randint(20, 100))),
+                'created_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 365)),
+                'updated_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 30))
+            })
+
+        entities.append({'anime': anime, 'genres': genres, 'reviews': reviews})
+
+    return entities
+
+
+def benchmark_generators(sizes: Sequence[int] = (10, 100, 1000, 10000), repeats: int = 3) -> Dict[int, Dict[str, float]]:
+    """
+    Порівнює пропускну здатність (сутностей/с) EntityGenerator і посимвольного генератора.
+
+    Returns:
+        dict: {розмір: {'python': сутн./с, 'numpy': сутн./с, 'speedup': у скільки разів швидше}}
+    """
+    genre_ids = list(range(1, 21))
+    user_ids = list(range(1, 101))
+    generator = EntityGenerator(seed=0)
+
+    results = {}
+    for size in sizes:
+        timings = {}
+        for name, generate in (
+                ('python', lambda: generate_relational_python(size, genre_ids, user_ids)),
+                ('numpy', lambda: generator.generate_relational(size, genre_ids, user_ids))):
+            best = float('inf')
+            for _ in range(repeats):
+                start_time = time.perf_counter()
+                generate()
+                best = min(best, time.perf_counter() - start_time)
+            timings[name] = size / best
+        timings['speedup'] = timings['numpy'] / timings['python']
+        results[size] = timings
+    return results
+
+
+if __name__ == '__main__':
+    for size, result in benchmark_generators().items():
+        print(f"Size {size}: python {result['python']:.0f} entities/sec, "
+              f"numpy {result['numpy']:.0f} entities/sec, speedup x{result['speedup']:.1f}")
@@ -1,59 +1,272 @@
-import json
+import os
 import time
-from typing import List, Dict, Any
+import tracemalloc
+from typing import List, Dict, Any, Optional, Tuple
 import random
 import statistics
 from datetime import datetime
 
+from performance_metrics import (
+    MIN_CONFIDENCE_SAMPLES, MIN_OUTLIER_SAMPLES, PerformanceMetrics, find_outliers, mean_confidence_interval
+)
+from raw_samples import SampleRecorder
+from result_sink import JsonLinesSink
+
 
 class DatabasePerformanceTester:
-    def __init__(self, db, data_sizes: List[int], iterations: int = 3, output_file = f"db_performance_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"):
+    def __init__(self, db, data_sizes: List[int], iterations: int = 3, output_file = f"db_performance_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+                 stream_batch_size: int = 1000, track_memory: bool = False, page_size: int = 100,
+                 raw_samples_dir: Optional[str] = None, backend: Optional[str] = None,
+                 warmup_iterations: int = 1, min_iterations: int = MIN_CONFIDENCE_SAMPLES,
+                 target_relative_ci: float = 0.05, ci_absolute_tolerance: float = 0.0005, iteration_pause: float = 0.0, index_comparison: bool = False, reset_strategy: Optional[str] = None):
         """
         Ініціалізація тестера продуктивності.
 
         Args:
             db: екземпляр MSSQLDatabase
             data_sizes: список розмірів даних для тестування
-            iterations: кількість повторень кожного тесту
+            iterations: максимальна кількість повторень кожного тесту
+            output_file: файл результатів у форматі JSON Lines (один запис на розмір даних)
+            stream_batch_size: розмір порції для потокового читання (iter_anime)
+            track_memory: чи вимірювати пікове використання пам'яті операціями читання (через tracemalloc);
+                пам'ять вимірюється окремим прогоном без замірів часу, бо tracemalloc сповільнює операції
+            page_size: розмір сторінки для keyset-пагінації (paginate_anime)
+            raw_samples_dir: каталог для файлів .npz з усіма окремими замірами (None - не зберігати)
+            backend: назва бекенду в замірах (за замовчуванням - назва класу db)
+            warmup_iterations: кількість початкових "холодних" повторень, результати яких відкидаються
+            min_iterations: мінімальна кількість повторень перед адаптивною зупинкою
+                (не менше MIN_CONFIDENCE_SAMPLES, інакше довірчий інтервал не може звузитися)
+            target_relative_ci: повторення зупиняються, коли для кожної операції половина 95% довірчого
+                інтервалу середнього (t-розподіл) не перевищує цієї частки середнього (None - завжди iterations повторень)
+            ci_absolute_tolerance: половина довірчого інтервалу в секундах, якої достатньо для зупинки
+                незалежно від target_relative_ci (для субмілісекундних операцій відносна точність недосяжна)
+            iteration_pause: пауза між повтореннями в секундах
+            index_comparison: запускати кожен розмір двічі - без індексів бази (drop_indexes) і з ними
+                (create_indexes) - і записувати прискорення операцій та додаткову вартість запису
+            reset_strategy: стратегія db.reset для очищення бази між повтореннями
+                (None - перша з db.RESET_STRATEGIES, типова для бекенду)
         """
+        if target_relative_ci is not None and min_iterations < MIN_CONFIDENCE_SAMPLES:
+            raise ValueError(f"min_iterations має бути не менше {MIN_CONFIDENCE_SAMPLES} для адаптивної зупинки")
+        reset_strategy = reset_strategy or db.RESET_STRATEGIES[0]
+        if reset_strategy not in db.RESET_STRATEGIES:
+            raise ValueError(f"{type(db).__name__} не підтримує стратегію очищення {reset_strategy}")
+        if index_comparison and not hasattr(db, 'drop_indexes'):
+            raise ValueError(f"{type(db).__name__} не підтримує керування індексами")
         self.db = db
         self.data_sizes = data_sizes
         self.iterations = iterations
         self.output_file = output_file
+        self.sink = JsonLinesSink(output_file)
+        self.stream_batch_size = stream_batch_size
+        self.track_memory = track_memory
+        self.memory_peaks: Dict[str, int] = {}
+        self.page_size = page_size
+        self._deep_page_after_id = None
+        self.raw_samples_dir = raw_samples_dir
+        self.backend = backend or type(db).__name__
+        self.run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if raw_samples_dir is not None:
+            os.makedirs(raw_samples_dir, exist_ok=True)
+            self.db.performance_metrics.samples = SampleRecorder()
+        self.warmup_iterations = warmup_iterations
+        self.min_iterations = min_iterations
+        self.target_relative_ci = target_relative_ci
+        self.ci_absolute_tolerance = ci_absolute_tolerance
+        self.iteration_pause = iteration_pause
+        self.index_comparison = index_comparison
+        self.reset_strategy = reset_strategy
+        # Час очищення бази між повтореннями - окремо від замірів операцій
+        self.cleanup_metrics = PerformanceMetrics()
+        # Час кожної операції тестера в кожному повторенні (для довірчих інтервалів і викидів)
+        self.iteration_times: Dict[str, List[float]] = {}
         self.results = {}
 
     def run_tests(self):
-        """Запуск всіх тестів продуктивності."""
+        """
+        Запуск всіх тестів продуктивності.
+        Для кожного розміру спочатку виконуються warmup_iterations повторень, результати яких відкидаються,
+        а далі повторення тривають (щонайменше min_iterations), доки половина 95% довірчого інтервалу середнього
+        (t-розподіл) кожної операції не стане меншою за target_relative_ci середнього або за ci_absolute_tolerance
+        секунд, або доки не буде досягнуто iterations.
+        Довідкові дані бази (користувачі, жанри) перечитуються один раз на запуск.
+        """
+        reference_data = getattr(self.db, 'reference_data', None)
+        if reference_data is not None:
+            reference_data.refresh()
         try:
             for size in self.data_sizes:
                 print(f"\nRunning tests for size: {size}")
-                self.results[size] = {}
+                if self.index_comparison:
+                    self.results[size] = self._compare_indexes(size)
+                else:
+                    self.results[size] = self._finish_size(size, *self._run_size(size))
 
-                for iteration in range(self.iterations):
-                    print(f"Iteration {iteration + 1}/{self.iterations}")
+        except Exception as e:
+            print(f"Error during testing: {str(e)}")
+            raise
 
-                    # Генерація тестових даних
-                    print("Generating test data...")
-                    entities = self.db.generate_entities(size)
+    def _run_size(self, size: int) -> Tuple[int, bool]:
+        """
+        Розігрів і адаптивні повторення для розміру size.
+        Повертає (кількість повторень, чи звузилися довірчі інтервали середніх до цілі - див. _is_converged).
+        """
+        for warmup in range(self.warmup_iterations):
+            print(f"Warm-up iteration {warmup + 1}/{self.warmup_iterations}")
+            self._run_iteration(size)
+        self._reset_measurements()
 
-                    # Тестування операцій
-                    self._test_batch_operations(size, entities)
-                    self._test_single_operations(size)
+        iteration = 0
+        for iteration in range(self.iterations):
+            print(f"Iteration {iteration + 1}/{self.iterations}")
+            if self.db.performance_metrics.samples is not None:
+                self.db.performance_metrics.samples.iteration = iteration
+            self._run_iteration(size)
 
-                    # Очищення бази даних після кожної ітерації
-                    print("Cleaning up database...")
-                    self.db.delete_anime_with_relations()
+            if iteration + 1 >= self.min_iterations and self._is_converged():
+                print(f"Confidence intervals are within {self.target_relative_ci:.0%} "
+                      f"(or ±{self.ci_absolute_tolerance * 1000:.1f} ms), stopping")
+                return iteration + 1, True
+        return iteration + 1, False
 
-                    # Невелика пауза між ітераціями
-                    time.sleep(1)
+    def _finish_size(self, size: int, iterations: int, converged: bool, test_info: Optional[Dict[str, Any]] = None,
+                     extra: Optional[Dict[str, Any]] = None, backend: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Зберігає результати й окремі заміри розміру size та скидає заміри. Повертає _iteration_report."""
+        # Збереження результатів
+        report = self._save_results(size, iterations, converged, test_info, extra)
+        self._save_raw_samples(size, backend)
+        self._reset_measurements()
+        return report
 
-            # Збереження результатів
-                self._save_results(size)
-                self.db.performance_metrics.clear()
+    def _compare_indexes(self, size: int) -> Dict[str, Dict[str, Any]]:
+        """
+        Прогін розміру size без індексів і з індексами бази.
+        Обидва прогони записуються окремими рядками (test_info.indexes = False / True),
+        а порівняння - в поле index_comparison рядка з індексами.
+        Індекси відновлюються і тоді, коли прогін без них перервався помилкою.
+        """
+        print("\nIndexes: dropped")
+        self.db.drop_indexes()
+        try:
+            without_indexes = self._finish_size(size, *self._run_size(size), test_info={'indexes': False},
+                                                backend=f"{self.backend}-no-indexes")
+        finally:
+            print("\nIndexes: created")
+            self.db.create_indexes()
 
-        except Exception as e:
-            print(f"Error during testing: {str(e)}")
-            raise
+        iterations, converged = self._run_size(size)
+        comparison = self._index_comparison(without_indexes, self._iteration_report())
+        self._finish_size(size, iterations, converged, test_info={'indexes': True},
+                          extra={'index_comparison': comparison})
+        self._print_index_comparison(comparison)
+        return comparison
+
+    @staticmethod
+    def _index_comparison(without_indexes: Dict[str, Dict[str, Any]],
+                          with_indexes: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Порівняння медіан операцій: speedup = без індексів / з індексами.
+        Для операцій запису додатково write_overhead - відносне подорожчання через підтримку індексів.
+        """
+        comparison = {}
+        for op_name, values in with_indexes.items():
+            if op_name not in without_indexes:
+                continue
+            before = without_indexes[op_name]['median']
+            after = values['median']
+            entry = {
+                'median_without_indexes': before,
+                'median_with_indexes': after,
+                'speedup': before / after if after > 0 else None
+            }
+            if any(word in op_name for word in ('insert', 'update', 'delete')):
+                entry['write_overhead'] = after / before - 1 if before > 0 else None
+            comparison[op_name] = entry
+        return comparison
+
+    def _run_iteration(self, size: int):
+        """Одне повторення: генерація даних, усі операції та очищення бази."""
+        # Генерація тестових даних
+        print("Generating test data...")
+        entities = self.db.generate_entities(size)
+
+        # Тестування операцій
+        self._test_batch_operations(size, entities)
+        self._test_update_operations(size)
+        self._test_single_operations(size)
+
+        # Очищення бази даних після кожної ітерації
+        print(f"Resetting database ({self.reset_strategy})...")
+        start_time = time.perf_counter()
+        self.db.reset(self.reset_strategy)
+        self.cleanup_metrics.add_execution_time(f"reset_{self.reset_strategy}", time.perf_counter() - start_time)
+
+        if self.iteration_pause:
+            time.sleep(self.iteration_pause)
+
+    def _reset_measurements(self):
+        self.db.performance_metrics.clear()
+        self.cleanup_metrics.clear()
+        pool_metrics = getattr(self.db, 'pool_metrics', None)
+        if pool_metrics is not None:
+            pool_metrics.clear()
+        if self.db.performance_metrics.samples is not None:
+            self.db.performance_metrics.samples.clear()
+        if hasattr(self.db, 'reset_cache_stats'):
+            self.db.reset_cache_stats()
+        self.memory_peaks = {}
+        self.iteration_times = {}
+
+    def _run_operation(self, op_name: str, op_func):
+        """Виконує операцію тестера і записує її час у iteration_times."""
+        print(f"Running {op_name}...")
+        start_time = time.perf_counter()
+        op_func()
+        self.iteration_times.setdefault(op_name, []).append(time.perf_counter() - start_time)
+
+    @staticmethod
+    def _confidence_interval(times: List[float]) -> Dict[str, float]:
+        """Медіана, середнє та 95% довірчий інтервал середнього."""
+        mean = statistics.mean(times)
+        low, high = mean_confidence_interval(times)
+        return {
+            'median': statistics.median(times),
+            'mean': mean,
+            'ci_low': low,
+            'ci_high': high,
+            'ci_half_width': (high - low) / 2,
+            'relative_ci': (high - low) / 2 / mean if mean > 0 else 0.0
+        }
+
+    def _is_converged(self) -> bool:
+        """
+        Чи вузькі довірчі інтервали для кожної операції тестера: відносно (target_relative_ci)
+        або абсолютно (ci_absolute_tolerance).
+        """
+        if self.target_relative_ci is None or not self.iteration_times:
+            return False
+        for times in self.iteration_times.values():
+            interval = self._confidence_interval(times)
+            if (interval['relative_ci'] > self.target_relative_ci
+                    and interval['ci_half_width'] > self.ci_absolute_tolerance):
+                return False
+        return True
+
+    def _iteration_report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Статистика операцій тестера по повтореннях. Викиди не відкидаються мовчки:
+        вони перелічені з номерами повторень, а середнє наводиться і з ними, і без них.
+        Поля викидів є лише для операцій з щонайменше MIN_OUTLIER_SAMPLES повтореннями.
+        """
+        report = {}
+        for op_name, times in self.iteration_times.items():
+            report[op_name] = {'times': times, **self._confidence_interval(times)}
+            if len(times) >= MIN_OUTLIER_SAMPLES:
+                outliers = find_outliers(times)
+                kept = [value for index, value in enumerate(times) if index not in outliers]
+                report[op_name]['mean_without_outliers'] = statistics.mean(kept) if kept else None
+                report[op_name]['outliers'] = [{'iteration': index, 'time': times[index]} for index in outliers]
+        return report
 
     def _test_batch_operations(self, size: int, entities: List[Dict[str, Any]]):
         """Тестування операцій з багатьма записами."""
@@ -61,16 +274,128 @@ class DatabasePerformanceTester:
             'batch_insert_with_relations': lambda: self.db.insert_entities_batch(entities),
             'batch_insert_simple': lambda: self.db.insert_entities_batch_simple(entities),
             'batch_fetch_simple': lambda: self.db.fetch_anime_simple(limit=size),
-            'batch_fetch_with_relations': lambda: self.db.fetch_anime_with_relations(limit=size)
+            'batch_fetch_with_relations': lambda: self.db.fetch_anime_with_relations(limit=size),
+            'batch_fetch_documents': lambda: self.db.fetch_anime_documents(limit=size),
+            'batch_fetch_records': lambda: self.db.fetch_anime_records(limit=size),
+            'batch_stream_simple': lambda: self._consume(
+                self.db.iter_anime(limit=size, batch_size=self.stream_batch_size)),
+            'batch_stream_with_relations': lambda: self._consume(
+                self.db.iter_anime(limit=size, with_relations=True, batch_size=self.stream_batch_size)),
+            'batch_paginate_walk': self._walk_pages,
+            'batch_fetch_by_year': lambda: self.db.fetch_anime_simple(
+                filters={'year': self._sample_year(entities)}, limit=size),
+            'batch_top_rated': lambda: self.db.get_top_rated_anime(10)
         }
+        read_operations = {'batch_fetch_simple', 'batch_fetch_with_relations', 'batch_fetch_documents',
+                           'batch_fetch_records', 'batch_stream_simple', 'batch_stream_with_relations'}
 
         for op_name, op_func in operations.items():
             try:
-                print(f"Running {op_name}...")
-                op_func()
+                self._run_operation(op_name, op_func)
             except Exception as e:
                 print(f"Error in {op_name}: {str(e)}")
 
+        if self.track_memory:
+            for op_name in read_operations - set(self.memory_peaks):
+                try:
+                    self._run_with_memory_tracking(op_name, operations[op_name])
+                except Exception as e:
+                    print(f"Error in {op_name} (memory): {str(e)}")
+
+    def _test_update_operations(self, size: int):
+        """
+        Тестування оновлень записів, вставлених пакетними операціями.
+        Оновлення генеруються generate_updates до початку замірів: пакетні охоплюють половину записів,
+        а одиночні - один запис. Службове читання ID не потрапляє в статистику fetch_anime_simple.
+        """
+        with self.db.performance_metrics.paused():
+            rows = self.db.fetch_anime_simple(limit=size)
+        if not rows:
+            return
+        anime_updates = self.db.generate_updates(rows, update_type='anime')
+        relation_updates = self.db.generate_updates(rows, update_type='all')
+        single_id, single_update = next(iter(self.db.generate_updates(rows, update_percentage=0).items()))
+
+        operations = {
+            'batch_update_simple': lambda: self.db.update_entities_batch(anime_updates),
+            'batch_update_with_relations': lambda: self.db.update_entities_batch(relation_updates),
+            # Копії, бо MongoDatabase доповнює словник оновлення службовими полями
+            'single_update_simple': lambda: self.db.update_anime_simple(single_id, dict(single_update['anime'])),
+            'single_update_with_relations': lambda: self.db.update_anime_with_relations(
+                single_id,
+                dict(single_update['anime']),
+                single_update['genres'],
+                single_update['reviews']
+            )
+        }
+
+        for op_name, op_func in operations.items():
+            try:
+                self._run_operation(op_name, op_func)
+            except Exception as e:
+                print(f"Error in {op_name}: {str(e)}")
+
+    @staticmethod
+    def _sample_year(entities: List[Dict[str, Any]]) -> Optional[int]:
+        """Рік першої згенерованої сутності для вибірки за фільтром (реляційна або документна форма)."""
+        if not entities:
+            return None
+        anime = entities[0].get('anime', entities[0])
+        return None if anime.get('year') is None else int(anime['year'])
+
+    def _walk_pages(self) -> int:
+        """
+        Проходить всю таблицю сторінками по page_size і запам'ятовує курсор останньої сторінки
+        для тесту глибокої сторінки. Повертає кількість прочитаних сторінок.
+        """
+        pages = 0
+        after_id = None
+        self._deep_page_after_id = None
+        while True:
+            rows, next_after_id = self.db.paginate_anime(self.page_size, after_id=after_id)
+            if rows:
+                pages += 1
+                self._deep_page_after_id = after_id
+            if next_after_id is None:
+                return pages
+            after_id = next_after_id
+
+    def _fetch_deep_page(self):
+        """
+        Читає останню сторінку таблиці за курсором, знайденим у _walk_pages.
+        Записується лише як paginate_anime_deep_page, щоб не змішуватись зі сторінками обходу в paginate_anime.
+        """
+        metrics = self.db.performance_metrics
+        start_time = time.perf_counter()
+        with metrics.paused():
+            result = self.db.paginate_anime(self.page_size, after_id=self._deep_page_after_id)
+        metrics.add_execution_time('paginate_anime_deep_page', time.perf_counter() - start_time)
+        return result
+
+    @staticmethod
+    def _consume(rows) -> int:
+        """Вичитує потік рядків, не зберігаючи їх, і повертає їх кількість."""
+        count = 0
+        for _ in rows:
+            count += 1
+        return count
+
+    def _run_with_memory_tracking(self, op_name: str, op_func):
+        """
+        Окремий прогін операції під tracemalloc (один раз на розмір даних) для піку пам'яті в байтах.
+        Метрики бази на час прогону вимкнені: сповільнена tracemalloc операція не потрапляє в статистику часу.
+        """
+        tracemalloc.start()
+        try:
+            with self.db.performance_metrics.paused():
+                result = op_func()
+            # Результат ще живий, тому матеріалізований список потрапляє в пік, а потік - ні
+            _, peak = tracemalloc.get_traced_memory()
+            del result
+        finally:
+            tracemalloc.stop()
+        self.memory_peaks[op_name] = peak
+
     def _test_single_operations(self, size: int):
         """Тестування операцій з одним записом у контексті заповненої бази даних."""
         single_entity = self.db.generate_entities(1)[0]
@@ -107,67 +432,115 @@ class DatabasePerformanceTester:
                 single_entity['reviews']
             ),
             'single_fetch_simple': lambda: self.db.fetch_anime_simple(limit=1),
-            'single_fetch_with_relations': lambda: self.db.fetch_anime_with_relations(limit=1)
+            'single_fetch_with_relations': lambda: self.db.fetch_anime_with_relations(limit=1),
+            'single_fetch_documents': lambda: self.db.fetch_anime_documents(limit=1),
+            'single_fetch_deep_page': self._fetch_deep_page
         }
 
         for op_name, op_func in operations.items():
             try:
-                print(f"Running {op_name}...")
-                op_func()
+                self._run_operation(op_name, op_func)
             except Exception as e:
                 print(f"Error in {op_name}: {str(e)}")
 
-    def _save_results(self, size):
-        """Збереження результатів тестування у файл."""
+    def _save_results(self, size, iterations, converged=False, test_info=None, extra=None):
+        """
+        Збереження результатів тестування у файл.
+        test_info доповнює однойменний розділ запису, extra додається до запису окремими полями.
+        Повертає статистику операцій тестера по повтореннях.
+        """
         # Отримання статистики з performance_metrics
         stats = self.db.get_performance_stats()
+        iteration_report = self._iteration_report()
+        cleanup_stats = self.cleanup_metrics.get_statistics()
 
         # Форматування результатів
         formatted_results = {
             'test_info': {
                 'data_size': size,
-                'iterations': self.iterations,
+                'iterations': iterations,
+                'max_iterations': self.iterations,
+                'warmup_iterations': self.warmup_iterations,
+                'converged': converged,
+                'reset_strategy': self.reset_strategy,
+                **(test_info or {}),
                 'timestamp': datetime.now().isoformat()
             },
-            'performance_stats': stats
+            'performance_stats': stats,
+            'iteration_stats': iteration_report,
+            'cleanup_stats': cleanup_stats,
+            'histograms': self.db.performance_metrics.get_histograms()
         }
+        counters = self.db.performance_metrics.get_counters()
+        if counters:
+            formatted_results['counters'] = counters
+        throughput = self.db.performance_metrics.get_throughput()
+        if throughput:
+            formatted_results['throughput'] = throughput
+        if self.memory_peaks:
+            formatted_results['memory_peak_bytes'] = self.memory_peaks
+        dataset = getattr(self.db, 'dataset', None)
+        if dataset is not None:
+            formatted_results['test_info']['dataset'] = dataset.describe()
+        # Пул з'єднань звітується окремо: час очікування з'єднання не є операцією бази
+        pool_metrics = getattr(self.db, 'pool_metrics', None)
+        pool_stats = None
+        if pool_metrics is not None:
+            pool_stats = {'performance_stats': pool_metrics.get_statistics(), 'counters': pool_metrics.get_counters()}
+            formatted_results['pool_stats'] = pool_stats
+        reference_data = getattr(self.db, 'reference_data', None)
+        if reference_data is not None:
+            formatted_results['test_info']['reference_data'] = reference_data.describe()
+        # Бази, обгорнуті в query_cache.CachedDatabase
+        cache_stats = self.db.cache_stats() if hasattr(self.db, 'cache_stats') else None
+        if cache_stats is not None:
+            formatted_results['cache'] = cache_stats
+        formatted_results.update(extra or {})
 
-        # Збереження у JSON файл
+        # Дописування одного рядка у файл JSON Lines
         filename = self.output_file
-
-        # Перевірка, чи файл вже існує та має вміст
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                existing_content = f.read().strip()
-        except FileNotFoundError:
-            existing_content = ''
-
-        # Відкриття файлу для запису
-        with open(filename, 'w', encoding='utf-8') as f:
-            # Якщо файл порожній, додаємо відкриваючу квадратну дужку
-            if not existing_content:
-                f.write('[\n')
-            elif existing_content.endswith(']'):
-                # Якщо файл вже містить масив, видаляємо закриваючу дужку
-                f.seek(0)
-                f.truncate()
-                f.write(existing_content[:-1] + ',\n')
-            else:
-                # Якщо є вміст без дужок, додаємо кому та квадратні дужки
-                f.seek(0)
-                f.truncate()
-                f.write('[\n' + existing_content + ',\n')
-
-            # Додаємо поточний результат
-            json.dump(formatted_results, f, indent=2, ensure_ascii=False)
-
-            # Закриваємо масив
-            f.write('\n]')
+        self.sink.write(formatted_results)
 
         print(f"\nResults saved to {filename}")
 
         # Виведення короткого звіту
         self._print_summary(stats)
+        self._print_iteration_summary(iteration_report)
+        for name, values in cleanup_stats.items():
+            print(f"\nCleanup {name}: median {values['median']:.4f} s, max {values['max']:.4f} s "
+                  f"({values['count']} resets, not included in the operation stats)")
+        if counters:
+            print("\nCounters:")
+            for name, value in sorted(counters.items()):
+                print(f"  {name}: {value}")
+        if throughput:
+            print("\nThroughput:")
+            for name, values in throughput.items():
+                print(f"  {name}: {values['rows_per_sec']:.0f} rows/sec ({values['rows']} rows)")
+        if pool_stats is not None:
+            print("\nConnection pool: " + ", ".join(
+                f"{name} {value}" for name, value in sorted(pool_stats['counters'].items())))
+            for name, values in pool_stats['performance_stats'].items():
+                print(f"  {name}: median {values['median']:.6f} s, max {values['max']:.6f} s ({values['count']})")
+        if cache_stats is not None:
+            print(f"\nQuery cache: hit ratio {cache_stats['hit_ratio']:.1%} "
+                  f"({cache_stats['hits']} hits, {cache_stats['misses']} misses), "
+                  f"saved {cache_stats['saved_seconds']:.4f} s")
+        return iteration_report
+
+    def _save_raw_samples(self, size: int, backend: Optional[str] = None):
+        """
+        Записує окремі заміри для розміру size у {raw_samples_dir}/{backend}_{size}_{run_id}.npz.
+        backend - мітка бекенду замість self.backend (напр. для прогону без індексів).
+        """
+        samples = self.db.performance_metrics.samples
+        if samples is None or self.raw_samples_dir is None:
+            return
+        backend = backend or self.backend
+        path = os.path.join(self.raw_samples_dir, f"{backend}_{size}_{self.run_id}.npz")
+        samples.save(path, backend, size)
+        samples.clear()
+        print(f"Raw samples saved to {path}")
 
     def _print_summary(self, stats: Dict[str, Dict[str, float]]):
         """Виведення короткого звіту про результати тестування."""
@@ -180,4 +553,28 @@ class DatabasePerformanceTester:
             print(f"  Median time: {metrics['median']:.4f} seconds")
             print(f"  Min time: {metrics['min']:.4f} seconds")
             print(f"  Max time: {metrics['max']:.4f} seconds")
-            print(f"  Number of executions: {metrics['count']}")
\ No newline at end of file
+            print(f"  p90 / p99 / p99.9: {metrics['p90']:.4f} / {metrics['p99']:.4f} / {metrics['p999']:.4f} seconds")
+            print(f"  Number of executions: {metrics['count']}")
+
+    def _print_iteration_summary(self, report: Dict[str, Dict[str, Any]]):
+        """Медіани й середні операцій тестера з довірчими інтервалами середнього та позначеними викидами."""
+        print("\nPer-iteration median, mean (95% CI of the mean):")
+        for op_name, values in report.items():
+            line = (f"  {op_name}: {values['median']:.4f} s, {values['mean']:.4f} s "
+                    f"[{values['ci_low']:.4f}, {values['ci_high']:.4f}] ±{values['relative_ci']:.1%}")
+            if values.get('outliers'):
+                line += " OUTLIERS: " + ", ".join(
+                    f"iteration {outlier['iteration'] + 1} = {outlier['time']:.4f} s" for outlier in values['outliers'])
+            print(line)
+
+    @staticmethod
+    def _print_index_comparison(comparison: Dict[str, Dict[str, Any]]):
+        """Прискорення операцій від індексів і додаткова вартість запису."""
+        print("\nIndex comparison (median without / with indexes):")
+        for op_name, values in comparison.items():
+            speedup = values['speedup']
+            line = (f"  {op_name}: {values['median_without_indexes']:.4f} / {values['median_with_indexes']:.4f} s, "
+                    f"speedup x{speedup:.2f}" if speedup is not None else f"  {op_name}: n/a")
+            if values.get('write_overhead') is not None:
+                line += f", write overhead {values['write_overhead']:+.1%}"
+            print(line)
@@ -0,0 +1,321 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from performance_metrics import PerformanceMetrics
+from result_sink import JsonLinesSink
+
+
+# Відносні ваги операцій у змішаному навантаженні за замовчуванням
+DEFAULT_WORKLOAD = {
+    'fetch_simple': 40,
+    'fetch_with_relations': 20,
+    'paginate': 10,
+    'insert_simple': 15,
+    'insert_with_relations': 10,
+    'update_simple': 5
+}
+
+# Навантаження з переважанням аналітичного читання (топ і середній рейтинг), напр. для query_cache.CachedDatabase
+READ_HEAVY_WORKLOAD = {
+    'top_rated': 40,
+    'average_rating': 30,
+    'fetch_simple': 15,
+    'insert_with_relations': 10,
+    'update_simple': 5
+}
+
+# Операції, які підтримують клієнти ConcurrentLoadTester
+LOAD_OPERATIONS = frozenset(DEFAULT_WORKLOAD) | frozenset(READ_HEAVY_WORKLOAD)
+
+INSERT_FIELDS = ('title', 'original_title', 'year', 'synopsis', 'episodes', 'duration', 'is_deleted', 'updated_by')
+
+
+def insert_payload(entity: Dict[str, Any]) -> Tuple[Dict[str, Any], list, list]:
+    """Розкладає результат generate_entities (реляційна або документна форма) на (аніме, жанри, відгуки)."""
+    anime = entity.get('anime', entity)
+    anime_data = {field: anime[field] for field in INSERT_FIELDS if field in anime}
+    return anime_data, entity.get('genres', []), entity.get('reviews', [])
+
+
+class _LoadClient:
+    def __init__(self, db, metrics: PerformanceMetrics, workload: Dict[str, float],
+                 payloads: Sequence[Tuple[Dict[str, Any], list, list]], page_size: int, seed=None):
+        """Один клієнт навантаження: виконує випадкові операції з workload і записує їхні затримки в metrics."""
+        self.db = db
+        self.metrics = metrics
+        self.operations = list(workload)
+        self.weights = list(workload.values())
+        self.payloads = payloads
+        self.page_size = page_size
+        self.rng = random.Random(seed)
+        self.inserted_ids: List[Any] = []
+
+    def _execute(self, operation: str) -> str:
+        """Виконує операцію. Повертає назву фактично виконаної операції."""
+        if operation == 'update_simple' and not self.inserted_ids:
+            # Оновлювати ще нічого - спочатку вставляємо власний запис
+            operation = 'insert_simple'
+        elif operation == 'average_rating' and not self.inserted_ids:
+            operation = 'insert_with_relations'
+
+        if operation == 'fetch_simple':
+            self.db.fetch_anime_simple(limit=self.page_size)
+        elif operation == 'top_rated':
+            self.db.get_top_rated_anime(self.page_size)
+        elif operation == 'average_rating':
+            self.db.get_average_anime_rating(self.rng.choice(self.inserted_ids))
+        elif operation == 'fetch_with_relations':
+            self.db.fetch_anime_with_relations(limit=self.page_size)
+        elif operation == 'paginate':
+            self.db.paginate_anime(self.page_size)
+        elif operation in ('insert_simple', 'insert_with_relations'):
+            # Копії, бо MongoDatabase доповнює словники службовими полями
+            anime_data, genres, reviews = self.rng.choice(self.payloads)
+            anime_data = dict(anime_data, title=f"Load {anime_data.get('title', '')}")
+            if operation == 'insert_simple':
+                anime_id = self.db.insert_anime_simple(anime_data)
+            else:
+                anime_id = self.db.insert_anime_with_relations(
+                    anime_data, list(genres), [dict(review) for review in reviews])
+            if anime_id is not None:
+                self.inserted_ids.append(anime_id)
+        elif operation == 'update_simple':
+            self.db.update_anime_simple(self.rng.choice(self.inserted_ids), {'episodes': self.rng.randint(1, 100)})
+        else:
+            raise ValueError(f"Невідома операція навантаження: {operation}")
+        return operation
+
+    def run(self, duration: float, interval: Optional[float] = None, start_time: Optional[float] = None):
+        """
+        Виконує операції протягом duration секунд.
+
+        Args:
+            duration (float): тривалість у секундах
+            interval (float): None - закритий цикл (наступна операція одразу після попередньої);
+                інакше операції плануються кожні interval секунд, а затримка рахується від запланованого
+                моменту, тож черга через перевантаження бази теж потрапляє в затримку
+            start_time (float): спільний для всіх клієнтів момент старту (time.perf_counter)
+        """
+        start_time = time.perf_counter() if start_time is None else start_time
+        deadline = start_time + duration
+        scheduled = start_time
+
+        while True:
+            if interval is None:
+                scheduled = time.perf_counter()
+            else:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if scheduled >= deadline:
+                return
+
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            try:
+                operation = self._execute(operation)
+                self.metrics.add_execution_time(operation, time.perf_counter() - scheduled)
+            except Exception:
+                self.metrics.add_execution_time(f"{operation}_error", time.perf_counter() - scheduled)
+
+            if interval is not None:
+                scheduled += interval
+
+
+def _run_process_client(db_factory: Callable, workload: Dict[str, float], payload_count: int, page_size: int,
+                        duration: float, interval: Optional[float], seed) -> Dict[str, Any]:
+    """Клієнт в окремому процесі: власне підключення, власні метрики, результат - PerformanceMetrics.to_dict()."""
+    db = db_factory()
+    try:
+        metrics = PerformanceMetrics()
+        payloads = [insert_payload(entity) for entity in db.generate_entities(payload_count)]
+        _LoadClient(db, metrics, workload, payloads, page_size, seed).run(duration, interval)
+        return metrics.to_dict()
+    finally:
+        db.close()
+
+
+def load_report(metrics: PerformanceMetrics, workload: Dict[str, float], duration: float,
+                elapsed: float) -> Dict[str, Any]:
+    """
+    Пропускна здатність і частка помилок загалом та по кожній операції.
+    Операції запускаються лише протягом duration, тож швидкість рахується від нього,
+    а не від повного часу рівня з запуском клієнтів і генерацією даних (elapsed).
+    """
+    stats = metrics.get_statistics()
+    operations = {}
+    for operation in workload:
+        count = stats.get(operation, {}).get('count', 0)
+        errors = stats.get(f"{operation}_error", {}).get('count', 0)
+        if count or errors:
+            operations[operation] = {
+                'count': count,
+                'errors': errors,
+                'error_rate': errors / (count + errors),
+                'ops_per_sec': count / duration
+            }
+    total = sum(values['count'] for values in operations.values())
+    errors = sum(values['errors'] for values in operations.values())
+    return {
+        'elapsed': elapsed,
+        'ops': total,
+        'errors': errors,
+        'ops_per_sec': total / duration,
+        'error_rate': errors / (total + errors) if total + errors else 0.0,
+        'operations': operations
+    }
+
+
+def print_load_result(result: Dict[str, Any]):
+    """Короткий звіт про один рівень паралельності."""
+    load = result['load']
+    print(f"Clients: {result['test_info']['clients']}: {load['ops_per_sec']:.1f} ops/sec, "
+          f"errors {load['error_rate']:.2%}")
+    for operation, values in load['operations'].items():
+        stats = result['performance_stats'].get(operation)
+        if stats is None:
+            print(f"  {operation}: all {values['errors']} failed")
+            continue
+        print(f"  {operation}: {values['ops_per_sec']:.1f} ops/sec, "
+              f"p50 / p99 / p99.9: {stats['median']:.4f} / {stats['p99']:.4f} / {stats['p999']:.4f} s, "
+              f"errors {values['error_rate']:.2%}")
+    cache = result.get('cache')
+    if cache is not None:
+        print(f"  query cache: hit ratio {cache['hit_ratio']:.1%}, saved {cache['saved_seconds']:.4f} s, "
+              f"{cache['invalidations']} invalidations")
+
+
+class ConcurrentLoadTester:
+    def __init__(self, db_factory: Callable, concurrency_levels: Sequence[int] = (1, 2, 4, 8),
+                 duration: float = 10.0, mode: str = 'thread', target_ops_per_sec: Optional[float] = None,
+                 workload: Optional[Dict[str, float]] = None, prefill_size: int = 1000, payload_count: int = 100,
+                 page_size: int = 10, seed: Optional[int] = None,
+                 output_file=f"db_load_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"):
+        """
+        Генератор паралельного змішаного навантаження (читання + запис) для будь-якого бекенду.
+        Для кожного рівня паралельності з concurrency_levels запускає стільки ж клієнтів і записує
+        пропускну здатність, перцентилі затримок і частку помилок по кожній операції.
+
+        Args:
+            db_factory: функція без аргументів, що створює екземпляр бази
+                (для mode='process' має серіалізуватися pickle, напр. functools.partial(SQLiteDatabase, path))
+            concurrency_levels: кількості одночасних клієнтів
+            duration (float): тривалість кожного рівня в секундах
+            mode (str): 'thread' - клієнти-потоки зі спільним екземпляром бази (і пулом з'єднань);
+                'process' - кожен клієнт в окремому процесі з власним підключенням
+            target_ops_per_sec (float): сумарна цільова кількість операцій/с (відкритий цикл);
+                None - закритий цикл, кожен клієнт працює без пауз
+            workload: відносні ваги операцій (ключі з LOAD_OPERATIONS, напр. DEFAULT_WORKLOAD або READ_HEAVY_WORKLOAD)
+            prefill_size (int): скільки сутностей вставити перед тестом, щоб читання не були порожніми
+            payload_count (int): скільки згенерованих сутностей використовувати для вставок
+            page_size (int): кількість рядків в операціях читання
+            seed (int): зерно вибору операцій клієнтами
+            output_file: файл результатів у форматі JSON Lines (один запис на рівень паралельності)
+        """
+        if mode not in ('thread', 'process'):
+            raise ValueError("mode має бути 'thread' або 'process'")
+        workload = dict(DEFAULT_WORKLOAD if workload is None else workload)
+        unknown = set(workload) - LOAD_OPERATIONS
+        if unknown:
+            raise ValueError(f"Невідомі операції навантаження: {sorted(unknown)}")
+
+        self.db_factory = db_factory
+        self.concurrency_levels = list(concurrency_levels)
+        self.duration = duration
+        self.mode = mode
+        self.target_ops_per_sec = target_ops_per_sec
+        self.workload = workload
+        self.prefill_size = prefill_size
+        self.payload_count = payload_count
+        self.page_size = page_size
+        self.seed = seed
+        self.output_file = output_file
+        self.sink = JsonLinesSink(output_file)
+
+    def _client_seed(self, clients: int, index: int):
+        return None if self.seed is None else f"{self.seed}-{clients}-{index}"
+
+    def _interval(self, clients: int) -> Optional[float]:
+        """Інтервал між операціями одного клієнта для досягнення target_ops_per_sec."""
+        if self.target_ops_per_sec is None:
+            return None
+        return clients / self.target_ops_per_sec
+
+    def _run_threads(self, db, clients: int) -> PerformanceMetrics:
+        metrics = PerformanceMetrics()
+        payloads = [insert_payload(entity) for entity in db.generate_entities(self.payload_count)]
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            futures = [
+                executor.submit(
+                    _LoadClient(db, metrics, self.workload, payloads, self.page_size,
+                                self._client_seed(clients, index)).run,
+                    self.duration, self._interval(clients), start_time)
+                for index in range(clients)
+            ]
+            for future in futures:
+                future.result()
+        return metrics
+
+    def _run_processes(self, clients: int) -> PerformanceMetrics:
+        metrics = PerformanceMetrics()
+        with ProcessPoolExecutor(max_workers=clients) as executor:
+            futures = [
+                executor.submit(
+                    _run_process_client, self.db_factory, self.workload, self.payload_count, self.page_size,
+                    self.duration, self._interval(clients), self._client_seed(clients, index))
+                for index in range(clients)
+            ]
+            for future in futures:
+                metrics.merge(PerformanceMetrics.from_dict(future.result()))
+        return metrics
+
+    def run(self) -> List[Dict[str, Any]]:
+        """Запускає всі рівні паралельності. Повертає записи результатів (вони ж дописуються в output_file)."""
+        db = self.db_factory()
+        results = []
+        try:
+            if self.prefill_size:
+                print(f"Prefilling {self.prefill_size} entities...")
+                db.insert_entities_batch(db.generate_entities(self.prefill_size))
+
+            for clients in self.concurrency_levels:
+                print(f"\nRunning {self.mode} load with {clients} client(s) for {self.duration} s...")
+                if hasattr(db, 'reset_cache_stats'):
+                    db.reset_cache_stats()
+                start_time = time.perf_counter()
+                if self.mode == 'thread':
+                    metrics = self._run_threads(db, clients)
+                else:
+                    metrics = self._run_processes(clients)
+                elapsed = time.perf_counter() - start_time
+
+                result = {
+                    'test_info': {
+                        'mode': self.mode,
+                        'clients': clients,
+                        'duration': self.duration,
+                        'target_ops_per_sec': self.target_ops_per_sec,
+                        'workload': self.workload,
+                        'backend': type(db).__name__,
+                        'timestamp': datetime.now().isoformat()
+                    },
+                    'performance_stats': metrics.get_statistics(),
+                    'load': load_report(metrics, self.workload, self.duration, elapsed),
+                    'histograms': metrics.get_histograms()
+                }
+                # Кеш обгортки query_cache.CachedDatabase спільний лише для клієнтів-потоків
+                if self.mode == 'thread' and hasattr(db, 'cache_stats'):
+                    result['cache'] = db.cache_stats()
+                self.sink.write(result)
+                results.append(result)
+                print_load_result(result)
+        finally:
+            print("\nCleaning up database...")
+            db.reset()
+            db.close()
+
+        print(f"\nResults saved to {self.output_file}")
+        return results
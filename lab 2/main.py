@@ -1,71 +1,67 @@
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List
 
+from benchmark_dataset import BenchmarkDataset
 from mongo_database import MongoDatabase
 from ms_sql_database import MSSQLDatabase
+from sqlite_database import SQLiteDatabase
 from database_tester import DatabasePerformanceTester
+from result_sink import load_results
 
 
-def format_performance_results(output_file: str) -> Dict[str, Any]:
+def format_performance_results(output_file: str) -> List[Dict[str, Any]]:
     """
-    Read and parse JSON performance test results from a file.
+    Read and validate performance test results from a JSON Lines file.
 
     Args:
-        output_file (str): Path to the JSON file with performance test results
+        output_file (str): Path to the JSONL file with performance test results
 
     Returns:
-        Dict[str, Any]: Formatted and validated JSON object
+        List[Dict[str, Any]]: One result per tested data size
     """
     try:
-        # Read the entire file content
-        with open(output_file, 'r', encoding='utf-8') as f:
-            # If the file contains multiple JSON objects, parse them into a list
-            raw_content = f.read().strip()
-
-            # Handle potential multiple JSON objects in the file
-            if raw_content.startswith('['):
-                # If already a JSON array, load directly
-                results = json.loads(raw_content)
-            else:
-                # If multiple JSON objects are written sequentially, split and parse
-                json_strings = raw_content.split('\n}\n{')
-                results = []
-                for idx, json_str in enumerate(json_strings):
-                    # Add back the braces that were stripped during splitting
-                    if idx > 0:
-                        json_str = '{' + json_str
-                    if idx < len(json_strings) - 1:
-                        json_str += '}'
-
-                    results.append(json.loads(json_str))
+        results = load_results(output_file)
 
         # Optional: Validate the structure
         for result in results:
             assert 'test_info' in result, "Missing test_info in result"
             assert 'performance_stats' in result, "Missing performance_stats in result"
 
-        return results if len(results) > 1 else results[0]
+        return results
 
     except json.JSONDecodeError as e:
         print(f"Error decoding JSON: {e}")
-        return {}
+        return []
     except AssertionError as e:
         print(f"Validation error: {e}")
-        return {}
+        return []
     except Exception as e:
         print(f"Unexpected error: {e}")
-        return {}
+        return []
 
-def test_database_with_logs(output_file, connection, db_name = None):
-    if db_name is None:
-        db = MSSQLDatabase(connection)
-    else:
-        db = MongoDatabase(connection, db_name)
+
+DATASET_PATH = 'datasets/anime'
+DATASET_SEED = 42
+
+
+def test_database_with_logs(output_file, connection, db_name = None, backend = None, index_comparison = False):
     # Визначення розмірів даних для тестування
     data_sizes = [10, 100, 1000, 10000]
     # data_sizes = [10]
-    iterations = 5  # Кількість повторень для кожного розміру
-    tester = DatabasePerformanceTester(db, data_sizes, iterations, output_file)
+    # Спільний для всіх бекендів набір даних: генерується один раз і далі лише відкривається з диска
+    dataset = BenchmarkDataset.open_or_build(DATASET_PATH, max(data_sizes), seed=DATASET_SEED)
+    if backend == 'sqlite':
+        db = SQLiteDatabase(connection, dataset=dataset)
+    elif db_name is None:
+        db = MSSQLDatabase(connection, dataset=dataset)
+    else:
+        db = MongoDatabase(connection, db_name, dataset=dataset)
+    # Максимальна кількість повторень; тестер зупиняється раніше, коли 95% довірчі інтервали середніх
+    # звужуються до target_relative_ci (або до ci_absolute_tolerance для субмілісекундних операцій)
+    iterations = 10
+    tester = DatabasePerformanceTester(db, data_sizes, iterations, output_file, raw_samples_dir='raw_samples',
+                                       warmup_iterations=1, min_iterations=5, target_relative_ci=0.05,
+                                       index_comparison=index_comparison)
     try:
         print("Starting performance tests...")
         tester.run_tests()
@@ -77,7 +73,8 @@ def test_database_with_logs(output_file, connection, db_name = None):
     finally:
         # Очищення бази даних після всіх тестів
         print("\nFinal cleanup...")
-        db.delete_anime_with_relations()
+        db.reset()
+        db.close()
         print("Cleanup completed")
 
 
@@ -89,7 +86,41 @@ mssql_connection_string = (
 )
 mongo_connection_string = r'mongodb://localhost:27017/'
 mongo_name = 'AnimeDB'
-
-test_database_with_logs("mongo_logs_new.json", mongo_connection_string, mongo_name)
-test_database_with_logs("sql_logs_new.json", mssql_connection_string)
+sqlite_path = 'anime_benchmark.db'
+
+test_database_with_logs("mongo_logs_new.jsonl", mongo_connection_string, mongo_name)
+test_database_with_logs("sql_logs_new.jsonl", mssql_connection_string)
+# Локальний запуск без SQL Server та MongoDB
+# test_database_with_logs("sqlite_logs_new.jsonl", sqlite_path, backend='sqlite')
+# Кожна операція без індексів і з ними: прискорення читання та додаткова вартість запису
+# test_database_with_logs("mongo_index_logs.jsonl", mongo_connection_string, mongo_name, index_comparison=True)
+# Паралельне змішане навантаження (1..8 клієнтів)
+# import functools
+# from load_generator import ConcurrentLoadTester
+# ConcurrentLoadTester(functools.partial(MSSQLDatabase, mssql_connection_string, pool_size=8),
+#                      output_file="sql_load_new.jsonl").run()
+# Аналітичне читання через кеш результатів запитів (частка влучань і зекономлена затримка в записі 'cache')
+# from load_generator import ConcurrentLoadTester, READ_HEAVY_WORKLOAD
+# from query_cache import CachedDatabase
+# ConcurrentLoadTester(lambda: CachedDatabase(MSSQLDatabase(mssql_connection_string, pool_size=8), ttl=30),
+#                      workload=READ_HEAVY_WORKLOAD, output_file="sql_cached_load_new.jsonl").run()
+# Масштабування паралельного завантаження 10k-100k сутностей від 1 до 8 воркерів
+# import functools
+# from parallel_ingest import ParallelIngestor
+# ParallelIngestor(functools.partial(MongoDatabase, mongo_connection_string, mongo_name), chunk_size=1000,
+#                  mode='process').benchmark_scaling(output_file="mongo_ingest_scaling.jsonl")
+# Те саме навантаження на асинхронні бекенди (сотні запитів у польоті в одному потоці);
+# потребують motor та aioodbc, тому імпортуються лише тут
+# import asyncio
+# import functools
+# from async_mongo_database import AsyncMongoDatabase
+# from async_ms_sql_database import AsyncMSSQLDatabase
+# from async_tester import AsyncLoadTester
+# asyncio.run(AsyncLoadTester(functools.partial(AsyncMSSQLDatabase.create, mssql_connection_string, pool_size=100),
+#                             output_file="sql_async_load_new.jsonl").run())
+# asyncio.run(AsyncLoadTester(functools.partial(AsyncMongoDatabase.create, mongo_connection_string, mongo_name),
+#                             output_file="mongo_async_load_new.jsonl").run())
+# Топ аніме зі зведення рейтингу проти конвеєра $unwind на 10k і 100k документів
+# from top_rated_benchmark import benchmark_top_rated
+# benchmark_top_rated(MongoDatabase(mongo_connection_string, mongo_name), output_file="mongo_top_rated.jsonl")
 
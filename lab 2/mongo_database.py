@@ -2,37 +2,120 @@ from typing import Dict, List, Optional, Union
 import random
 import string
 import datetime
-from pymongo import MongoClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, MongoClient, UpdateOne
 from pymongo.collection import Collection
 from pymongo.database import Database
 from bson.objectid import ObjectId
 
-from performance_metrics import PerformanceMetrics, measure_execution_time
+from data_generator import EntityGenerator
+from performance_metrics import PerformanceMetrics, measure_execution_time, measure_stream
+from records import anime_record_from_document
+from reference_data import ReferenceData
+
+
+# Декларативний набір індексів колекції anime: назва -> ключі.
+# Індекси по полях вкладених масивів (genres.name, reviews.*) MongoDB автоматично робить multikey
+INDEXES = {
+    'title_1': [('title', ASCENDING)],
+    'year_1_title_1': [('year', ASCENDING), ('title', ASCENDING)],
+    'genres.name_1_year_1': [('genres.name', ASCENDING), ('year', ASCENDING)],
+    'reviews.rating_-1': [('reviews.rating', DESCENDING)],
+    'reviews.user_id_1': [('reviews.user_id', ASCENDING)],
+    'avg_rating_-1': [('avg_rating', DESCENDING)]
+}
+
+
+def rating_summary(reviews: List[dict]) -> Dict[str, Optional[float]]:
+    """
+    Поля зведення рейтингу документа: сума і кількість оцінок та середнє avg_rating,
+    по якому індексом виконується get_top_rated_anime (None, якщо відгуків немає).
+    """
+    ratings = [review['rating'] for review in reviews if review.get('rating') is not None]
+    rating_sum = sum(ratings)
+    return {
+        'rating_sum': rating_sum,
+        'rating_count': len(ratings),
+        'avg_rating': rating_sum / len(ratings) if ratings else None
+    }
+
+
+def add_review_update(review: dict) -> List[dict]:
+    """
+    Оновлення-конвеєр для додавання відгуку: аналог $push + $inc по rating_sum/rating_count,
+    але в тому ж атомарному оновленні перераховується й avg_rating - ключ сортування індексу.
+    """
+    rating = review.get('rating')
+    # $literal - щоб рядки відгуку, які починаються з '$', не сприймалися як шляхи до полів
+    stages = [{'$set': {'reviews': {'$concatArrays': [{'$ifNull': ['$reviews', []]}, {'$literal': [review]}]}}}]
+    if rating is not None:
+        stages.append({'$set': {
+            'rating_sum': {'$add': [{'$ifNull': ['$rating_sum', 0]}, rating]},
+            'rating_count': {'$add': [{'$ifNull': ['$rating_count', 0]}, 1]}
+        }})
+        stages.append({'$set': {'avg_rating': {'$divide': ['$rating_sum', '$rating_count']}}})
+    return stages
+
+
+# Перерахунок зведення рейтингу з масиву reviews (для документів, вставлених до появи зведення)
+REBUILD_RATING_SUMMARY = [
+    {'$set': {
+        'rating_sum': {'$sum': '$reviews.rating'},
+        'rating_count': {'$size': {'$filter': {
+            'input': {'$ifNull': ['$reviews', []]},
+            'cond': {'$ne': [{'$ifNull': ['$$this.rating', None]}, None]}
+        }}}
+    }},
+    {'$set': {'avg_rating': {'$cond': [
+        {'$gt': ['$rating_count', 0]}, {'$divide': ['$rating_sum', '$rating_count']}, None
+    ]}}}
+]
 
 
 class MongoDatabase:
-    def __init__(self, connection_string: str, database_name: str):
+    def __init__(self, connection_string: str, database_name: str, seed: Optional[int] = None,
+                 indexes: bool = True, dataset=None):
         """
         Ініціалізація підключення до MongoDB.
 
         Args:
             connection_string (str): Рядок підключення до MongoDB
             database_name (str): Назва бази даних
+            seed (int): Зерно генератора тестових даних
+            indexes (bool): чи створювати індекси з INDEXES
+            dataset (BenchmarkDataset): спільний набір даних на диску; якщо заданий, generate_entities
+                повертає його перші сутності (з тими самими жанрами та користувачами, що й у SQL)
         """
         self.client = MongoClient(connection_string)
         self.db: Database = self.client[database_name]
         self.anime_collection: Collection = self.db.anime
         self.performance_metrics = PerformanceMetrics()
+        self.entity_generator = EntityGenerator(seed)
+        self.dataset = dataset
+        # Користувачі відгуків для генераторів: distinct по всій колекції виконується один раз, а не на кожен виклик
+        self.reference_data = ReferenceData({'users': lambda: self.fetch_existing_users() or ['default_user']}, seed)
 
         # Створення індексів для оптимізації запитів
-        # self.anime_collection.create_index([("title", 1)])
-        # self.anime_collection.create_index([("year", 1)])
-        # self.anime_collection.create_index([("genres.name", 1)])
-        # self.anime_collection.create_index([("reviews.rating", 1)])
+        if indexes:
+            self.create_indexes()
 
     def get_performance_stats(self) -> Dict[str, Dict[str, float]]:
         return self.performance_metrics.get_statistics()
 
+    def close(self):
+        """Закриття клієнта MongoDB."""
+        self.client.close()
+
+    def create_indexes(self):
+        """Створення індексів з INDEXES (вже наявні не перебудовуються)."""
+        self.anime_collection.create_indexes([IndexModel(keys, name=name) for name, keys in INDEXES.items()])
+
+    def drop_indexes(self):
+        """Видалення індексів з INDEXES (індекс _id лишається)."""
+        existing = self.anime_collection.index_information()
+        for name in INDEXES:
+            if name in existing:
+                self.anime_collection.drop_index(name)
+
     # READ операції
     @measure_execution_time
     def fetch_anime_simple(self, filters=None, limit=10):
@@ -58,6 +141,82 @@ class MongoDatabase:
         result = self.anime_collection.find(query).limit(limit)
         return list(result)
 
+    @measure_execution_time
+    def fetch_anime_records(self, filters=None, limit=10):
+        """Читання документів з вкладеними даними, перетворених в AnimeRecord, як у реляційних бекендах."""
+        query = {}
+        if filters:
+            query.update(filters)
+
+        result = self.anime_collection.find(query).sort('_id', 1).limit(limit)
+        return [anime_record_from_document(document) for document in result]
+
+    @measure_execution_time
+    def fetch_anime_documents(self, filters=None, limit=10):
+        """
+        Читання документів з вкладеними жанрами та відгуками, впорядкованих за _id.
+        Аналог MSSQLDatabase.fetch_anime_documents для порівняння в однаковій формі результату.
+        """
+        query = {}
+        if filters:
+            query.update(filters)
+
+        return list(self.anime_collection.find(query).sort('_id', 1).limit(limit))
+
+    @measure_stream(variant_flags=('with_relations',))
+    def iter_anime(self, filters=None, limit=10, with_relations=False, batch_size=1000):
+        """
+        Потокове читання документів з колекції Anime порціями по batch_size документів.
+
+        Args:
+            filters (dict): фільтр запиту
+            limit (int): максимальна кількість документів
+            with_relations (bool): чи повертати вкладені жанри та відгуки
+            batch_size (int): кількість документів в одній відповіді сервера
+
+        Yields:
+            dict: по одному документу
+        """
+        query = {}
+        if filters:
+            query.update(filters)
+
+        projection = None if with_relations else {'reviews': 0, 'genres': 0}
+        cursor = self.anime_collection.find(query, projection).limit(limit).batch_size(batch_size)
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
+
+    @measure_execution_time
+    def paginate_anime(self, page_size=100, after_id=None, filters=None):
+        """
+        Keyset-пагінація по колекції Anime: сторінка читається пошуком по індексу _id
+        (_id > after_id), тому її вартість не залежить від глибини.
+
+        Args:
+            page_size (int): кількість документів на сторінці
+            after_id (str): _id останнього документа попередньої сторінки (None - перша сторінка)
+            filters (dict): додатковий фільтр запиту
+
+        Returns:
+            tuple: (список документів сторінки, after_id для наступної сторінки або None, якщо сторінок більше немає)
+        """
+        query = {}
+        if filters:
+            query.update(filters)
+        if after_id is not None:
+            query['_id'] = {'$gt': ObjectId(after_id)}
+
+        documents = list(
+            self.anime_collection.find(query, {'reviews': 0, 'genres': 0})
+            .sort('_id', 1)
+            .limit(page_size)
+        )
+
+        next_after_id = str(documents[-1]['_id']) if len(documents) == page_size else None
+        return documents, next_after_id
+
     # CREATE операції
     @measure_execution_time
     def insert_anime_simple(self, anime_data: dict) -> str:
@@ -70,6 +229,7 @@ class MongoDatabase:
         anime_data['updated_at'] = datetime.datetime.now()
         anime_data['genres'] = []  # Порожній масив для жанрів
         anime_data['reviews'] = []  # Порожній масив для відгуків
+        anime_data.update(rating_summary([]))
 
         result = self.anime_collection.insert_one(anime_data)
         return str(result.inserted_id)
@@ -87,7 +247,8 @@ class MongoDatabase:
                 **review,
                 'created_at': datetime.datetime.now(),
                 'updated_at': datetime.datetime.now()
-            } for review in reviews]
+            } for review in reviews],
+            **rating_summary(reviews)
         }
 
         result = self.anime_collection.insert_one(document)
@@ -104,47 +265,118 @@ class MongoDatabase:
             {'$set': updates}
         )
 
-    @measure_execution_time
-    def update_anime_with_relations(self, anime_id: str, anime_updates=None, genres=None, reviews=None):
-        """Оновлення запису в колекції Anime з вкладеними даними."""
-        update_operations = {}
+    @staticmethod
+    def _relations_update(anime_updates=None, genres=None, reviews=None) -> dict:
+        """Поля $set для оновлення аніме з вкладеними даними (жанри й відгуки замінюються цілком)."""
+        now = datetime.datetime.now()
+        fields = {}
 
         if anime_updates:
-            anime_updates['updated_at'] = datetime.datetime.now()
-            update_operations.update({f'$set.{k}': v for k, v in anime_updates.items()})
+            fields.update(anime_updates)
+            fields['updated_at'] = now
 
         if genres is not None:
-            update_operations['$set'] = {'genres': genres}
+            fields['genres'] = genres
 
         if reviews is not None:
             # Оновлюємо часові мітки для відгуків
-            for review in reviews:
-                review['updated_at'] = datetime.datetime.now()
-            update_operations['$set'] = {'reviews': reviews}
+            fields['reviews'] = [{**review, 'updated_at': now} for review in reviews]
+            fields.update(rating_summary(reviews))
+
+        return fields
 
-        if update_operations:
+    @measure_execution_time
+    def update_anime_with_relations(self, anime_id: str, anime_updates=None, genres=None, reviews=None):
+        """Оновлення запису в колекції Anime з вкладеними даними."""
+        fields = self._relations_update(anime_updates, genres, reviews)
+        if fields:
             self.anime_collection.update_one(
                 {'_id': ObjectId(anime_id)},
-                update_operations
+                {'$set': fields}
             )
 
-    # DELETE операції
     @measure_execution_time
-    def delete_anime_simple(self, anime_ids=None):
-        """Видалення записів з колекції Anime."""
+    def update_entities_batch(self, updates: Dict[str, dict], batch_size: Optional[int] = None,
+                              ordered: bool = False):
+        """
+        Пакетне оновлення аніме-сутностей: один bulk_write з UpdateOne на кожне аніме.
+
+        Args:
+            updates (dict): результат generate_updates - {anime_id: {'anime': {...}, 'genres': [...], 'reviews': [...]}}
+            batch_size (int): кількість операцій в одному bulk_write (None - усі одним викликом)
+            ordered (bool): False - сервер може виконувати оновлення паралельно й не зупиняється на першій помилці
+        """
+        operations = []
+        for anime_id, update_data in updates.items():
+            fields = self._relations_update(
+                update_data.get('anime'), update_data.get('genres'), update_data.get('reviews'))
+            if fields:
+                operations.append(UpdateOne({'_id': ObjectId(anime_id)}, {'$set': fields}))
+        if not operations:
+            return
+
+        size = batch_size or len(operations)
+        for i in range(0, len(operations), size):
+            self.anime_collection.bulk_write(operations[i:i + size], ordered=ordered)
+
+    @measure_execution_time
+    def add_review(self, anime_id: str, review: dict):
+        """Додає відгук до аніме і в тому ж оновленні підтримує зведення рейтингу (див. add_review_update)."""
+        now = datetime.datetime.now()
+        self.anime_collection.update_one(
+            {'_id': ObjectId(anime_id)},
+            add_review_update({**review, 'created_at': now, 'updated_at': now})
+        )
+
+    def rebuild_rating_summary(self):
+        """Перераховує rating_sum, rating_count і avg_rating всіх документів з їхніх відгуків."""
+        self.anime_collection.update_many({}, REBUILD_RATING_SUMMARY)
+
+    # DELETE операції
+    def _delete_anime(self, anime_ids=None):
         if anime_ids:
             object_ids = [ObjectId(id_) for id_ in anime_ids]
             self.anime_collection.delete_many({'_id': {'$in': object_ids}})
         else:
             self.anime_collection.delete_many({})
 
+    @measure_execution_time
+    def delete_anime_simple(self, anime_ids=None):
+        """Видалення записів з колекції Anime."""
+        self._delete_anime(anime_ids)
+
     @measure_execution_time
     def delete_anime_with_relations(self, anime_ids=None):
         """
         В MongoDB немає потреби в окремому методі для видалення зв'язаних даних,
         оскільки вони зберігаються в тому ж документі. Тому цей метод ідентичний delete_anime_simple
         """
-        self.delete_anime_simple(anime_ids)
+        self._delete_anime(anime_ids)
+
+    # Скидання стану між повтореннями тестів
+    RESET_STRATEGIES = ('drop', 'delete')
+
+    def reset(self, strategy: str = 'drop'):
+        """
+        Очищення колекції anime між повтореннями тестів (не вимірюється performance_metrics).
+
+        Args:
+            strategy (str): 'drop' - видалення колекції цілком (без видалення кожного документа
+                та оновлення індексів) і створення наявних до цього індексів з INDEXES заново;
+                'delete' - delete_many({}), як у delete_anime_with_relations
+        """
+        if strategy not in self.RESET_STRATEGIES:
+            raise ValueError(f"Невідома стратегія очищення: {strategy}")
+
+        if strategy == 'delete':
+            self.anime_collection.delete_many({})
+            return
+
+        existing = self.anime_collection.index_information()
+        self.anime_collection.drop()
+        indexes = [IndexModel(keys, name=name) for name, keys in INDEXES.items() if name in existing]
+        if indexes:
+            self.anime_collection.create_indexes(indexes)
 
     # Допоміжні методи
     def fetch_existing_genres(self) -> List[dict]:
@@ -157,68 +389,39 @@ class MongoDatabase:
 
     def generate_entities(self, num_entities: int) -> List[dict]:
         """Генерує колекцію сутностей аніме з вкладеними даними."""
-        existing_users = self.fetch_existing_users() or ['default_user']
-
-        entities = []
-        for _ in range(num_entities):
-            # Генерація жанрів
-            genres = [
-                {
-                    'name': ''.join(random.choices(string.ascii_letters, k=random.randint(5, 10))),
-                    'description': ''.join(random.choices(string.ascii_letters, k=random.randint(20, 50)))
-                }
-                for _ in range(random.randint(1, 5))
-            ]
-
-            # Генерація відгуків
-            reviews = [
-                {
-                    'user_id': random.choice(existing_users),
-                    'rating': random.randint(1, 10),
-                    'content': ' '.join(random.choices(string.ascii_letters, k=random.randint(20, 100))),
-                    'created_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 365)),
-                    'updated_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 30))
-                }
-                for _ in range(random.randint(1, 10))
-            ]
-
-            # Основні дані аніме
-            anime = {
-                'title': ''.join(random.choices(string.ascii_letters, k=random.randint(5, 20))),
-                'original_title': ''.join(random.choices(string.ascii_letters, k=random.randint(5, 20))),
-                'year': random.randint(1900, 2024),
-                'synopsis': '\n'.join([
-                    ' '.join(random.choices(string.ascii_letters, k=random.randint(10, 50)))
-                    for _ in range(random.randint(1, 5))
-                ]),
-                'episodes': random.randint(1, 100),
-                'duration': random.randint(10, 120),
-                'is_deleted': random.choice([True, False]),
-                'created_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 365)),
-                'updated_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 30)),
-                'updated_by': random.choice(existing_users),
-                'genres': genres,
-                'reviews': reviews
-            }
-
-            entities.append(anime)
+        if self.dataset is not None:
+            return self.dataset.documents(num_entities)
+        return self.entity_generator.generate_documents(num_entities, self.reference_data.get('users'))
 
-        return entities
+    def _insert_many(self, documents: List[dict], batch_size: Optional[int], ordered: bool):
+        size = batch_size or len(documents)
+        for i in range(0, len(documents), size):
+            self.anime_collection.insert_many(documents[i:i + size], ordered=ordered)
 
     @measure_execution_time
-    def insert_entities_batch(self, entities: List[dict]):
-        """Масове додавання колекції аніме."""
+    def insert_entities_batch(self, entities: List[dict], batch_size: Optional[int] = None, ordered: bool = True):
+        """
+        Масове додавання колекції аніме.
+
+        Args:
+            entities (list): документи для вставки
+            batch_size (int): кількість документів в одному insert_many (None - усі одним викликом)
+            ordered (bool): False - сервер не зупиняється на першій помилці й не мусить
+                зберігати порядок вставки, тому може виконувати її паралельно
+        """
         if entities:
-            # Видаляємо _id з кожної сутності, якщо він є
+            # Видаляємо _id з кожної сутності, якщо він є, і додаємо зведення рейтингу
             for entity in entities:
                 if '_id' in entity:
                     del entity['_id']
+                entity.update(rating_summary(entity.get('reviews', [])))
 
-            self.anime_collection.insert_many(entities)
+            self._insert_many(entities, batch_size, ordered)
 
     @measure_execution_time
-    def insert_entities_batch_simple(self, entities: List[dict]):
-        """Масове додавання колекції аніме без вкладених даних."""
+    def insert_entities_batch_simple(self, entities: List[dict], batch_size: Optional[int] = None,
+                                     ordered: bool = True):
+        """Масове додавання колекції аніме без вкладених даних (аргументи - як у insert_entities_batch)."""
         simple_entities = []
         for entity in entities:
             simple_entity = entity.copy()
@@ -226,10 +429,11 @@ class MongoDatabase:
             simple_entity.pop('_id', None)
             simple_entity.pop('genres', None)
             simple_entity.pop('reviews', None)
+            simple_entity.update(rating_summary([]))
             simple_entities.append(simple_entity)
 
         if simple_entities:
-            self.anime_collection.insert_many(simple_entities)
+            self._insert_many(simple_entities, batch_size, ordered)
 
     def generate_updates(self, entities: List[dict], update_type='all', update_percentage=0.5) -> Dict[str, dict]:
         """Генерує оновлення для існуючих сутностей."""
@@ -239,7 +443,7 @@ class MongoDatabase:
         # Визначаємо кількість сутностей для оновлення
         num_to_update = max(1, int(len(entities) * update_percentage))
         entities_to_update = random.sample(entities, num_to_update)
-        existing_users = self.fetch_existing_users() or ['default_user']
+        reference = self.reference_data
 
         updates = {}
 
@@ -258,7 +462,7 @@ class MongoDatabase:
                     anime_updates['year'] = random.randint(1900, 2024)
 
                 anime_updates['updated_at'] = datetime.datetime.now()
-                anime_updates['updated_by'] = random.choice(existing_users)
+                anime_updates['updated_by'] = reference.choice('users')
 
                 if anime_updates:
                     update_data['anime'] = anime_updates
@@ -275,13 +479,13 @@ class MongoDatabase:
             if update_type in ['all', 'reviews']:
                 update_data['reviews'] = [
                     {
-                        'user_id': random.choice(existing_users),
+                        'user_id': user_id,
                         'rating': random.randint(1, 10),
                         'content': ' '.join(random.choices(string.ascii_letters, k=random.randint(20, 100))),
                         'created_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 365)),
                         'updated_at': datetime.datetime.now()
                     }
-                    for _ in range(random.randint(0, 10))
+                    for user_id in reference.sample('users', random.randint(0, 10))
                 ]
 
             if update_data:
@@ -289,10 +493,9 @@ class MongoDatabase:
 
         return updates
 
-    @measure_execution_time
-    def get_top_rated_anime(self, n=10) -> List[dict]:
-        """Отримує топ N аніме за середнім рейтингом."""
-        pipeline = [
+    @staticmethod
+    def _top_rated_pipeline(n: int) -> List[dict]:
+        return [
             # Розгортаємо масив відгуків
             {'$unwind': '$reviews'},
             # Групуємо по аніме і рахуємо середній рейтинг
@@ -310,12 +513,38 @@ class MongoDatabase:
             {'$limit': n}
         ]
 
-        return list(self.anime_collection.aggregate(pipeline))
+    @staticmethod
+    def _top_rated_cursor(collection, n: int):
+        # Діапазон avg_rating >= 0 відкидає документи без відгуків і обходиться індексом avg_rating_-1
+        return (
+            collection.find({'avg_rating': {'$gte': 0}}, {'title': 1, 'avg_rating': 1, 'rating_count': 1})
+            .sort('avg_rating', DESCENDING)
+            .limit(n)
+        )
+
+    @staticmethod
+    def _top_rated_document(document: dict) -> dict:
+        """Приводить документ до форми результату _top_rated_pipeline."""
+        return {
+            '_id': document['_id'],
+            'title': document.get('title'),
+            'avg_rating': document['avg_rating'],
+            'total_reviews': document['rating_count']
+        }
 
     @measure_execution_time
-    def get_average_anime_rating(self, anime_id: str) -> Optional[float]:
-        """Отримує середній рейтинг для конкретного аніме."""
-        pipeline = [
+    def get_top_rated_anime(self, n=10) -> List[dict]:
+        """Отримує топ N аніме за середнім рейтингом зі зведення avg_rating (по індексу, без $unwind)."""
+        return [self._top_rated_document(document) for document in self._top_rated_cursor(self.anime_collection, n)]
+
+    @measure_execution_time
+    def get_top_rated_anime_pipeline(self, n=10) -> List[dict]:
+        """Попередній варіант get_top_rated_anime: $unwind усіх відгуків колекції на кожен виклик."""
+        return list(self.anime_collection.aggregate(self._top_rated_pipeline(n)))
+
+    @staticmethod
+    def _average_rating_pipeline(anime_id: str) -> List[dict]:
+        return [
             {'$match': {'_id': ObjectId(anime_id)}},
             {'$unwind': '$reviews'},
             {
@@ -326,10 +555,19 @@ class MongoDatabase:
             }
         ]
 
-        result = list(self.anime_collection.aggregate(pipeline))
+    @measure_execution_time
+    def get_average_anime_rating(self, anime_id: str) -> Optional[float]:
+        """Отримує середній рейтинг для конкретного аніме зі зведення рейтингу документа."""
+        document = self.anime_collection.find_one({'_id': ObjectId(anime_id)}, {'avg_rating': 1})
+        return document.get('avg_rating') if document else None
+
+    @measure_execution_time
+    def get_average_anime_rating_pipeline(self, anime_id: str) -> Optional[float]:
+        """Попередній варіант get_average_anime_rating через $unwind відгуків документа."""
+        result = list(self.anime_collection.aggregate(self._average_rating_pipeline(anime_id)))
         return result[0]['avg_rating'] if result else None
 
-    # @measure_execution_time
-    # def get_anime_by_genre(self, genre_name: str) -> List[dict]:
-    #     """Отримує список аніме за назвою жанру."""
-    #     return list(self.anime_collection.find({'genres.name': genre_name}, {'_id': 1, 'title': 1, 'year': 1})
\ No newline at end of file
+    @measure_execution_time
+    def get_anime_by_genre(self, genre_name: str) -> List[dict]:
+        """Отримує список аніме за назвою жанру (індекс genres.name_1_year_1)."""
+        return list(self.anime_collection.find({'genres.name': genre_name}, {'_id': 1, 'title': 1, 'year': 1}))
@@ -1,29 +1,272 @@
 from typing import Dict
 
 import pyodbc
-import random
-import string
 import datetime
 
-from performance_metrics import PerformanceMetrics, measure_execution_time
-
-
-class MSSQLDatabase:
-    def __init__(self, connection_string):
+from connection_pool import ConnectionPool
+from data_generator import EntityGenerator
+from performance_metrics import PerformanceMetrics, measure_execution_time, measure_stream
+from relation_loader import load_anime_documents, load_anime_records
+from relational_database import UPDATABLE_ANIME_COLUMNS, RelationalDatabase
+
+
+INSERT_ANIME = """
+    INSERT INTO Anime (title, original_title, year, synopsis, episodes,
+                       duration, is_deleted, created_at, updated_at, updated_by)
+    OUTPUT INSERTED.id
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_ANIME_BATCH = """
+    INSERT INTO Anime
+    (title, original_title, year, synopsis, episodes, duration,
+    is_deleted, created_at, updated_at, updated_by)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Тимчасова таблиця для аніме, спільна для всіх пакетів.
+# entity_idx - ключ кореляції: позиція сутності в пакеті, яку повертає OUTPUT
+CREATE_TEMP_ANIME = """
+    CREATE TABLE #TempAnime (
+        entity_idx INT PRIMARY KEY,
+        title NVARCHAR(255),
+        original_title NVARCHAR(255),
+        year INT,
+        synopsis NVARCHAR(MAX),
+        episodes INT,
+        duration INT,
+        is_deleted BIT,
+        created_at DATETIME,
+        updated_at DATETIME,
+        updated_by INT
+    )
+"""
+
+# OUTPUT без INTO заборонений для таблиць з увімкненими тригерами (TrackAnimeUpdates),
+# тому відповідність ключів збирається в окрему тимчасову таблицю
+CREATE_ANIME_ID_MAP = "CREATE TABLE #AnimeIdMap (entity_idx INT PRIMARY KEY, anime_id INT NOT NULL)"
+
+INSERT_TEMP_ANIME = """
+    INSERT INTO #TempAnime
+    (entity_idx, title, original_title, year, synopsis, episodes, duration,
+    is_deleted, created_at, updated_at, updated_by)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Вставка аніме з тимчасової таблиці в основну. INSERT ... OUTPUT не може посилатися
+# на колонки джерела і не гарантує порядок рядків, тому використовується MERGE,
+# чий OUTPUT записує пару (entity_idx, новий id)
+MERGE_TEMP_ANIME = """
+    MERGE INTO Anime AS target
+    USING #TempAnime AS source
+    ON 1 = 0
+    WHEN NOT MATCHED THEN
+        INSERT (title, original_title, year, synopsis, episodes, duration,
+                is_deleted, created_at, updated_at, updated_by)
+        VALUES (source.title, source.original_title, source.year, source.synopsis,
+                source.episodes, source.duration, source.is_deleted,
+                source.created_at, source.updated_at, source.updated_by)
+    OUTPUT source.entity_idx, INSERTED.id INTO #AnimeIdMap (entity_idx, anime_id);
+"""
+
+SELECT_ANIME_ID_MAP = "SELECT entity_idx, anime_id FROM #AnimeIdMap"
+
+INSERT_ANIME_GENRE = "INSERT INTO AnimeGenre (anime_id, genre_id) VALUES (?, ?)"
+
+INSERT_REVIEW = """
+    INSERT INTO Review
+    (anime_id, user_id, rating, content, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+# Тимчасова таблиця оновлень: один рядок на аніме з новими значеннями колонок та прапорцями заміни зв'язків
+CREATE_TEMP_ANIME_UPDATE = """
+    CREATE TABLE #TempAnimeUpdate (
+        anime_id INT PRIMARY KEY,
+        update_mask INT NOT NULL,
+        replace_genres BIT NOT NULL,
+        replace_reviews BIT NOT NULL,
+        title NVARCHAR(255),
+        original_title NVARCHAR(255),
+        year INT,
+        synopsis NVARCHAR(MAX),
+        episodes INT,
+        duration INT,
+        is_deleted BIT,
+        updated_at DATETIME,
+        updated_by INT
+    )
+"""
+
+INSERT_TEMP_ANIME_UPDATE = """
+    INSERT INTO #TempAnimeUpdate
+    (anime_id, update_mask, replace_genres, replace_reviews, {columns})
+    VALUES ({placeholders})
+""".format(columns=", ".join(UPDATABLE_ANIME_COLUMNS),
+           placeholders=", ".join("?" for _ in range(len(UPDATABLE_ANIME_COLUMNS) + 4)))
+
+# Один set-based UPDATE на весь пакет: колонка змінюється лише там, де її біт є в update_mask,
+# тож аніме з різними наборами полів оновлюються одним запитом
+UPDATE_ANIME_FROM_TEMP = """
+    UPDATE a SET
+        {assignments}
+    FROM Anime AS a
+    JOIN #TempAnimeUpdate AS u ON a.id = u.anime_id
+    WHERE u.update_mask <> 0
+""".format(assignments=",\n        ".join(
+    f"{column} = CASE WHEN u.update_mask & {1 << bit} <> 0 THEN u.{column} ELSE a.{column} END"
+    for bit, column in enumerate(UPDATABLE_ANIME_COLUMNS)
+))
+
+DELETE_REPLACED_GENRES = """
+    DELETE g FROM AnimeGenre AS g
+    JOIN #TempAnimeUpdate AS u ON g.anime_id = u.anime_id
+    WHERE u.replace_genres = 1
+"""
+
+DELETE_REPLACED_REVIEWS = """
+    DELETE r FROM Review AS r
+    JOIN #TempAnimeUpdate AS u ON r.anime_id = u.anime_id
+    WHERE u.replace_reviews = 1
+"""
+
+# Таблиці, які очищає reset (дочірні перед батьківською)
+RESET_TABLES = ('Review', 'AnimeGenre', 'Anime')
+
+# Записи, додані тестами, видаляються за діапазоном ID аніме: (таблиця, колонка ID аніме)
+RESET_SCOPED_DELETES = (('Review', 'anime_id'), ('AnimeGenre', 'anime_id'), ('Anime', 'id'))
+
+SELECT_MAX_ANIME_ID = "SELECT ISNULL(MAX(id), 0) FROM Anime"
+
+# INSTEAD OF DELETE тригер з lab_1/SoftDeleteProcedures.sql (RAISERROR + ROLLBACK на будь-який DELETE FROM Anime).
+# Вимикається лише в транзакції reset: ALTER TABLE транзакційний, тож при відкаті тригер лишається увімкненим
+DISABLE_ANIME_DELETE_TRIGGER = """
+    IF OBJECT_ID('PreventAnimeDelete', 'TR') IS NOT NULL
+        ALTER TABLE Anime DISABLE TRIGGER PreventAnimeDelete
+"""
+
+ENABLE_ANIME_DELETE_TRIGGER = """
+    IF OBJECT_ID('PreventAnimeDelete', 'TR') IS NOT NULL
+        ALTER TABLE Anime ENABLE TRIGGER PreventAnimeDelete
+"""
+
+# Зовнішні ключі, що посилаються на Anime: (назва, таблиця, колонка, колонка Anime)
+SELECT_ANIME_FOREIGN_KEYS = """
+    SELECT fk.name, OBJECT_NAME(fk.parent_object_id), pc.name, rc.name
+    FROM sys.foreign_keys AS fk
+    JOIN sys.foreign_key_columns AS fkc ON fkc.constraint_object_id = fk.object_id
+    JOIN sys.columns AS pc ON pc.object_id = fkc.parent_object_id AND pc.column_id = fkc.parent_column_id
+    JOIN sys.columns AS rc ON rc.object_id = fkc.referenced_object_id AND rc.column_id = fkc.referenced_column_id
+    WHERE fk.referenced_object_id = OBJECT_ID('Anime')
+"""
+
+# Декларативний набір некластерних індексів: назва -> (таблиця, ключові колонки, INCLUDE-колонки).
+# Первинний ключ AnimeGenre (anime_id, genre_id) вже є кластерним індексом з anime_id на початку,
+# тому для зв'язку з жанрами потрібен лише індекс з боку genre_id
+INDEXES = {
+    'IX_Anime_year': ('Anime', ('year',), ('title',)),
+    'IX_Anime_title': ('Anime', ('title',), ()),
+    'IX_AnimeGenre_genre_id': ('AnimeGenre', ('genre_id',), ()),
+    'IX_Review_anime_id': ('Review', ('anime_id',), ('rating',))
+}
+
+
+def _create_index_statement(name, table, columns, include):
+    statement = f"CREATE NONCLUSTERED INDEX {name} ON {table} ({', '.join(columns)})"
+    if include:
+        statement += f" INCLUDE ({', '.join(include)})"
+    return f"IF INDEXPROPERTY(OBJECT_ID('{table}'), '{name}', 'IndexID') IS NULL {statement}"
+
+
+class MSSQLDatabase(RelationalDatabase):
+    # SQL Server приймає не більше 2100 параметрів в одному запиті
+    MAX_PARAMETERS = 2100
+    IN_CLAUSE_CHUNK_SIZE = 2000
+
+    def __init__(self, connection_string, pool_size=5, pool_timeout=30.0, pool_max_idle_time=300.0, seed=None,
+                 indexes=True, dataset=None, pool_health_check_after=1.0):
+        """
+        Args:
+            connection_string (str): рядок підключення ODBC
+            pool_size (int): максимальна кількість з'єднань у пулі
+            pool_timeout (float): скільки секунд чекати на вільне з'єднання
+            pool_max_idle_time (float): через скільки секунд простою з'єднання закривається
+            seed (int): зерно генератора тестових даних
+            indexes (bool): чи створювати індекси з INDEXES
+            dataset (BenchmarkDataset): спільний набір даних на диску; якщо заданий, generate_entities
+                повертає його перші сутності замість нових випадкових
+            pool_health_check_after (float): з'єднання, що простоювали довше, перевіряються запитом SELECT 1
+        """
         self.connection_string = connection_string
         self.performance_metrics = PerformanceMetrics()
+        # Метрики пулу (очікування з'єднання, влучання) - окремо від часу операцій
+        self.pool_metrics = PerformanceMetrics()
+        self.entity_generator = EntityGenerator(seed)
+        self.dataset = dataset
+        self._init_reference_data(seed)
+        self.pool = ConnectionPool(
+            self._create_connection,
+            max_size=pool_size,
+            timeout=pool_timeout,
+            max_idle_time=pool_max_idle_time,
+            health_check=self._check_connection,
+            health_check_after=pool_health_check_after,
+            metrics=self.pool_metrics
+        )
+        if indexes:
+            self.create_indexes()
+        # Аніме з ID до цього значення (разом з їхніми жанрами та відгуками) були в базі до тестів,
+        # напр. із lab_1/FillDB.sql, і reset('delete') їх не видаляє
+        self.reset_after_id = self._max_anime_id()
+
+    def _max_anime_id(self):
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SELECT_MAX_ANIME_ID)
+            return cursor.fetchone()[0]
 
-    def _connect(self):
-        """Підключення до бази даних."""
+    def _create_connection(self):
+        """Відкриття нового фізичного з'єднання з базою даних."""
         return pyodbc.connect(self.connection_string)
 
+    @staticmethod
+    def _check_connection(conn):
+        """Перевірка, що з'єднання з пулу ще живе."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            return cursor.fetchone() is not None
+        finally:
+            cursor.close()
+
+    def _connect(self):
+        """Підключення до бази даних через пул з'єднань."""
+        return self.pool.connection()
+
+    def close(self):
+        """Закриття всіх з'єднань пулу."""
+        self.pool.close_all()
+
     def get_performance_stats(self) -> Dict[str, Dict[str, float]]:
         return self.performance_metrics.get_statistics()
 
+    def create_indexes(self):
+        """Створення індексів з INDEXES, яких ще немає."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            for name, (table, columns, include) in INDEXES.items():
+                cursor.execute(_create_index_statement(name, table, columns, include))
+
+    def drop_indexes(self):
+        """Видалення індексів з INDEXES."""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            for name, (table, _, _) in INDEXES.items():
+                cursor.execute(f"DROP INDEX IF EXISTS {name} ON {table}")
+
     # READ операції
-    @measure_execution_time
-    def fetch_anime_simple(self, filters=None, limit=10):
-        """Простий варіант читання записів з таблиці Anime."""
+    @staticmethod
+    def _build_fetch_simple_query(filters=None, limit=10, ordered=False):
+        """Побудова запиту для простого читання записів з таблиці Anime."""
         query = "SELECT TOP {} * FROM Anime".format(limit)
         params = []
         if filters:
@@ -34,15 +277,13 @@ class MSSQLDatabase:
                     params.append(value)
             if filter_clauses:
                 query += " WHERE " + " AND ".join(filter_clauses)
+        if ordered:
+            query += " ORDER BY id"
+        return query, params
 
-        with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            return cursor.fetchall()
-
-    @measure_execution_time
-    def fetch_anime_with_relations(self, filters=None, limit=10):
-        """Складний варіант читання записів з таблиці Anime з пов'язаними даними."""
+    @staticmethod
+    def _build_fetch_with_relations_query(filters=None, limit=10):
+        """Побудова запиту для читання записів з таблиці Anime з пов'язаними даними."""
         query = """
             SELECT TOP {} 
                 a.*,
@@ -66,74 +307,229 @@ class MSSQLDatabase:
 
         query += " GROUP BY a.id, a.title, a.original_title, a.year, a.synopsis, a.episodes, " \
                  "a.duration, a.is_deleted, a.created_at, a.updated_at, a.updated_by"
+        return query, params
+
+    @measure_execution_time
+    def fetch_anime_simple(self, filters=None, limit=10):
+        """Простий варіант читання записів з таблиці Anime."""
+        query, params = self._build_fetch_simple_query(filters, limit)
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+    @measure_execution_time
+    def fetch_anime_with_relations(self, filters=None, limit=10):
+        """
+        Складний варіант читання записів з таблиці Anime з пов'язаними даними одним запитом з STRING_AGG.
+        Залишений для порівняння з fetch_anime_documents: два LEFT JOIN дають декартовий добуток жанри x відгуки.
+        Жанри та відгуки повертаються рядками, закодованими через ';' і ':'.
+        """
+        query, params = self._build_fetch_with_relations_query(filters, limit)
 
         with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute(query, params)
             return cursor.fetchall()
 
+    @measure_execution_time
+    def fetch_anime_records(self, filters=None, limit=10):
+        """
+        Читання записів з таблиці Anime з пов'язаними даними, як fetch_anime_documents,
+        але у вигляді AnimeRecord зі списками GenreRecord/ReviewRecord.
+        """
+        query, params = self._build_fetch_simple_query(filters, limit, ordered=True)
+
+        with self._connect() as conn:
+            return load_anime_records(conn.cursor(), query, params, self.IN_CLAUSE_CHUNK_SIZE)
+
+    @measure_execution_time
+    def fetch_anime_documents(self, filters=None, limit=10):
+        """
+        Читання записів з таблиці Anime з пов'язаними даними без декартового добутку:
+        спочатку сторінка аніме, потім жанри та відгуки двома запитами по списку id.
+
+        Returns:
+            list: словники з полями Anime та списками 'genres' і 'reviews', як документи MongoDB
+        """
+        query, params = self._build_fetch_simple_query(filters, limit, ordered=True)
+
+        with self._connect() as conn:
+            return load_anime_documents(conn.cursor(), query, params, self.IN_CLAUSE_CHUNK_SIZE)
+
+    @measure_stream(variant_flags=('with_relations',))
+    def iter_anime(self, filters=None, limit=10, with_relations=False, batch_size=1000):
+        """
+        Потокове читання записів з таблиці Anime порціями по batch_size рядків через fetchmany.
+
+        Args:
+            filters (dict): фільтри за колонками Anime
+            limit (int): максимальна кількість записів
+            with_relations (bool): чи читати жанри та відгуки (як fetch_anime_with_relations)
+            batch_size (int): кількість рядків, що отримуються за один fetchmany
+
+        Yields:
+            pyodbc.Row: по одному рядку результату
+        """
+        if with_relations:
+            query, params = self._build_fetch_with_relations_query(filters, limit)
+        else:
+            query, params = self._build_fetch_simple_query(filters, limit)
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.arraysize = batch_size
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+
+    @staticmethod
+    def _build_paginate_query(page_size, after_id=None, filters=None):
+        filter_clauses = []
+        params = [page_size]
+        if after_id is not None:
+            filter_clauses.append("id > ?")
+            params.append(after_id)
+        if filters:
+            for column, value in filters.items():
+                if value is not None:
+                    filter_clauses.append(f"{column} = ?")
+                    params.append(value)
+
+        query = "SELECT TOP (?) * FROM Anime"
+        if filter_clauses:
+            query += " WHERE " + " AND ".join(filter_clauses)
+        query += " ORDER BY id"
+        return query, params
+
+    @measure_execution_time
+    def paginate_anime(self, page_size=100, after_id=None, filters=None):
+        """
+        Keyset-пагінація по таблиці Anime: сторінка читається пошуком по кластерному індексу
+        (id > after_id), тому її вартість не залежить від глибини.
+
+        Args:
+            page_size (int): кількість записів на сторінці
+            after_id (int): id останнього запису попередньої сторінки (None - перша сторінка)
+            filters (dict): додаткові фільтри за колонками Anime
+
+        Returns:
+            tuple: (список рядків сторінки, after_id для наступної сторінки або None, якщо сторінок більше немає)
+        """
+        query, params = self._build_paginate_query(page_size, after_id, filters)
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+        next_after_id = rows[-1][0] if len(rows) == page_size else None
+        return rows, next_after_id
+
     # CREATE операції
+    @staticmethod
+    def _anime_params(anime_data):
+        """Параметри INSERT_ANIME для одного аніме."""
+        now = datetime.datetime.now()
+        return (anime_data['title'], anime_data['original_title'], anime_data['year'],
+                anime_data['synopsis'], anime_data['episodes'], anime_data['duration'],
+                anime_data.get('is_deleted', False), now, now, anime_data['updated_by'])
+
+    @classmethod
+    def _insert_anime(cls, cursor, anime_data):
+        """Вставка одного аніме через переданий курсор. Повертає ID нового запису."""
+        cursor.execute(INSERT_ANIME, cls._anime_params(anime_data))
+        return cursor.fetchone()[0]
+
+    @classmethod
+    def _multi_row_statements(cls, insert_prefix, rows):
+        """
+        Ділить рядки на багаторядкові INSERT ... VALUES (...), (...) так, щоб не перевищити
+        1000 рядків VALUES і 2100 параметрів на запит.
+
+        Yields:
+            tuple: (запит, плоский список параметрів)
+        """
+        if not rows:
+            return
+        params_per_row = len(rows[0])
+        rows_per_statement = min(1000, (cls.MAX_PARAMETERS - 1) // params_per_row)
+        row_placeholder = "(" + ", ".join("?" for _ in range(params_per_row)) + ")"
+
+        for i in range(0, len(rows), rows_per_statement):
+            chunk = rows[i:i + rows_per_statement]
+            yield (insert_prefix + " VALUES " + ", ".join(row_placeholder for _ in chunk),
+                   [value for row in chunk for value in row])
+
+    @classmethod
+    def _insert_multi_row(cls, cursor, insert_prefix, rows):
+        """Вставка рядків багаторядковими INSERT ... VALUES (...), (...)."""
+        for query, params in cls._multi_row_statements(insert_prefix, rows):
+            cursor.execute(query, params)
+
+    @staticmethod
+    def _relation_rows(anime_id, genres, reviews):
+        """Рядки AnimeGenre та Review для одного аніме (для багаторядкової вставки)."""
+        now = datetime.datetime.now()
+        return ([(anime_id, genre_id) for genre_id in genres],
+                [(anime_id, review['user_id'], review['rating'], review['content'], now, now)
+                 for review in reviews])
+
     @measure_execution_time
     def insert_anime_simple(self, anime_data):
         """Простий варіант додавання запису в таблицю Anime."""
         with self._connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """INSERT INTO Anime (title, original_title, year, synopsis, episodes, 
-                                    duration, is_deleted, created_at, updated_at, updated_by)
-                   OUTPUT INSERTED.id
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (anime_data['title'], anime_data['original_title'], anime_data['year'],
-                 anime_data['synopsis'], anime_data['episodes'], anime_data['duration'],
-                 anime_data.get('is_deleted', False),
-                 datetime.datetime.now(), datetime.datetime.now(),
-                 anime_data['updated_by'])
-            )
-            anime_id = cursor.fetchone()[0]
+            anime_id = self._insert_anime(conn.cursor(), anime_data)
             conn.commit()
             return anime_id
 
     @measure_execution_time
     def insert_anime_with_relations(self, anime_data, genres, reviews):
-        """Складний варіант додавання запису в таблицю Anime з пов'язаними даними."""
+        """
+        Складний варіант додавання запису в таблицю Anime з пов'язаними даними.
+        Аніме, жанри та відгуки вставляються в одному з'єднанні та одній транзакції,
+        а зв'язки - багаторядковими INSERT замість окремого запиту на кожен рядок.
+        """
         with self._connect() as conn:
             cursor = conn.cursor()
 
             # Додаємо аніме
-            anime_id = self.insert_anime_simple(anime_data)
+            anime_id = self._insert_anime(cursor, anime_data)
+            genre_rows, review_rows = self._relation_rows(anime_id, genres, reviews)
 
             # Додаємо жанри
-            for genre_id in genres:
-                cursor.execute(
-                    "INSERT INTO AnimeGenre (anime_id, genre_id) VALUES (?, ?)",
-                    (anime_id, genre_id)
-                )
+            self._insert_multi_row(cursor, "INSERT INTO AnimeGenre (anime_id, genre_id)", genre_rows)
 
             # Додаємо відгуки
-            for review in reviews:
-                cursor.execute(
-                    """INSERT INTO Review 
-                       (anime_id, user_id, rating, content, created_at, updated_at)
-                       VALUES (?, ?, ?, ?, ?, ?)""",
-                    (anime_id, review['user_id'], review['rating'],
-                     review['content'], datetime.datetime.now(), datetime.datetime.now())
-                )
+            self._insert_multi_row(
+                cursor,
+                "INSERT INTO Review (anime_id, user_id, rating, content, created_at, updated_at)",
+                review_rows
+            )
 
             conn.commit()
             return anime_id
 
     # UPDATE операції
+    @staticmethod
+    def _update_anime(cursor, anime_id, updates):
+        """Оновлення одного запису Anime через переданий курсор."""
+        set_clause = ", ".join([f"{col} = ?" for col in updates.keys()])
+        params = list(updates.values()) + [anime_id]
+        cursor.execute(
+            f"UPDATE Anime SET {set_clause} WHERE id = ?",
+            params
+        )
+
     @measure_execution_time
     def update_anime_simple(self, anime_id, updates):
         """Простий варіант оновлення запису в таблиці Anime."""
         with self._connect() as conn:
-            cursor = conn.cursor()
-            set_clause = ", ".join([f"{col} = ?" for col in updates.keys()])
-            params = list(updates.values()) + [anime_id]
-            cursor.execute(
-                f"UPDATE Anime SET {set_clause} WHERE id = ?",
-                params
-            )
+            self._update_anime(conn.cursor(), anime_id, updates)
             conn.commit()
 
     @measure_execution_time
@@ -142,9 +538,9 @@ class MSSQLDatabase:
         with self._connect() as conn:
             cursor = conn.cursor()
 
-            # Оновлюємо основні дані аніме
+            # Оновлюємо основні дані аніме тим самим з'єднанням, щоб усе було однією транзакцією
             if anime_updates:
-                self.update_anime_simple(anime_id, anime_updates)
+                self._update_anime(cursor, anime_id, anime_updates)
 
             # Оновлюємо жанри
             if genres is not None:
@@ -207,6 +603,62 @@ class MSSQLDatabase:
 
             conn.commit()
 
+    # Скидання стану між повтореннями тестів
+    RESET_STRATEGIES = ('delete', 'truncate')
+
+    def reset(self, strategy='delete'):
+        """
+        Очищення Anime, AnimeGenre та Review між повтореннями тестів (не вимірюється performance_metrics).
+
+        Args:
+            strategy (str): 'delete' - DELETE лише записів, доданих тестами (ID аніме більший за reset_after_id),
+                тож початкові дані бази та посилання на них з Character, Episode тощо лишаються;
+                тригер PreventAnimeDelete (якщо є) на цей час вимикається в тій самій транзакції,
+                інакше він відкочує кожне очищення (див. _scoped_reset_statements);
+                'truncate' - TRUNCATE TABLE без журналювання окремих рядків і без тригера PreventAnimeDelete,
+                лише для бази без початкових аніме (інакше ValueError); TRUNCATE заборонений для таблиці,
+                на яку посилаються зовнішні ключі, тому ключі на Anime видаляються і створюються знову
+                WITH CHECK в тій самій транзакції
+        """
+        if strategy not in self.RESET_STRATEGIES:
+            raise ValueError(f"Невідома стратегія очищення: {strategy}")
+        if strategy == 'truncate' and self.reset_after_id:
+            raise ValueError(
+                f"У базі є початкові аніме (ID до {self.reset_after_id}), 'truncate' видалив би їх; "
+                f"використовуйте 'delete'")
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            if strategy == 'delete':
+                for query, params in self._scoped_reset_statements(self.reset_after_id):
+                    cursor.execute(query, params)
+                return
+
+            cursor.execute(SELECT_ANIME_FOREIGN_KEYS)
+            foreign_keys = cursor.fetchall()
+            for name, table, _, _ in foreign_keys:
+                cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+            for table in RESET_TABLES:
+                cursor.execute(f"TRUNCATE TABLE {table}")
+            for name, table, column, referenced_column in foreign_keys:
+                cursor.execute(
+                    f"ALTER TABLE {table} WITH CHECK ADD CONSTRAINT {name} "
+                    f"FOREIGN KEY ({column}) REFERENCES Anime ({referenced_column})"
+                )
+
+    @staticmethod
+    def _scoped_reset_statements(reset_after_id):
+        """
+        Запити reset('delete') для однієї транзакції: видалення аніме з ID, більшим за reset_after_id,
+        разом з жанрами й відгуками між вимкненням і увімкненням тригера PreventAnimeDelete.
+        """
+        return (
+            [(DISABLE_ANIME_DELETE_TRIGGER, ())]
+            + [(f"DELETE FROM {table} WHERE {column} > ?", (reset_after_id,))
+               for table, column in RESET_SCOPED_DELETES]
+            + [(ENABLE_ANIME_DELETE_TRIGGER, ())]
+        )
+
     # Допоміжні методи залишаються без змін
     def fetch_existing_genres(self):
         with self._connect() as conn:
@@ -220,325 +672,133 @@ class MSSQLDatabase:
             cursor.execute("SELECT [id] FROM [Users]")
             return [row[0] for row in cursor.fetchall()]
 
-    def generate_entities(self, num_entities):
-        """
-        Генерує колекцію сутностей аніме з пов'язаними даними.
-
-        Args:
-            num_entities (int): кількість сутностей для генерації
-
-        Returns:
-            list: список словників, що містять дані аніме та пов'язані сутності
-        """
-        existing_genres = self.fetch_existing_genres()
-        existing_users = self.fetch_existing_users()
-
-        entities = []
-        for _ in range(num_entities):
-            # Основні дані аніме
-            anime = {
-                'title': ''.join(random.choices(string.ascii_letters, k=random.randint(5, 20))),
-                'original_title': ''.join(random.choices(string.ascii_letters, k=random.randint(5, 20))),
-                'year': random.randint(1900, 2024),
-                'synopsis': '\n'.join([
-                    ' '.join(random.choices(string.ascii_letters, k=random.randint(10, 50)))
-                    for _ in range(random.randint(1, 5))
-                ]),
-                'episodes': random.randint(1, 100),
-                'duration': random.randint(10, 120),
-                'is_deleted': random.choice([True, False]),
-                'created_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 365)),
-                'updated_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 30)),
-                'updated_by': random.choice(existing_users)
-            }
-
-            # Генерація пов'язаних жанрів
-            genres = random.sample([g[0] for g in existing_genres], k=random.randint(1, min(5, len(existing_genres))))
-
-            # Генерація відгуків
-            reviews = []
-            for _ in range(random.randint(1, 10)):
-                review = {
-                    'user_id': random.choice(existing_users),
-                    'rating': random.randint(1, 10),
-                    'content': ' '.join(random.choices(string.ascii_letters, k=random.randint(20, 100))),
-                    'created_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 365)),
-                    'updated_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 30))
-                }
-                reviews.append(review)
-
-            entities.append({
-                'anime': anime,
-                'genres': genres,
-                'reviews': reviews
-            })
-
-        return entities
+    def _insert_genres(self, genres):
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            genre_ids = []
+            for genre in genres:
+                cursor.execute(
+                    "INSERT INTO Genre (name, description) OUTPUT INSERTED.id VALUES (?, ?)",
+                    (genre['name'], genre['description'])
+                )
+                genre_ids.append(cursor.fetchone()[0])
+            return genre_ids
 
     @measure_execution_time
-    @measure_execution_time
-    def insert_entities_batch(self, entities, batch_size=100):
+    def insert_entities_batch(self, entities, batch_size=1000, fast_executemany=True):
         """
-        Оптимізована пакетна вставка аніме-сутностей з поліпшеною продуктивністю.
+        Пакетна вставка аніме-сутностей з пов'язаними даними.
+        Усе завантаження виконується в одному з'єднанні та одній транзакції,
+        а executemany використовує прив'язку масивів параметрів (fast_executemany),
+        тобто один пакет - один обмін з сервером замість одного на рядок.
 
         Args:
             entities (list): список сутностей для вставки
-            batch_size (int): розмір пакету для розбиття великих наборів даних
-        """
-        for i in range(0, len(entities), batch_size):
-            batch = entities[i:i + batch_size]
-
-            with self._connect() as conn:
-                cursor = conn.cursor()
-
-                # Створення тимчасової таблиці для аніме
-                cursor.execute("""
-                    CREATE TABLE #TempAnime (
-                        id INT IDENTITY(1,1) PRIMARY KEY,
-                        title NVARCHAR(255),
-                        original_title NVARCHAR(255),
-                        year INT,
-                        synopsis NTEXT,
-                        episodes INT,
-                        duration INT,
-                        is_deleted BIT,
-                        created_at DATETIME,
-                        updated_at DATETIME,
-                        updated_by NVARCHAR(100)
-                    )
-                """)
-
-                # Підготовка даних для вставки
-                anime_data = [
-                    (
-                        entity['anime']['title'],
-                        entity['anime']['original_title'],
-                        entity['anime']['year'],
-                        entity['anime']['synopsis'],
-                        entity['anime']['episodes'],
-                        entity['anime']['duration'],
-                        entity['anime'].get('is_deleted', False),
-                        entity['anime']['created_at'],
-                        entity['anime']['updated_at'],
-                        entity['anime']['updated_by']
-                    ) for entity in batch
-                ]
-
-                # Вставка аніме у тимчасову таблицю
-                anime_insert_query = """
-                INSERT INTO #TempAnime 
-                (title, original_title, year, synopsis, episodes, duration, 
-                is_deleted, created_at, updated_at, updated_by)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
-                cursor.executemany(anime_insert_query, anime_data)
-
-                # Вставка аніме з тимчасової таблиці в основну з отриманням ID
-                cursor.execute("""
-                INSERT INTO Anime 
-                (title, original_title, year, synopsis, episodes, duration, 
-                is_deleted, created_at, updated_at, updated_by)
-                OUTPUT INSERTED.id, INSERTED.title
-                SELECT title, original_title, year, synopsis, episodes, duration, 
-                is_deleted, created_at, updated_at, updated_by
-                FROM #TempAnime
-                """)
-                inserted_anime = cursor.fetchall()
+            batch_size (int): кількість аніме в одному пакеті; оскільки ID зіставляються за ключем
+                кореляції, а не за порядком рядків, пакет може містити десятки тисяч аніме
+            fast_executemany (bool): чи використовувати масивну прив'язку параметрів pyodbc
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.fast_executemany = fast_executemany
 
-                # Пакетна вставка жанрів
-                genre_data = []
-                for idx, entity in enumerate(batch):
-                    anime_id = inserted_anime[idx][0]
-                    genre_data.extend([(anime_id, genre_id) for genre_id in entity['genres']])
+            cursor.execute(CREATE_TEMP_ANIME)
+            cursor.execute(CREATE_ANIME_ID_MAP)
 
+            for i in range(0, len(entities), batch_size):
+                batch = entities[i:i + batch_size]
+
+                # Вставка аніме у тимчасову таблицю разом з ключем кореляції
+                anime_data = [(idx,) + row for idx, row in enumerate(self._anime_rows(batch))]
+                with self.performance_metrics.track_throughput('insert_entities_batch.stage_anime', len(batch)):
+                    cursor.executemany(INSERT_TEMP_ANIME, anime_data)
+
+                with self.performance_metrics.track_throughput('insert_entities_batch.insert_anime', len(batch)):
+                    cursor.execute(MERGE_TEMP_ANIME)
+                    cursor.execute(SELECT_ANIME_ID_MAP)
+                    anime_ids = dict(cursor.fetchall())
+
+                genre_data, review_data = self._batch_relation_rows(batch, anime_ids)
+
+                # Пакетна вставка жанрів
                 if genre_data:
-                    genre_insert_query = """
-                    INSERT INTO AnimeGenre (anime_id, genre_id)
-                    VALUES (?, ?)
-                    """
-                    cursor.executemany(genre_insert_query, genre_data)
+                    with self.performance_metrics.track_throughput('insert_entities_batch.insert_genres', len(genre_data)):
+                        cursor.executemany(INSERT_ANIME_GENRE, genre_data)
 
                 # Пакетна вставка оглядів
-                review_data = []
-                for idx, entity in enumerate(batch):
-                    anime_id = inserted_anime[idx][0]
-                    review_data.extend([
-                        (
-                            anime_id,
-                            review['user_id'],
-                            review['rating'],
-                            review['content'],
-                            review['created_at'],
-                            review['updated_at']
-                        ) for review in entity['reviews']
-                    ])
-
                 if review_data:
-                    review_insert_query = """
-                    INSERT INTO Review 
-                    (anime_id, user_id, rating, content, created_at, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    """
-                    cursor.executemany(review_insert_query, review_data)
+                    with self.performance_metrics.track_throughput('insert_entities_batch.insert_reviews', len(review_data)):
+                        cursor.executemany(INSERT_REVIEW, review_data)
 
-                # Видалення тимчасової таблиці
-                cursor.execute("DROP TABLE #TempAnime")
+                cursor.execute("TRUNCATE TABLE #TempAnime")
+                cursor.execute("TRUNCATE TABLE #AnimeIdMap")
 
-                conn.commit()
+            # Видалення тимчасових таблиць
+            cursor.execute("DROP TABLE #TempAnime")
+            cursor.execute("DROP TABLE #AnimeIdMap")
 
     @measure_execution_time
-    def insert_entities_batch_simple(self, entities, batch_size=100):
+    def insert_entities_batch_simple(self, entities, batch_size=1000, fast_executemany=True):
         """
-        Оптимізована пакетна вставка аніме-сутностей без пов'язаних даних.
+        Пакетна вставка аніме-сутностей без пов'язаних даних в одному з'єднанні та одній транзакції.
 
         Args:
             entities (list): список сутностей для вставки
-            batch_size (int): розмір пакету для розбиття великих наборів даних
-        """
-        for i in range(0, len(entities), batch_size):
-            batch = entities[i:i + batch_size]
-
-            with self._connect() as conn:
-                cursor = conn.cursor()
-
-                # Створення тимчасової таблиці для аніме
-                cursor.execute("""
-                    CREATE TABLE #TempAnime (
-                        title NVARCHAR(255),
-                        original_title NVARCHAR(255),
-                        year INT,
-                        synopsis NTEXT,
-                        episodes INT,
-                        duration INT,
-                        is_deleted BIT,
-                        created_at DATETIME,
-                        updated_at DATETIME,
-                        updated_by NVARCHAR(100)
-                    )
-                """)
-
-                # Підготовка даних для вставки
-                anime_data = [
-                    (
-                        entity['anime']['title'],
-                        entity['anime']['original_title'],
-                        entity['anime']['year'],
-                        entity['anime']['synopsis'],
-                        entity['anime']['episodes'],
-                        entity['anime']['duration'],
-                        entity['anime'].get('is_deleted', False),
-                        entity['anime']['created_at'],
-                        entity['anime']['updated_at'],
-                        entity['anime']['updated_by']
-                    ) for entity in batch
-                ]
-
-                # Вставка аніме у тимчасову таблицю
-                anime_insert_query = """
-                INSERT INTO #TempAnime 
-                (title, original_title, year, synopsis, episodes, duration, 
-                is_deleted, created_at, updated_at, updated_by)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
-                cursor.executemany(anime_insert_query, anime_data)
-
-                # Вставка аніме з тимчасової таблиці в основну
-                cursor.execute("""
-                INSERT INTO Anime 
-                (title, original_title, year, synopsis, episodes, duration, 
-                is_deleted, created_at, updated_at, updated_by)
-                SELECT title, original_title, year, synopsis, episodes, duration, 
-                is_deleted, created_at, updated_at, updated_by
-                FROM #TempAnime
-                """)
-
-                # Видалення тимчасової таблиці
-                cursor.execute("DROP TABLE #TempAnime")
+            batch_size (int): кількість аніме в одному пакеті
+            fast_executemany (bool): чи використовувати масивну прив'язку параметрів pyodbc
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.fast_executemany = fast_executemany
 
-                conn.commit()
+            for i in range(0, len(entities), batch_size):
+                batch = entities[i:i + batch_size]
+                anime_data = self._anime_rows(batch)
+                with self.performance_metrics.track_throughput('insert_entities_batch_simple.insert_anime', len(batch)):
+                    cursor.executemany(INSERT_ANIME_BATCH, anime_data)
 
-    def generate_updates(self, entities, update_type='all', update_percentage=0.5):
+    @measure_execution_time
+    def update_entities_batch(self, updates, batch_size=1000, fast_executemany=True):
         """
-        Генерує оновлення для існуючих сутностей.
+        Пакетне оновлення аніме-сутностей з пов'язаними даними в одному з'єднанні та одній транзакції.
+        Пакет оновлень завантажується в #TempAnimeUpdate, після чого Anime оновлюється одним UPDATE ... FROM,
+        а жанри й відгуки замінюються видаленням за JOIN і пакетною вставкою.
 
         Args:
-            entities: результат виконання fetch_anime_simple або fetch_anime_with_relations
-            update_type (str): тип оновлення ('all', 'anime', 'genres', 'reviews')
-            update_percentage (float): відсоток сутностей, які потрібно оновити (0.0 - 1.0)
+            updates (dict): результат generate_updates - {anime_id: {'anime': {...}, 'genres': [...], 'reviews': [...]}}
+            batch_size (int): кількість аніме в одному пакеті
+            fast_executemany (bool): чи використовувати масивну прив'язку параметрів pyodbc
+        """
+        items = list(updates.items())
+        now = datetime.datetime.now()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.fast_executemany = fast_executemany
+            cursor.execute(CREATE_TEMP_ANIME_UPDATE)
 
-        Returns:
-            dict: словник з оновленнями у форматі, готовому для використання в update_entities_batch методах
-        """
-        if not entities:
-            return {}
-
-        existing_genres = self.fetch_existing_genres()
-        existing_users = self.fetch_existing_users()
-
-        # Визначаємо кількість сутностей для оновлення
-        num_to_update = max(1, int(len(entities) * update_percentage))
-        entities_to_update = random.sample(list(entities), num_to_update)
-
-        updates = {}
-
-        for entity in entities_to_update:
-            anime_id = entity[0]  # Припускаємо, що ID - перше поле
-            update_data = {}
-
-            # Генеруємо оновлення основних даних аніме
-            if update_type in ['all', 'anime']:
-                anime_updates = {}
-                # Випадково вибираємо, які поля оновлювати
-                if random.random() < 0.7:
-                    anime_updates['title'] = ''.join(random.choices(string.ascii_letters, k=random.randint(5, 20)))
-                if random.random() < 0.5:
-                    anime_updates['original_title'] = ''.join(
-                        random.choices(string.ascii_letters, k=random.randint(5, 20)))
-                if random.random() < 0.3:
-                    anime_updates['year'] = random.randint(1900, 2024)
-                if random.random() < 0.4:
-                    anime_updates['synopsis'] = '\n'.join([
-                        ' '.join(random.choices(string.ascii_letters, k=random.randint(10, 50)))
-                        for _ in range(random.randint(1, 5))
-                    ])
-                if random.random() < 0.3:
-                    anime_updates['episodes'] = random.randint(1, 100)
-                if random.random() < 0.3:
-                    anime_updates['duration'] = random.randint(10, 120)
-                if random.random() < 0.2:
-                    anime_updates['is_deleted'] = random.choice([True, False])
-
-                anime_updates['updated_at'] = datetime.datetime.now()
-                anime_updates['updated_by'] = random.choice(existing_users)
-
-                if anime_updates:
-                    update_data['anime'] = anime_updates
-
-            # Генеруємо оновлення жанрів
-            if update_type in ['all', 'genres']:
-                update_data['genres'] = random.sample(
-                    [g[0] for g in existing_genres],
-                    k=random.randint(1, min(5, len(existing_genres)))
-                )
+            for i in range(0, len(items), batch_size):
+                batch = items[i:i + batch_size]
+                anime_rows, genre_rows, review_rows = self._update_rows(dict(batch), now)
+
+                with self.performance_metrics.track_throughput('update_entities_batch.stage_anime', len(batch)):
+                    cursor.executemany(INSERT_TEMP_ANIME_UPDATE, anime_rows)
+
+                with self.performance_metrics.track_throughput('update_entities_batch.update_anime', len(batch)):
+                    cursor.execute(UPDATE_ANIME_FROM_TEMP)
+
+                cursor.execute(DELETE_REPLACED_GENRES)
+                if genre_rows:
+                    with self.performance_metrics.track_throughput('update_entities_batch.insert_genres', len(genre_rows)):
+                        cursor.executemany(INSERT_ANIME_GENRE, genre_rows)
+
+                cursor.execute(DELETE_REPLACED_REVIEWS)
+                if review_rows:
+                    with self.performance_metrics.track_throughput('update_entities_batch.insert_reviews', len(review_rows)):
+                        cursor.executemany(INSERT_REVIEW, review_rows)
+
+                cursor.execute("TRUNCATE TABLE #TempAnimeUpdate")
 
-            # Генеруємо оновлення відгуків
-            if update_type in ['all', 'reviews']:
-                reviews = []
-                for _ in range(random.randint(0, 10)):  # Може бути 0 відгуків
-                    review = {
-                        'user_id': random.choice(existing_users),
-                        'rating': random.randint(1, 10),
-                        'content': ' '.join(random.choices(string.ascii_letters, k=random.randint(20, 100))),
-                        'created_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 365)),
-                        'updated_at': datetime.datetime.now()
-                    }
-                    reviews.append(review)
-                update_data['reviews'] = reviews
-
-            if update_data:
-                updates[anime_id] = update_data
-
-        return updates
+            cursor.execute("DROP TABLE #TempAnimeUpdate")
 
     @measure_execution_time
     def get_top_rated_anime(self, n=10):
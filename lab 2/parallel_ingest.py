@@ -0,0 +1,185 @@
+import inspect
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Sequence
+
+from result_sink import JsonLinesSink
+
+
+# Екземпляр бази поточного воркера (потоку або процесу пулу)
+_worker = threading.local()
+
+# Скільки чекати, доки всі воркери пулу візьмуть службову задачу (прогрів, закриття)
+WORKER_SYNC_TIMEOUT = 120.0
+
+
+def insert_options(insert_method: Callable, chunk_size: int) -> Dict[str, Any]:
+    """Аргументи методу вставки: розмір пакету і, де підтримується (MongoDB), невпорядкована вставка."""
+    options = {'batch_size': chunk_size}
+    if 'ordered' in inspect.signature(insert_method).parameters:
+        options['ordered'] = False
+    return options
+
+
+def _init_worker(db_factory: Callable, with_relations: bool, chunk_size: int):
+    """Ініціалізатор пулу: кожен воркер відкриває власне підключення."""
+    db = db_factory()
+    _worker.db = db
+    _worker.insert = db.insert_entities_batch if with_relations else db.insert_entities_batch_simple
+    _worker.options = insert_options(_worker.insert, chunk_size)
+
+
+def _warm_up_worker(barrier):
+    """
+    Задача прогріву: завершується, лише коли її взяли всі воркери пулу.
+    Тож після прогріву кожен воркер запущений і виконав _init_worker.
+    """
+    barrier.wait(WORKER_SYNC_TIMEOUT)
+
+
+def _close_worker(barrier):
+    """Закриває підключення воркера; бар'єр гарантує, що кожен воркер виконає рівно одну таку задачу."""
+    _worker.db.close()
+    barrier.wait(WORKER_SYNC_TIMEOUT)
+
+
+def _insert_chunk(chunk: List[dict]) -> float:
+    """Вставляє одну порцію в транзакції воркера. Повертає час вставки."""
+    start_time = time.perf_counter()
+    _worker.insert(chunk, **_worker.options)
+    return time.perf_counter() - start_time
+
+
+class ParallelIngestor:
+    def __init__(self, db_factory: Callable, workers: int = 4, chunk_size: int = 1000, mode: str = 'thread',
+                 with_relations: bool = True):
+        """
+        Паралельне завантаження сутностей: список ділиться на порції по chunk_size,
+        які воркери забирають з черги пулу, кожен через власне підключення і власну транзакцію на порцію.
+
+        Args:
+            db_factory: функція без аргументів, що створює екземпляр бази
+                (для mode='process' має серіалізуватися pickle, напр. functools.partial(MongoDatabase, url, name))
+            workers (int): кількість воркерів
+            chunk_size (int): кількість сутностей в одній порції (один виклик insert_entities_batch)
+            mode (str): 'thread' або 'process'
+            with_relations (bool): insert_entities_batch (True) чи insert_entities_batch_simple (False)
+        """
+        if mode not in ('thread', 'process'):
+            raise ValueError("mode має бути 'thread' або 'process'")
+        if workers < 1 or chunk_size < 1:
+            raise ValueError("workers і chunk_size мають бути додатніми")
+        self.db_factory = db_factory
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.mode = mode
+        self.with_relations = with_relations
+
+    def ingest(self, entities: List[dict]) -> Dict[str, Any]:
+        """
+        Завантажує entities усіма воркерами.
+
+        Args:
+            entities (list): результат generate_entities
+
+        Returns:
+            dict: кількість сутностей і порцій, загальний час, сутностей/с і середній час порції.
+                Загальний час охоплює лише вставку порцій: запуск пулу й підключення воркерів (прогрів)
+                та їх закриття в нього не входять
+        """
+        chunks = [entities[i:i + self.chunk_size] for i in range(0, len(entities), self.chunk_size)]
+        if self.mode == 'thread':
+            executor_class = ThreadPoolExecutor
+            manager = None
+            barrier = threading.Barrier(self.workers)
+        else:
+            executor_class = ProcessPoolExecutor
+            manager = multiprocessing.Manager()
+            barrier = manager.Barrier(self.workers)
+
+        try:
+            with executor_class(max_workers=self.workers, initializer=_init_worker,
+                                initargs=(self.db_factory, self.with_relations, self.chunk_size)) as executor:
+                list(executor.map(_warm_up_worker, [barrier] * self.workers))
+                start_time = time.perf_counter()
+                try:
+                    chunk_times = list(executor.map(_insert_chunk, chunks))
+                    elapsed = time.perf_counter() - start_time
+                finally:
+                    barrier.reset()
+                    list(executor.map(_close_worker, [barrier] * self.workers))
+        finally:
+            if manager is not None:
+                manager.shutdown()
+
+        return {
+            'entities': len(entities),
+            'chunks': len(chunks),
+            'elapsed': elapsed,
+            'entities_per_sec': len(entities) / elapsed if elapsed > 0 else 0.0,
+            'avg_chunk_time': sum(chunk_times) / len(chunk_times) if chunk_times else 0.0
+        }
+
+    def benchmark_scaling(self, sizes: Sequence[int] = (10000, 50000, 100000),
+                          worker_counts: Sequence[int] = (1, 2, 4, 8),
+                          output_file=f"db_ingest_scaling_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+                          ) -> List[Dict[str, Any]]:
+        """
+        Вимірює масштабування завантаження від 1 до N воркерів.
+        Для кожного розміру сутності генеруються один раз, а перед кожним запуском таблиці очищаються (db.reset).
+        Прискорення - T(1) / T(N), ефективність - T(1) / (N * T(N)), де T(1) - виміряний час одного воркера,
+        тому worker_counts має містити 1.
+
+        Returns:
+            list: записи результатів (вони ж дописуються в output_file у форматі JSON Lines)
+        """
+        if 1 not in worker_counts:
+            raise ValueError("worker_counts має містити 1: прискорення рахується відносно одного воркера")
+        sink = JsonLinesSink(output_file)
+        db = self.db_factory()
+        configured_workers = self.workers
+        results = []
+        try:
+            options = insert_options(
+                db.insert_entities_batch if self.with_relations else db.insert_entities_batch_simple, self.chunk_size)
+            for size in sizes:
+                print(f"\nGenerating {size} entities...")
+                entities = db.generate_entities(size)
+                baseline = None
+                for workers in sorted(worker_counts):
+                    db.reset()
+                    self.workers = workers
+                    report = self.ingest(entities)
+                    if baseline is None:
+                        baseline = report['elapsed']
+                    report['speedup'] = baseline / report['elapsed']
+                    report['efficiency'] = report['speedup'] / workers
+
+                    result = {
+                        'test_info': {
+                            'mode': self.mode,
+                            'workers': workers,
+                            'chunk_size': self.chunk_size,
+                            'data_size': size,
+                            'with_relations': self.with_relations,
+                            'insert_options': options,
+                            'backend': type(db).__name__,
+                            'timestamp': datetime.now().isoformat()
+                        },
+                        'ingest': report
+                    }
+                    sink.write(result)
+                    results.append(result)
+                    print(f"  {workers} worker(s): {report['elapsed']:.2f} s, "
+                          f"{report['entities_per_sec']:.0f} entities/sec, "
+                          f"speedup x{report['speedup']:.2f}, efficiency {report['efficiency']:.0%}")
+        finally:
+            self.workers = configured_workers
+            db.reset()
+            db.close()
+
+        print(f"\nResults saved to {output_file}")
+        return results
@@ -1,48 +1,437 @@
 import functools
-import time
-from typing import Callable, Dict, Any
+import inspect
+import math
 import statistics
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from raw_samples import SampleRecorder
+
+
+class LatencyHistogram:
+    def __init__(self, unit: float = 1e-7, sub_bucket_bits: int = 7, max_value: float = 3600.0):
+        """
+        Гістограма затримок з логарифмічними кошиками у стилі HDR Histogram.
+        Кожна октава [2^k, 2^(k+1)) ділиться на 2^(sub_bucket_bits-1) лінійних кошиків,
+        тому відносна похибка перцентилів не перевищує 2^-(sub_bucket_bits-1).
+        Пам'ять фіксована: запис - O(1), перцентиль - O(кількість кошиків).
+
+        Args:
+            unit (float): роздільна здатність у секундах (значення менші за unit потрапляють у кошик 0)
+            sub_bucket_bits (int): кількість біт точності в межах октави
+            max_value (float): найбільше значення в секундах; більші значення потрапляють в останній кошик
+        """
+        self.unit = unit
+        self.sub_bucket_bits = sub_bucket_bits
+        self.max_value = max_value
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.sub_bucket_half = self.sub_bucket_count >> 1
+        self.max_ticks = int(max_value / unit)
+        self.counts = array('Q', bytes(8 * (self._index(self.max_ticks) + 1)))
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, ticks: int) -> int:
+        if ticks < self.sub_bucket_count:
+            return ticks
+        shift = ticks.bit_length() - self.sub_bucket_bits
+        return self.sub_bucket_count + (shift - 1) * self.sub_bucket_half + (ticks >> shift) - self.sub_bucket_half
+
+    def _bucket_bounds(self, index: int) -> Tuple[int, int]:
+        """Межі кошика в одиницях unit: [нижня, верхня)."""
+        if index < self.sub_bucket_count:
+            return index, index + 1
+        shift, offset = divmod(index - self.sub_bucket_count, self.sub_bucket_half)
+        mantissa = offset + self.sub_bucket_half
+        return mantissa << (shift + 1), (mantissa + 1) << (shift + 1)
+
+    def record(self, value: float):
+        ticks = min(max(int(value / self.unit), 0), self.max_ticks)
+        self.counts[self._index(ticks)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent: float) -> float:
+        """Значення, не менше за яке percent відсотків записів (середина відповідного кошика)."""
+        if self.count == 0:
+            return 0.0
+        target = max(1, math.ceil(percent / 100.0 * self.count))
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                low, high = self._bucket_bounds(index)
+                value = (low + high) / 2 * self.unit
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def _check_compatible(self, other: 'LatencyHistogram'):
+        if (self.unit, self.sub_bucket_bits, self.max_value) != (other.unit, other.sub_bucket_bits, other.max_value):
+            raise ValueError("Гістограми з різними параметрами не можна об'єднати")
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Додає записи іншої гістограми з тими самими параметрами (інший запуск або воркер)."""
+        self._check_compatible(other)
+        for index, bucket_count in enumerate(other.counts):
+            if bucket_count:
+                self.counts[index] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Компактне JSON-представлення: лише непорожні кошики."""
+        return {
+            'unit': self.unit,
+            'sub_bucket_bits': self.sub_bucket_bits,
+            'max_value': self.max_value,
+            'count': self.count,
+            'total': self.total,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'buckets': {str(index): bucket_count for index, bucket_count in enumerate(self.counts) if bucket_count}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LatencyHistogram':
+        histogram = cls(data['unit'], data['sub_bucket_bits'], data['max_value'])
+        for index, bucket_count in data['buckets'].items():
+            histogram.counts[int(index)] = bucket_count
+        histogram.count = data['count']
+        histogram.total = data['total']
+        if data['count']:
+            histogram.min = data['min']
+            histogram.max = data['max']
+        return histogram
 
 
 class PerformanceMetrics:
-    def __init__(self):
-        self.metrics: Dict[str, list] = {}
+    def __init__(self, enabled: bool = True):
+        """
+        Args:
+            enabled (bool): якщо False, декоратори викликають методи напряму без жодних вимірювань
+        """
+        self._enabled = enabled
+        # Лічильник вкладених paused() окремо для кожного потоку
+        self._paused = threading.local()
+        self.metrics: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.throughput: Dict[str, Dict[str, float]] = {}
+        # Якщо задано, кожен замір додатково зберігається окремо (див. DatabasePerformanceTester.raw_samples_dir)
+        self.samples: Optional[SampleRecorder] = None
+        # Метрики можуть оновлюватись з кількох потоків одночасно (ConcurrentLoadTester)
+        self._lock = threading.RLock()
+        # Стек відкритих інтервалів (span) окремо для кожного потоку: [назва, початок, час вкладених]
+        self._spans = threading.local()
+
+    def _span_stack(self) -> List[list]:
+        stack = getattr(self._spans, 'stack', None)
+        if stack is None:
+            stack = self._spans.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, operation: str):
+        """
+        Вимірює інтервал з урахуванням вкладеності.
+        - Зовнішній інтервал записується як {operation} (повний час), а якщо в ньому були вкладені
+          інтервали - ще й як {operation}_exclusive (без часу вкладених).
+        - Вкладений інтервал з іншою назвою записується як {operation}_nested, щоб не змішуватись
+          з прямими викликами тієї ж операції.
+        - Повторний інтервал з назвою, що вже є в стеку (подвійний декоратор, рекурсія), не записується.
+        Помилки записуються як {operation}_error лише на зовнішньому рівні.
+        """
+        stack = self._span_stack()
+        if any(frame[0] == operation for frame in stack):
+            self.increment_counter('span_reentrant')
+            yield
+            return
+
+        frame = [operation, time.perf_counter(), 0.0]
+        nested = bool(stack)
+        stack.append(frame)
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            stack.pop()
+            inclusive = time.perf_counter() - frame[1]
+            if nested:
+                stack[-1][2] += inclusive
+                self.add_execution_time(f"{operation}_nested", inclusive)
+            elif failed:
+                self.add_execution_time(f"{operation}_error", inclusive)
+            else:
+                self.add_execution_time(operation, inclusive)
+                if frame[2]:
+                    self.add_execution_time(f"{operation}_exclusive", inclusive - frame[2])
 
     def add_execution_time(self, operation: str, execution_time: float):
-        if operation not in self.metrics:
-            self.metrics[operation] = []
-        self.metrics[operation].append(execution_time)
+        with self._lock:
+            if operation not in self.metrics:
+                self.metrics[operation] = LatencyHistogram()
+            self.metrics[operation].record(execution_time)
+            if self.samples is not None:
+                self.samples.add(operation, execution_time)
+
+    @property
+    def enabled(self) -> bool:
+        """Чи вимірюються виклики в поточному потоці: вимірювання увімкнені і потік не в paused()."""
+        return self._enabled and not getattr(self._paused, 'depth', 0)
+
+    @enabled.setter
+    def enabled(self, value: bool):
+        self._enabled = value
+
+    @contextmanager
+    def paused(self):
+        """
+        Тимчасово вимикає вимірювання в поточному потоці, напр. для службових викликів тестера.
+        Інші потоки, що пишуть у ті самі метрики (ConcurrentLoadTester), і далі вимірюються.
+        """
+        self._paused.depth = getattr(self._paused, 'depth', 0) + 1
+        try:
+            yield
+        finally:
+            self._paused.depth -= 1
+
+    def increment_counter(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def get_counters(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def add_throughput(self, operation: str, rows: int, execution_time: float):
+        with self._lock:
+            if operation not in self.throughput:
+                self.throughput[operation] = {'rows': 0, 'time': 0.0}
+            self.throughput[operation]['rows'] += rows
+            self.throughput[operation]['time'] += execution_time
+
+    @contextmanager
+    def track_throughput(self, operation: str, rows: int):
+        """Контекстний менеджер, що записує час виконання блоку як обробку rows рядків."""
+        start_time = time.perf_counter()
+        yield
+        self.add_throughput(operation, rows, time.perf_counter() - start_time)
+
+    def get_throughput(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                operation: {
+                    'rows': totals['rows'],
+                    'time': totals['time'],
+                    'rows_per_sec': totals['rows'] / totals['time'] if totals['time'] > 0 else 0.0
+                }
+                for operation, totals in self.throughput.items()
+            }
 
     def get_statistics(self) -> Dict[str, Dict[str, float]]:
         stats = {}
-        for operation, times in self.metrics.items():
-            if times:
-                stats[operation] = {
-                    'min': min(times),
-                    'max': max(times),
-                    'avg': statistics.mean(times),
-                    'median': statistics.median(times),
-                    'count': len(times)
-                }
+        with self._lock:
+            for operation, histogram in self.metrics.items():
+                if histogram.count:
+                    stats[operation] = {
+                        'min': histogram.min,
+                        'max': histogram.max,
+                        'avg': histogram.mean,
+                        'median': histogram.percentile(50),
+                        'p90': histogram.percentile(90),
+                        'p99': histogram.percentile(99),
+                        'p999': histogram.percentile(99.9),
+                        'count': histogram.count
+                    }
         return stats
 
+    def get_histograms(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {operation: histogram.to_dict() for operation, histogram in self.metrics.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Серіалізовані гістограми, лічильники та пропускна здатність (напр. для передачі з процесу-воркера)."""
+        with self._lock:
+            return {
+                'histograms': self.get_histograms(),
+                'counters': dict(self.counters),
+                'throughput': {operation: dict(totals) for operation, totals in self.throughput.items()}
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PerformanceMetrics':
+        metrics = cls()
+        metrics.metrics = {
+            operation: LatencyHistogram.from_dict(histogram) for operation, histogram in data['histograms'].items()
+        }
+        metrics.counters = dict(data['counters'])
+        metrics.throughput = {operation: dict(totals) for operation, totals in data['throughput'].items()}
+        return metrics
+
+    def merge(self, other: 'PerformanceMetrics'):
+        """Об'єднує метрики іншого екземпляра (іншого запуску або воркера) з поточними."""
+        with self._lock:
+            for operation, histogram in other.metrics.items():
+                if operation not in self.metrics:
+                    self.metrics[operation] = LatencyHistogram(
+                        histogram.unit, histogram.sub_bucket_bits, histogram.max_value)
+                self.metrics[operation].merge(histogram)
+            for name, value in other.counters.items():
+                self.increment_counter(name, value)
+            for operation, totals in other.throughput.items():
+                self.add_throughput(operation, totals['rows'], totals['time'])
+
     def clear(self):
-        self.metrics = {}
+        with self._lock:
+            self.metrics = {}
+            self.counters = {}
+            self.throughput = {}
+
+
+# Квантилі 0.975 t-розподілу Стьюдента для 1..30 ступенів свободи
+T_975 = (
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042
+)
+
+# Найменша кількість значень, з якої 95% t-інтервал може бути вужчим за [min, max]
+MIN_CONFIDENCE_SAMPLES = 5
+
+# Найменша кількість значень, з якої find_outliers шукає викиди
+MIN_OUTLIER_SAMPLES = 8
+
+
+def t_quantile_975(df: int) -> float:
+    """Квантиль 0.975 t-розподілу; після 30 ступенів свободи - розклад Корніша-Фішера навколо z = 1.96."""
+    if df <= len(T_975):
+        return T_975[df - 1]
+    z = 1.959964
+    return z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+
+
+def mean_confidence_interval(values: List[float]) -> Tuple[float, float]:
+    """
+    95% довірчий інтервал середнього за t-розподілом: mean ± t(n-1) * s / sqrt(n).
+    На відміну від інтервалу медіани за порядковими статистиками, звужується вже з MIN_CONFIDENCE_SAMPLES значень.
+    Для одного значення інтервал вироджується в точку.
+    """
+    mean = statistics.mean(values)
+    n = len(values)
+    if n < 2:
+        return mean, mean
+    half_width = t_quantile_975(n - 1) * statistics.stdev(values) / math.sqrt(n)
+    return mean - half_width, mean + half_width
+
+
+def find_outliers(values: List[float], threshold: float = 3.5) -> List[int]:
+    """
+    Індекси викидів за модифікованою z-оцінкою: |x - медіана| / (1.4826 * MAD) > threshold.
+    Якщо MAD = 0 (більшість значень однакові), замість нього береться середнє абсолютне відхилення (1.2533 * MeanAD).
+    Для менш ніж MIN_OUTLIER_SAMPLES значень медіана й MAD надто нестабільні, тож викиди не шукаються.
+    """
+    if len(values) < MIN_OUTLIER_SAMPLES:
+        return []
+    median = statistics.median(values)
+    deviations = [abs(value - median) for value in values]
+    scale = 1.4826 * statistics.median(deviations)
+    if scale == 0:
+        scale = 1.2533 * statistics.mean(deviations)
+        if scale == 0:
+            return []
+    return [index for index, deviation in enumerate(deviations) if deviation / scale > threshold]
 
 
 def measure_execution_time(func: Callable):
-    """Декоратор для вимірювання часу виконання методів класу MSSQLDatabase"""
+    """
+    Декоратор для вимірювання часу виконання методів класів баз даних.
+    Вкладені та повторні виклики обробляються через PerformanceMetrics.span.
+    Для корутин (асинхронні бекенди) час записується напряму: стек span прив'язаний до потоку,
+    а в одному потоці одночасно виконуються сотні корутин.
+    """
+    name = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(self, *args, **kwargs):
+            metrics = self.performance_metrics
+            if not metrics.enabled:
+                return await func(self, *args, **kwargs)
+            start_time = time.perf_counter()
+            try:
+                result = await func(self, *args, **kwargs)
+            except BaseException:
+                metrics.add_execution_time(f"{name}_error", time.perf_counter() - start_time)
+                raise
+            metrics.add_execution_time(name, time.perf_counter() - start_time)
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        metrics = self.performance_metrics
+        if not metrics.enabled:
+            return func(self, *args, **kwargs)
+        with metrics.span(name):
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
+
+def measure_stream(func: Optional[Callable] = None, *, variant_flags: Tuple[str, ...] = ()):
+    """
+    Декоратор для методів-генераторів: записує час до першого рядка ({name}_first_row)
+    та повний час читання ({name}). Якщо споживач зупинив ітерацію достроково, повний час не записується.
+
+    Args:
+        variant_flags: назви логічних параметрів методу, що змінюють запит; увімкнені додаються до назви
+            метрики ({name}_{flag}), щоб різні варіанти не змішувались в одній статистиці
+    """
+    if func is None:
+        return functools.partial(measure_stream, variant_flags=variant_flags)
+    signature = inspect.signature(func)
+
     @functools.wraps(func)
     def wrapper(self, *args, **kwargs):
+        if not self.performance_metrics.enabled:
+            yield from func(self, *args, **kwargs)
+            return
+        name = func.__name__
+        if variant_flags:
+            arguments = signature.bind(self, *args, **kwargs)
+            arguments.apply_defaults()
+            name = '_'.join([name] + [flag for flag in variant_flags if arguments.arguments[flag]])
         start_time = time.perf_counter()
+        first_row = True
         try:
-            result = func(self, *args, **kwargs)
-            execution_time = time.perf_counter() - start_time
-            self.performance_metrics.add_execution_time(func.__name__, execution_time)
-            return result
+            for row in func(self, *args, **kwargs):
+                if first_row:
+                    self.performance_metrics.add_execution_time(
+                        f"{name}_first_row", time.perf_counter() - start_time)
+                    first_row = False
+                yield row
         except Exception as e:
             execution_time = time.perf_counter() - start_time
-            self.performance_metrics.add_execution_time(f"{func.__name__}_error", execution_time)
+            self.performance_metrics.add_execution_time(f"{name}_error", execution_time)
             raise e
+        self.performance_metrics.add_execution_time(name, time.perf_counter() - start_time)
 
-    return wrapper
\ No newline at end of file
+    return wrapper
@@ -0,0 +1,304 @@
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+# Методи читання, результати яких кешуються
+CACHED_METHODS = ('get_top_rated_anime', 'get_anime_by_genre', 'get_average_anime_rating', 'fetch_existing_genres')
+
+# Методи, ключ яких - лише ID аніме (рядком, щоб int/str/ObjectId одного запису давали один ключ):
+# записи в конкретні аніме інвалідують тільки їхні ключі, а не весь метод
+ID_KEYED_METHODS = {'get_average_anime_rating': 'anime_id'}
+
+_ALL = CACHED_METHODS
+_RELATIONS = ('get_top_rated_anime', 'get_anime_by_genre', 'fetch_existing_genres')
+
+# Операції запису -> кешовані методи, результати яких вони можуть змінити
+WRITE_INVALIDATIONS = {
+    # Записи без жанрів і відгуків не потрапляють ні в топ, ні у вибірку за жанром
+    'insert_anime_simple': (),
+    'insert_entities_batch_simple': (),
+    'insert_anime_with_relations': _RELATIONS,
+    'insert_entities_batch': _RELATIONS,
+    # Назва та рік є в результатах топу і вибірки за жанром, рейтинги не змінюються
+    'update_anime_simple': ('get_top_rated_anime', 'get_anime_by_genre'),
+    'update_anime_with_relations': _ALL,
+    'update_entities_batch': _ALL,
+    'add_review': ('get_top_rated_anime', 'get_average_anime_rating'),
+    'rebuild_rating_summary': ('get_top_rated_anime', 'get_average_anime_rating'),
+    'delete_anime_simple': _ALL,
+    'delete_anime_with_relations': _ALL,
+    'reset': _ALL,
+    # SQL-бекенди з набором даних (dataset) додають у Genre відсутні жанри перед генерацією сутностей
+    'generate_entities': ('fetch_existing_genres',)
+}
+
+# Невідомі методи з такими префіксами вважаються записом і інвалідують увесь кеш
+WRITE_PREFIXES = ('insert_', 'update_', 'delete_', 'add_', 'rebuild_')
+
+
+def _key_label(key: Tuple[str, tuple]) -> str:
+    method, args = key
+    return f"{method}({', '.join(map(repr, args))})"
+
+
+class QueryCache:
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 60.0, clock: Callable[[], float] = time.monotonic):
+        """
+        LRU-кеш з часом життя записів і статистикою по ключах.
+        Ключ - (назва методу, аргументи). Разом зі значенням зберігається час запиту,
+        що його заповнив (cost): на влучанні це і є зекономлена затримка.
+
+        Args:
+            max_size (int): найбільша кількість записів (і ключів зі статистикою); найдавніше використані витісняються
+            ttl (float): час життя запису в секундах; None - записи не застарівають
+            clock: джерело часу для ttl
+        """
+        if max_size < 1:
+            raise ValueError("max_size має бути додатнім")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        # ключ -> [значення, момент застарівання, cost]
+        self._entries: 'OrderedDict[Hashable, list]' = OrderedDict()
+        self._by_method: Dict[str, set] = {}
+        # ключ -> [влучання, промахи, інвалідації, зекономлено секунд]; переживає інвалідацію запису
+        self._key_stats: 'OrderedDict[Hashable, list]' = OrderedDict()
+        # Змінюється з кожною інвалідацією: put з результатом, прочитаним до запису, відкидається
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.expirations = 0
+            self.evictions = 0
+            self.invalidations = 0
+            self.saved = 0.0
+            self._key_stats.clear()
+
+    def _stats_for(self, key) -> list:
+        stats = self._key_stats.get(key)
+        if stats is None:
+            stats = self._key_stats[key] = [0, 0, 0, 0.0]
+            if len(self._key_stats) > self.max_size:
+                self._key_stats.popitem(last=False)
+        else:
+            self._key_stats.move_to_end(key)
+        return stats
+
+    def _remove(self, key):
+        del self._entries[key]
+        keys = self._by_method[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._by_method[key[0]]
+
+    def lookup(self, key) -> Tuple[bool, Any, float]:
+        """Повертає (True, значення, cost) для живого запису або (False, None, 0.0) і рахує влучання/промах."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= self.clock():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            stats = self._stats_for(key)
+            if entry is None:
+                self.misses += 1
+                stats[1] += 1
+                return False, None, 0.0
+            self._entries.move_to_end(key)
+            self.hits += 1
+            stats[0] += 1
+            return True, entry[0], entry[2]
+
+    def add_saved(self, key, seconds: float):
+        with self._lock:
+            self.saved += seconds
+            stats = self._key_stats.get(key)
+            if stats is not None:
+                stats[3] += seconds
+
+    def put(self, key, value, cost: float, generation: int) -> bool:
+        """
+        Зберігає значення, якщо з моменту generation (значення self.generation перед запитом) не було інвалідацій.
+        Повертає True, якщо значення збережено.
+        """
+        with self._lock:
+            if generation != self.generation:
+                return False
+            expires_at = None if self.ttl is None else self.clock() + self.ttl
+            self._entries[key] = [value, expires_at, cost]
+            self._entries.move_to_end(key)
+            self._by_method.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, keys: Iterable[Hashable]):
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+                    self.invalidations += 1
+                    self._stats_for(key)[2] += 1
+
+    def invalidate_method(self, method: str):
+        with self._lock:
+            self.generation += 1
+            for key in list(self._by_method.get(method, ())):
+                self._remove(key)
+                self.invalidations += 1
+                self._stats_for(key)[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._by_method.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'saved_seconds': self.saved,
+                'keys': {
+                    _key_label(key): {'hits': hits, 'misses': misses, 'invalidations': invalidations,
+                                      'saved_seconds': saved, 'cached': key in self._entries}
+                    for key, (hits, misses, invalidations, saved) in self._key_stats.items()
+                }
+            }
+
+
+class CachedDatabase:
+    def __init__(self, db, max_size: int = 1024, ttl: Optional[float] = 60.0, methods: Iterable[str] = CACHED_METHODS):
+        """
+        Необов'язковий кеш результатів запитів поверх MSSQLDatabase, MongoDatabase або SQLiteDatabase.
+        Решта атрибутів і методів делегується базі, тож обгортку можна передавати тестерам замість бази.
+        Методи запису викликаються напряму, а після них інвалідуються ключі, результати яких могли змінитися
+        (WRITE_INVALIDATIONS). Кешовані результати спільні для всіх викликів - їх не можна змінювати.
+
+        У performance_metrics бази на кожен кешований метод записуються лічильники {method}_cache_hits /
+        {method}_cache_misses, час відповіді з кешу ({method}_cached) і зекономлена затримка ({method}_cache_saved);
+        промахи вимірюються самим методом бази під власною назвою.
+
+        Args:
+            db: екземпляр синхронного бекенду
+            max_size (int): найбільша кількість закешованих результатів
+            ttl (float): час життя результату в секундах; None - до інвалідації або витіснення
+            methods: назви методів читання, що кешуються
+        """
+        self.db = db
+        self.cache = QueryCache(max_size, ttl)
+        self.methods = frozenset(methods)
+        self._signatures: Dict[str, inspect.Signature] = {}
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.db, name)
+        if not callable(attribute):
+            return attribute
+        if name in self.methods:
+            return functools.wraps(attribute)(functools.partial(self._cached_call, name, attribute))
+        if name in WRITE_INVALIDATIONS or name.startswith(WRITE_PREFIXES):
+            return functools.wraps(attribute)(functools.partial(self._write_call, name, attribute))
+        return attribute
+
+    def _bind(self, name: str, function: Callable, args: tuple, kwargs: dict) -> inspect.BoundArguments:
+        signature = self._signatures.get(name)
+        if signature is None:
+            signature = self._signatures[name] = inspect.signature(function)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return bound
+
+    def _key(self, name: str, function: Callable, args: tuple, kwargs: dict) -> Optional[Tuple[str, tuple]]:
+        """Ключ кешу з нормалізованих аргументів; None, якщо аргументи не хешуються."""
+        bound = self._bind(name, function, args, kwargs)
+        if name in ID_KEYED_METHODS:
+            return name, (str(bound.arguments[ID_KEYED_METHODS[name]]),)
+        key = name, tuple(bound.arguments.values())
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _cached_call(self, name: str, function: Callable, *args, **kwargs):
+        key = self._key(name, function, args, kwargs)
+        if key is None:
+            return function(*args, **kwargs)
+
+        metrics = self.db.performance_metrics
+        start_time = time.perf_counter()
+        found, value, cost = self.cache.lookup(key)
+        if found:
+            elapsed = time.perf_counter() - start_time
+            saved = max(cost - elapsed, 0.0)
+            self.cache.add_saved(key, saved)
+            if metrics.enabled:
+                metrics.increment_counter(f"{name}_cache_hits")
+                metrics.add_execution_time(f"{name}_cached", elapsed)
+                metrics.add_execution_time(f"{name}_cache_saved", saved)
+            return value
+
+        generation = self.cache.generation
+        value = function(*args, **kwargs)
+        self.cache.put(key, value, time.perf_counter() - start_time, generation)
+        if metrics.enabled:
+            metrics.increment_counter(f"{name}_cache_misses")
+        return value
+
+    def _written_ids(self, name: str, function: Callable, args: tuple, kwargs: dict) -> Optional[list]:
+        """ID аніме, яких торкається запис; None - невідомо або всі записи."""
+        arguments = self._bind(name, function, args, kwargs).arguments
+        if 'anime_id' in arguments:
+            return [arguments['anime_id']]
+        if name == 'update_entities_batch':
+            return list(arguments['updates'])
+        if 'anime_ids' in arguments and arguments['anime_ids']:
+            return list(arguments['anime_ids'])
+        return None
+
+    def _write_call(self, name: str, function: Callable, *args, **kwargs):
+        try:
+            return function(*args, **kwargs)
+        finally:
+            # Навіть після помилки: запис міг частково виконатися
+            for method in WRITE_INVALIDATIONS.get(name, _ALL):
+                if method not in self.methods:
+                    continue
+                ids = self._written_ids(name, function, args, kwargs) if method in ID_KEYED_METHODS else None
+                if ids is None:
+                    self.cache.invalidate_method(method)
+                else:
+                    self.cache.invalidate((method, (str(anime_id),)) for anime_id in ids)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Загальна статистика кешу і статистика по ключах (див. QueryCache.stats)."""
+        return self.cache.stats()
+
+    def reset_cache_stats(self):
+        self.cache.reset_stats()
+
+    def clear_cache(self):
+        self.cache.clear()
@@ -0,0 +1,141 @@
+import csv
+import time
+from array import array
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+SUMMARY_FIELDS = ['backend', 'data_size', 'operation', 'count', 'min', 'max', 'avg', 'median', 'p90', 'p99']
+
+
+class SampleRecorder:
+    def __init__(self):
+        """
+        Накопичує кожен окремий замір у колонках на основі array (без об'єкта на замір).
+        Назви операцій зберігаються один раз, а в колонці - лише їхні коди.
+        """
+        self.iteration = 0
+        self.operations: Dict[str, int] = {}
+        self.codes = array('H')
+        self.durations = array('d')
+        self.timestamps = array('d')
+        self.iterations = array('H')
+
+    def add(self, operation: str, duration: float):
+        code = self.operations.get(operation)
+        if code is None:
+            code = self.operations[operation] = len(self.operations)
+        self.codes.append(code)
+        self.durations.append(duration)
+        self.timestamps.append(time.time())
+        self.iterations.append(self.iteration)
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+    def save(self, path: str, backend: str, data_size: int):
+        """
+        Записує заміри у стиснений .npz: числові колонки та таблиці назв операцій і бекенду.
+
+        Args:
+            path (str): шлях до файлу .npz
+            backend (str): назва бекенду (наприклад, MSSQLDatabase)
+            data_size (int): розмір даних, для якого зроблено заміри
+        """
+        count = len(self)
+        np.savez_compressed(
+            path,
+            operation=np.frombuffer(self.codes, dtype=np.uint16),
+            operation_names=np.array(list(self.operations), dtype=np.str_),
+            duration=np.frombuffer(self.durations, dtype=np.float64),
+            timestamp=np.frombuffer(self.timestamps, dtype=np.float64),
+            iteration=np.frombuffer(self.iterations, dtype=np.uint16),
+            data_size=np.full(count, data_size, dtype=np.int64),
+            backend=np.zeros(count, dtype=np.uint16),
+            backend_names=np.array([backend], dtype=np.str_)
+        )
+
+    def clear(self):
+        self.operations = {}
+        self.codes = array('H')
+        self.durations = array('d')
+        self.timestamps = array('d')
+        self.iterations = array('H')
+
+
+def load_samples(paths: Iterable[str]) -> Dict[str, np.ndarray]:
+    """
+    Завантажує та об'єднує файли .npz, записані SampleRecorder.save.
+    Коди операцій і бекендів перекодовуються у спільні таблиці назв векторно (без циклу по замірах).
+
+    Returns:
+        dict: колонки однакової довжини - 'operation' і 'backend' (рядки), 'duration', 'timestamp',
+              'iteration', 'data_size'
+    """
+    columns = {name: [] for name in ('operation', 'backend', 'duration', 'timestamp', 'iteration', 'data_size')}
+    operation_names: Dict[str, int] = {}
+    backend_names: Dict[str, int] = {}
+
+    for path in paths:
+        with np.load(path) as data:
+            if len(data['duration']) == 0:
+                continue
+            for column, names, table in (('operation', data['operation_names'], operation_names),
+                                         ('backend', data['backend_names'], backend_names)):
+                remap = np.array([table.setdefault(str(name), len(table)) for name in names], dtype=np.int64)
+                columns[column].append(remap[data[column]])
+            for column in ('duration', 'timestamp', 'iteration', 'data_size'):
+                columns[column].append(data[column])
+
+    if not columns['duration']:
+        return {
+            'operation': np.array([], dtype=np.str_), 'backend': np.array([], dtype=np.str_),
+            'duration': np.array([]), 'timestamp': np.array([]),
+            'iteration': np.array([], dtype=np.uint16), 'data_size': np.array([], dtype=np.int64)
+        }
+
+    result = {column: np.concatenate(parts) for column, parts in columns.items()}
+    result['operation'] = np.array(list(operation_names), dtype=np.str_)[result['operation']]
+    result['backend'] = np.array(list(backend_names), dtype=np.str_)[result['backend']]
+    return result
+
+
+def summarize_samples(samples: Dict[str, np.ndarray]) -> List[Dict]:
+    """
+    Агрегує заміри по (бекенд, розмір даних, операція): кількість, min, max, avg, median, p90, p99.
+    Заміри сортуються один раз, після чого кожна група - суцільний відрізок масиву.
+    """
+    if len(samples['duration']) == 0:
+        return []
+    keys = np.rec.fromarrays([samples['backend'], samples['data_size'], samples['operation']])
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    order = np.lexsort((samples['duration'], inverse))
+    durations = samples['duration'][order]
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(inverse, minlength=len(unique_keys)))))
+
+    summary = []
+    for (backend, data_size, operation), start, end in zip(unique_keys.tolist(), bounds[:-1], bounds[1:]):
+        group = durations[start:end]
+        p50, p90, p99 = np.percentile(group, [50, 90, 99])
+        summary.append({
+            'backend': backend,
+            'data_size': int(data_size),
+            'operation': operation,
+            'count': int(end - start),
+            'min': float(group[0]),
+            'max': float(group[-1]),
+            'avg': float(group.mean()),
+            'median': float(p50),
+            'p90': float(p90),
+            'p99': float(p99)
+        })
+    return summary
+
+
+def write_summary_csv(samples: Dict[str, np.ndarray], path: str = 'performance_metrics_summary.csv'):
+    """Записує зведену таблицю summarize_samples у CSV."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summarize_samples(samples))
@@ -0,0 +1,73 @@
+import datetime
+from typing import Any, List, NamedTuple, Optional
+
+
+class GenreRecord(NamedTuple):
+    id: Optional[int]
+    name: str
+    description: Optional[str] = None
+
+
+class ReviewRecord(NamedTuple):
+    id: Optional[int]
+    user_id: Any
+    rating: int
+    content: str
+    created_at: Optional[datetime.datetime] = None
+    updated_at: Optional[datetime.datetime] = None
+
+
+class AnimeRecord(NamedTuple):
+    """
+    Компактний рядок аніме з уже розібраними жанрами та відгуками.
+    id - int для реляційних бекендів і рядок ObjectId для MongoDB.
+    """
+    id: Any
+    title: str
+    original_title: Optional[str]
+    year: Optional[int]
+    synopsis: Optional[str]
+    episodes: Optional[int]
+    duration: Optional[int]
+    is_deleted: bool
+    created_at: Optional[datetime.datetime]
+    updated_at: Optional[datetime.datetime]
+    updated_by: Any
+    genres: List[GenreRecord]
+    reviews: List[ReviewRecord]
+
+
+ANIME_FIELDS = AnimeRecord._fields[:-2]
+
+
+def anime_record_from_document(document: dict) -> AnimeRecord:
+    """Перетворення документа MongoDB у AnimeRecord."""
+    return AnimeRecord(
+        id=str(document['_id']),
+        title=document.get('title'),
+        original_title=document.get('original_title'),
+        year=document.get('year'),
+        synopsis=document.get('synopsis'),
+        episodes=document.get('episodes'),
+        duration=document.get('duration'),
+        is_deleted=document.get('is_deleted', False),
+        created_at=document.get('created_at'),
+        updated_at=document.get('updated_at'),
+        updated_by=document.get('updated_by'),
+        genres=[
+            GenreRecord(genre.get('id'), genre.get('name'), genre.get('description'))
+            if isinstance(genre, dict) else GenreRecord(None, genre)
+            for genre in document.get('genres', [])
+        ],
+        reviews=[
+            ReviewRecord(
+                review.get('id'),
+                review.get('user_id'),
+                review.get('rating'),
+                review.get('content'),
+                review.get('created_at'),
+                review.get('updated_at')
+            )
+            for review in document.get('reviews', [])
+        ]
+    )
@@ -0,0 +1,125 @@
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _column(values: Sequence) -> np.ndarray:
+    """Числові значення - компактний масив NumPy, решта (рядки, ObjectId, словники) - масив об'єктів."""
+    array = np.asarray(values)
+    if array.ndim == 1 and array.dtype.kind in 'biuf':
+        return array
+    column = np.empty(len(values), dtype=object)
+    column[:] = list(values)
+    return column
+
+
+class ReferenceData:
+    def __init__(self, loaders: Dict[str, Callable[[], Sequence]], seed: Optional[int] = None):
+        """
+        Версійований кеш довідкових даних (користувачі, жанри) для генераторів тестових даних.
+        Таблиця завантажується ліниво при першому зверненні, далі береться з пам'яті:
+        generate_entities і generate_updates не запитують базу на кожен виклик.
+        Кожна таблиця зберігається колонками NumPy, тож вибірка випадкових значень - один виклик rng.
+
+        Дані не відстежують змін у базі: refresh перечитує таблиці, invalidate позначає їх застарілими
+        (перечитуються при наступному зверненні). Кожне завантаження збільшує версію таблиці.
+
+        Args:
+            loaders: назва таблиці -> функція без аргументів, що повертає рядки таблиці
+                (кортежі - кілька колонок, перша - ID; інші значення - одна колонка);
+                корутинні функції асинхронних бекендів завантажуються лише через load_async
+            seed (int): зерно генератора для sample / choice
+        """
+        self.loaders = dict(loaders)
+        self.rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        # назва -> (колонки, версія, момент завантаження); відсутній ключ - таблицю ще не завантажено
+        self._tables: Dict[str, Tuple[Tuple[np.ndarray, ...], int, float]] = {}
+        self._versions: Dict[str, int] = {name: 0 for name in self.loaders}
+        self._stale: set = set()
+
+    def _load(self, name: str):
+        loader = self.loaders[name]
+        if inspect.iscoroutinefunction(loader):
+            raise RuntimeError(f"Таблиця {name} має асинхронний завантажувач: спершу викличте load_async")
+        self._store(name, list(loader()))
+
+    def _store(self, name: str, rows: list):
+        if rows and isinstance(rows[0], tuple):
+            columns = tuple(_column(values) for values in zip(*rows))
+        else:
+            columns = (_column(rows),)
+        self._versions[name] += 1
+        self._tables[name] = columns, self._versions[name], time.time()
+        self._stale.discard(name)
+
+    def _table(self, name: str) -> Tuple[np.ndarray, ...]:
+        table = self._tables.get(name)
+        if table is not None and name not in self._stale:
+            return table[0]
+        with self._lock:
+            if name not in self._tables or name in self._stale:
+                self._load(name)
+            return self._tables[name][0]
+
+    def load(self, *names: str) -> 'ReferenceData':
+        """Попереднє завантаження таблиць names (усіх, якщо не вказано), ще не завантажених або застарілих."""
+        for name in names or self.loaders:
+            self._table(name)
+        return self
+
+    async def load_async(self, *names: str) -> 'ReferenceData':
+        """Асинхронний аналог load: чекає на корутинні завантажувачі таблиць, ще не завантажених або застарілих."""
+        for name in names or self.loaders:
+            if name in self._tables and name not in self._stale:
+                continue
+            rows = self.loaders[name]()
+            if inspect.isawaitable(rows):
+                rows = await rows
+            with self._lock:
+                self._store(name, list(rows))
+        return self
+
+    def refresh(self, *names: str) -> 'ReferenceData':
+        """Негайно перечитує таблиці names (усі, якщо не вказано)."""
+        with self._lock:
+            for name in names or self.loaders:
+                self._load(name)
+        return self
+
+    def invalidate(self, *names: str):
+        """Позначає таблиці names (усі, якщо не вказано) застарілими."""
+        with self._lock:
+            self._stale.update(names or self.loaders)
+
+    def get(self, name: str) -> np.ndarray:
+        """Перша колонка таблиці (ID)."""
+        return self._table(name)[0]
+
+    def columns(self, name: str) -> Tuple[np.ndarray, ...]:
+        return self._table(name)
+
+    def version(self, name: str) -> int:
+        """Кількість завантажень таблиці (0 - ще не завантажувалась)."""
+        return self._versions[name]
+
+    def sample(self, name: str, count: int, replace: bool = True) -> List[Any]:
+        """count випадкових ID з таблиці name як значення Python (придатні для параметрів запитів)."""
+        values = self.get(name)
+        if not replace:
+            return self.rng.choice(values, count, replace=False).tolist()
+        return values[self.rng.integers(0, len(values), count)].tolist()
+
+    def choice(self, name: str) -> Any:
+        """Один випадковий ID з таблиці name."""
+        return self.sample(name, 1)[0]
+
+    def describe(self) -> Dict[str, Dict[str, Any]]:
+        """Розміри і версії завантажених таблиць для test_info результатів."""
+        return {
+            name: {'rows': len(columns[0]), 'version': version, 'loaded_at': loaded_at}
+            for name, (columns, version, loaded_at) in self._tables.items()
+        }
@@ -0,0 +1,111 @@
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from records import ANIME_FIELDS, AnimeRecord, GenreRecord, ReviewRecord
+
+
+GENRES_BY_ANIME_QUERY = """
+    SELECT ag.anime_id, g.id, g.name, g.description
+    FROM AnimeGenre ag
+    JOIN Genre g ON ag.genre_id = g.id
+    WHERE ag.anime_id IN ({})
+"""
+
+REVIEWS_BY_ANIME_QUERY = """
+    SELECT anime_id, id, user_id, rating, content, created_at, updated_at
+    FROM Review
+    WHERE anime_id IN ({})
+    ORDER BY anime_id, id
+"""
+
+
+def _load_relations(cursor, anime_ids: List[Any], chunk_size: int,
+                    make_genre: Callable, make_review: Callable) -> Tuple[Dict[Any, list], Dict[Any, list]]:
+    """
+    Читає жанри та відгуки для списку id двома запитами на кожну порцію з chunk_size id.
+
+    Returns:
+        tuple: (словник anime_id -> список жанрів, словник anime_id -> список відгуків)
+    """
+    genres_by_id = {anime_id: [] for anime_id in anime_ids}
+    reviews_by_id = {anime_id: [] for anime_id in anime_ids}
+
+    for i in range(0, len(anime_ids), chunk_size):
+        chunk = anime_ids[i:i + chunk_size]
+        placeholders = ",".join("?" for _ in chunk)
+
+        cursor.execute(GENRES_BY_ANIME_QUERY.format(placeholders), chunk)
+        for anime_id, genre_id, name, description in cursor.fetchall():
+            genres_by_id[anime_id].append(make_genre(genre_id, name, description))
+
+        cursor.execute(REVIEWS_BY_ANIME_QUERY.format(placeholders), chunk)
+        for anime_id, review_id, user_id, rating, content, created_at, updated_at in cursor.fetchall():
+            reviews_by_id[anime_id].append(make_review(review_id, user_id, rating, content, created_at, updated_at))
+
+    return genres_by_id, reviews_by_id
+
+
+def _genre_document(genre_id, name, description) -> Dict[str, Any]:
+    return {'id': genre_id, 'name': name, 'description': description}
+
+
+def _review_document(review_id, user_id, rating, content, created_at, updated_at) -> Dict[str, Any]:
+    return {
+        'id': review_id,
+        'user_id': user_id,
+        'rating': rating,
+        'content': content,
+        'created_at': created_at,
+        'updated_at': updated_at
+    }
+
+
+def load_anime_documents(cursor, parent_query: str, params: Sequence[Any], chunk_size: int) -> List[Dict[str, Any]]:
+    """
+    Читає сторінку аніме, а потім жанри та відгуки двома окремими запитами по списку id,
+    і збирає результат у вкладені словники тієї ж форми, що й документи MongoDB.
+    На відміну від одного запиту з двома LEFT JOIN, тут немає декартового добутку жанри x відгуки.
+
+    Args:
+        cursor: курсор DB-API (pyodbc або sqlite3)
+        parent_query (str): запит до таблиці Anime, що повертає колонку id
+        params: параметри parent_query
+        chunk_size (int): максимальна кількість id в одному IN (...), обмежена кількістю параметрів драйвера
+
+    Returns:
+        list: список словників з полями Anime та списками 'genres' і 'reviews'
+    """
+    cursor.execute(parent_query, params)
+    columns = [column[0] for column in cursor.description]
+    documents = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    genres_by_id, reviews_by_id = _load_relations(
+        cursor, [document['id'] for document in documents], chunk_size, _genre_document, _review_document)
+
+    for document in documents:
+        document['genres'] = genres_by_id[document['id']]
+        document['reviews'] = reviews_by_id[document['id']]
+    return documents
+
+
+def load_anime_records(cursor, parent_query: str, params: Sequence[Any], chunk_size: int) -> List[AnimeRecord]:
+    """
+    Те саме, що load_anime_documents, але повертає AnimeRecord зі списками GenreRecord і ReviewRecord.
+    Жанри й відгуки не кодуються в рядки з роздільниками, тож декодувати їх споживачам не потрібно.
+    """
+    cursor.execute(parent_query, params)
+    columns = [column[0] for column in cursor.description]
+    field_positions = [columns.index(field) for field in ANIME_FIELDS]
+    id_position = columns.index('id')
+    rows = cursor.fetchall()
+
+    genres_by_id, reviews_by_id = _load_relations(
+        cursor, [row[id_position] for row in rows], chunk_size, GenreRecord, ReviewRecord)
+
+    return [
+        AnimeRecord(
+            *(row[position] for position in field_positions),
+            genres=genres_by_id[row[id_position]],
+            reviews=reviews_by_id[row[id_position]]
+        )
+        for row in rows
+    ]
@@ -0,0 +1,234 @@
+import datetime
+import random
+import string
+
+from reference_data import ReferenceData
+
+
+# Колонки Anime, які змінює update_entities_batch; біт i маски update_mask означає, що колонка i оновлюється
+UPDATABLE_ANIME_COLUMNS = (
+    'title', 'original_title', 'year', 'synopsis', 'episodes', 'duration', 'is_deleted', 'updated_at', 'updated_by'
+)
+
+
+class RelationalDatabase:
+    """
+    Спільна частина MSSQLDatabase і SQLiteDatabase, що не залежить від СУБД: генерація сутностей і оновлень
+    з довідкових даних та підготовка рядків для пакетних вставок і оновлень.
+    Підкласи задають fetch_existing_genres, fetch_existing_users, _insert_genres і, за потреби, _parameter.
+    """
+
+    @staticmethod
+    def _parameter(value):
+        """Перетворення значення (напр. datetime) у параметр запиту драйвера."""
+        return value
+
+    def _init_reference_data(self, seed):
+        """Довідкові дані генераторів: ID користувачів і (id, name) жанрів, завантажуються при першому зверненні."""
+        self.reference_data = ReferenceData({
+            'users': self.fetch_existing_users,
+            'genres': lambda: [tuple(row) for row in self.fetch_existing_genres()]
+        }, seed)
+
+    def fetch_existing_genres(self):
+        raise NotImplementedError
+
+    def fetch_existing_users(self):
+        raise NotImplementedError
+
+    def _insert_genres(self, genres):
+        """Додає жанри ({'name', 'description'}) у таблицю Genre. Повертає їхні ID у тому ж порядку."""
+        raise NotImplementedError
+
+    @classmethod
+    def _anime_rows(cls, batch):
+        """Підготовка рядків Anime для вставки."""
+        return [
+            (
+                entity['anime']['title'],
+                entity['anime']['original_title'],
+                entity['anime']['year'],
+                entity['anime']['synopsis'],
+                entity['anime']['episodes'],
+                entity['anime']['duration'],
+                entity['anime'].get('is_deleted', False),
+                cls._parameter(entity['anime']['created_at']),
+                cls._parameter(entity['anime']['updated_at']),
+                entity['anime']['updated_by']
+            ) for entity in batch
+        ]
+
+    @classmethod
+    def _batch_relation_rows(cls, batch, anime_ids):
+        """
+        Рядки AnimeGenre та Review для пакету сутностей.
+
+        Args:
+            batch (list): сутності пакету
+            anime_ids (dict): позиція сутності в пакеті -> ID вставленого аніме
+        """
+        if len(anime_ids) != len(batch):
+            raise RuntimeError(f"Отримано {len(anime_ids)} ID для пакету з {len(batch)} аніме")
+
+        genre_data = []
+        review_data = []
+        for idx, entity in enumerate(batch):
+            anime_id = anime_ids[idx]
+            genre_data.extend([(anime_id, genre_id) for genre_id in entity['genres']])
+            review_data.extend([
+                (
+                    anime_id,
+                    review['user_id'],
+                    review['rating'],
+                    review['content'],
+                    cls._parameter(review['created_at']),
+                    cls._parameter(review['updated_at'])
+                ) for review in entity['reviews']
+            ])
+        return genre_data, review_data
+
+    @classmethod
+    def _update_rows(cls, updates, now):
+        """
+        Рядки тимчасової таблиці оновлень, AnimeGenre та Review для результату generate_updates.
+        Жанри й відгуки аніме замінюються лише тоді, коли відповідний ключ є в оновленні.
+        """
+        now = cls._parameter(now)
+        anime_rows = []
+        genre_rows = []
+        review_rows = []
+        for anime_id, update_data in updates.items():
+            anime_updates = update_data.get('anime') or {}
+            unknown = set(anime_updates) - set(UPDATABLE_ANIME_COLUMNS)
+            if unknown:
+                raise ValueError(f"Колонки Anime не підтримуються update_entities_batch: {sorted(unknown)}")
+            genres = update_data.get('genres')
+            reviews = update_data.get('reviews')
+
+            update_mask = sum(
+                1 << bit for bit, column in enumerate(UPDATABLE_ANIME_COLUMNS) if column in anime_updates)
+            anime_rows.append(
+                (anime_id, update_mask, genres is not None, reviews is not None)
+                + tuple(cls._parameter(anime_updates.get(column)) for column in UPDATABLE_ANIME_COLUMNS)
+            )
+            genre_rows.extend((anime_id, genre_id) for genre_id in genres or [])
+            review_rows.extend(
+                (anime_id, review['user_id'], review['rating'], review['content'],
+                 cls._parameter(review.get('created_at', now)), now)
+                for review in reviews or []
+            )
+        return anime_rows, genre_rows, review_rows
+
+    def generate_entities(self, num_entities):
+        """
+        Генерує колекцію сутностей аніме з пов'язаними даними.
+
+        Args:
+            num_entities (int): кількість сутностей для генерації
+
+        Returns:
+            list: список словників, що містять дані аніме та пов'язані сутності
+        """
+        if self.dataset is not None:
+            return self.dataset.relational(num_entities, self._dataset_genre_ids())
+        return self.entity_generator.generate_relational(
+            num_entities, self.reference_data.get('genres'), self.reference_data.get('users'))
+
+    def _dataset_genre_ids(self):
+        """
+        ID жанрів таблиці Genre в порядку довідника self.dataset; відсутні жанри додаються.
+        Перевіряє, що користувачі набору є в таблиці Users.
+        """
+        missing_users = set(self.dataset.user_ids) - set(self.reference_data.get('users').tolist())
+        if missing_users:
+            raise ValueError(f"Користувачів набору даних немає в таблиці Users: {sorted(missing_users)}")
+
+        ids, names = self.reference_data.columns('genres')
+        genre_ids = dict(zip(names.tolist(), ids.tolist()))
+        missing = [genre for genre in self.dataset.genres if genre['name'] not in genre_ids]
+        if missing:
+            for genre, genre_id in zip(missing, self._insert_genres(missing)):
+                genre_ids[genre['name']] = genre_id
+            self.reference_data.invalidate('genres')
+        return [genre_ids[genre['name']] for genre in self.dataset.genres]
+
+    def generate_updates(self, entities, update_type='all', update_percentage=0.5):
+        """
+        Генерує оновлення для існуючих сутностей.
+
+        Args:
+            entities: результат виконання fetch_anime_simple або fetch_anime_with_relations
+            update_type (str): тип оновлення ('all', 'anime', 'genres', 'reviews')
+            update_percentage (float): відсоток сутностей, які потрібно оновити (0.0 - 1.0)
+
+        Returns:
+            dict: словник з оновленнями у форматі, готовому для використання в update_entities_batch методах
+        """
+        if not entities:
+            return {}
+
+        reference = self.reference_data
+
+        # Визначаємо кількість сутностей для оновлення
+        num_to_update = max(1, int(len(entities) * update_percentage))
+        entities_to_update = random.sample(list(entities), num_to_update)
+
+        updates = {}
+
+        for entity in entities_to_update:
+            anime_id = entity[0]  # ID - перше поле
+            update_data = {}
+
+            # Генеруємо оновлення основних даних аніме
+            if update_type in ['all', 'anime']:
+                anime_updates = {}
+                # Випадково вибираємо, які поля оновлювати
+                if random.random() < 0.7:
+                    anime_updates['title'] = ''.join(random.choices(string.ascii_letters, k=random.randint(5, 20)))
+                if random.random() < 0.5:
+                    anime_updates['original_title'] = ''.join(
+                        random.choices(string.ascii_letters, k=random.randint(5, 20)))
+                if random.random() < 0.3:
+                    anime_updates['year'] = random.randint(1900, 2024)
+                if random.random() < 0.4:
+                    anime_updates['synopsis'] = '\n'.join([
+                        ' '.join(random.choices(string.ascii_letters, k=random.randint(10, 50)))
+                        for _ in range(random.randint(1, 5))
+                    ])
+                if random.random() < 0.3:
+                    anime_updates['episodes'] = random.randint(1, 100)
+                if random.random() < 0.3:
+                    anime_updates['duration'] = random.randint(10, 120)
+                if random.random() < 0.2:
+                    anime_updates['is_deleted'] = random.choice([True, False])
+
+                anime_updates['updated_at'] = datetime.datetime.now()
+                anime_updates['updated_by'] = reference.choice('users')
+
+                if anime_updates:
+                    update_data['anime'] = anime_updates
+
+            # Генеруємо оновлення жанрів
+            if update_type in ['all', 'genres']:
+                update_data['genres'] = reference.sample(
+                    'genres', random.randint(1, min(5, len(reference.get('genres')))), replace=False)
+
+            # Генеруємо оновлення відгуків
+            if update_type in ['all', 'reviews']:
+                reviews = []
+                # Може бути 0 відгуків
+                for user_id in reference.sample('users', random.randint(0, 10)):
+                    review = {
+                        'user_id': user_id,
+                        'rating': random.randint(1, 10),
+                        'content': ' '.join(random.choices(string.ascii_letters, k=random.randint(20, 100))),
+                        'created_at': datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 365)),
+                        'updated_at': datetime.datetime.now()
+                    }
+                    reviews.append(review)
+                update_data['reviews'] = reviews
+
+            if update_data:
+                updates[anime_id] = update_data
+
+        return updates
@@ -0,0 +1,54 @@
+import json
+import os
+from typing import Any, Dict, Iterator, List
+
+
+class JsonLinesSink:
+    def __init__(self, path: str):
+        """
+        Файл результатів у форматі JSON Lines: один JSON-об'єкт на рядок, тільки дописування.
+        Кожен запис скидається на диск (fsync), тож перерваний запуск втрачає щонайбільше
+        останній незавершений рядок, а попередні записи лишаються коректними.
+
+        Args:
+            path (str): шлях до файлу результатів
+        """
+        self.path = path
+
+    def write(self, record: Dict[str, Any]):
+        """Дописує один запис у кінець файлу."""
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def iter_results(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Читає записи результатів по одному, не завантажуючи весь файл.
+    Обірваний останній рядок (запуск перервано під час запису) пропускається.
+    Також читає старі файли у вигляді одного JSON-масиву.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        first_char = f.read(1)
+        f.seek(0)
+        if first_char == '[':
+            yield from json.load(f)
+            return
+
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                if line.endswith('\n'):
+                    raise
+                # Незавершений останній рядок
+                return
+
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    """Завантажує всі записи результатів у список."""
+    return list(iter_results(path))
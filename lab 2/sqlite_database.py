@@ -0,0 +1,672 @@
+from typing import Dict
+
+import sqlite3
+import datetime
+
+from connection_pool import ConnectionPool
+from data_generator import EntityGenerator
+from performance_metrics import PerformanceMetrics, measure_execution_time, measure_stream
+from relation_loader import load_anime_documents, load_anime_records
+from relational_database import UPDATABLE_ANIME_COLUMNS, RelationalDatabase
+
+
+# Підмножина схеми lab_1/CreateDB.sql, яку використовують тести продуктивності,
+# перекладена на діалект SQLite (IDENTITY -> AUTOINCREMENT, NVARCHAR -> TEXT, BIT -> INTEGER)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS Users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    email TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    last_login TEXT,
+    is_active INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS Anime (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    original_title TEXT,
+    year INTEGER,
+    synopsis TEXT,
+    episodes INTEGER,
+    duration INTEGER,
+    is_deleted INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_by INTEGER,
+    FOREIGN KEY (updated_by) REFERENCES Users(id)
+);
+
+CREATE TABLE IF NOT EXISTS Genre (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT
+);
+
+CREATE TABLE IF NOT EXISTS Review (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    anime_id INTEGER,
+    user_id INTEGER,
+    rating INTEGER,
+    content TEXT,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (anime_id) REFERENCES Anime(id),
+    FOREIGN KEY (user_id) REFERENCES Users(id)
+);
+
+CREATE TABLE IF NOT EXISTS AnimeGenre (
+    anime_id INTEGER,
+    genre_id INTEGER,
+    PRIMARY KEY (anime_id, genre_id),
+    FOREIGN KEY (anime_id) REFERENCES Anime(id),
+    FOREIGN KEY (genre_id) REFERENCES Genre(id)
+);
+"""
+
+# Довідкові дані з lab_1/FillDB.sql
+SEED_USERS = [
+    ('john_doe', 'john@example.com', 'hashed_password_1'),
+    ('jane_smith', 'jane@example.com', 'hashed_password_2'),
+    ('bob_johnson', 'bob@example.com', 'hashed_password_3'),
+]
+
+SEED_GENRES = [
+    ('Action', 'Emphasizes physical challenges, including fights, chases, and explosions.'),
+    ('Mystery', 'Focuses on solving a crime or puzzle.'),
+    ('Sci-Fi', 'Explores futuristic and scientific themes.'),
+]
+
+# Декларативний набір індексів: назва -> (таблиця, колонки). Аналог INDEXES з ms_sql_database:
+# SQLite не підтримує INCLUDE, тому покривні колонки додані в кінець ключа.
+# Первинний ключ AnimeGenre (anime_id, genre_id) вже індексує anime_id
+INDEXES = {
+    'IX_Anime_year': ('Anime', ('year', 'title')),
+    'IX_Anime_title': ('Anime', ('title',)),
+    'IX_AnimeGenre_genre_id': ('AnimeGenre', ('genre_id',)),
+    'IX_Review_anime_id': ('Review', ('anime_id', 'rating'))
+}
+
+# Тексти запитів винесені в константи, щоб кеш підготовлених запитів sqlite3
+# (cached_statements) повторно використовував вже скомпільовані вирази
+INSERT_ANIME = """
+    INSERT INTO Anime (title, original_title, year, synopsis, episodes,
+                       duration, is_deleted, created_at, updated_at, updated_by)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_ANIME_WITH_ID = """
+    INSERT INTO Anime (id, title, original_title, year, synopsis, episodes,
+                       duration, is_deleted, created_at, updated_at, updated_by)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_ANIME_GENRE = "INSERT INTO AnimeGenre (anime_id, genre_id) VALUES (?, ?)"
+
+INSERT_REVIEW = """
+    INSERT INTO Review (anime_id, user_id, rating, content, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+CREATE_TEMP_ANIME_UPDATE = """
+    CREATE TEMP TABLE IF NOT EXISTS AnimeUpdate (
+        anime_id INTEGER PRIMARY KEY,
+        update_mask INTEGER NOT NULL,
+        replace_genres INTEGER NOT NULL,
+        replace_reviews INTEGER NOT NULL,
+        {columns}
+    )
+""".format(columns=", ".join(UPDATABLE_ANIME_COLUMNS))
+
+INSERT_TEMP_ANIME_UPDATE = """
+    INSERT INTO temp.AnimeUpdate
+    (anime_id, update_mask, replace_genres, replace_reviews, {columns})
+    VALUES ({placeholders})
+""".format(columns=", ".join(UPDATABLE_ANIME_COLUMNS),
+           placeholders=", ".join("?" for _ in range(len(UPDATABLE_ANIME_COLUMNS) + 4)))
+
+# UPDATE ... FROM (SQLite 3.33+): колонка змінюється лише там, де її біт є в update_mask
+UPDATE_ANIME_FROM_TEMP = """
+    UPDATE Anime SET
+        {assignments}
+    FROM temp.AnimeUpdate AS u
+    WHERE Anime.id = u.anime_id AND u.update_mask <> 0
+""".format(assignments=",\n        ".join(
+    f"{column} = CASE WHEN u.update_mask & {1 << bit} THEN u.{column} ELSE Anime.{column} END"
+    for bit, column in enumerate(UPDATABLE_ANIME_COLUMNS)
+))
+
+DELETE_REPLACED_GENRES = """
+    DELETE FROM AnimeGenre
+    WHERE anime_id IN (SELECT anime_id FROM temp.AnimeUpdate WHERE replace_genres = 1)
+"""
+
+DELETE_REPLACED_REVIEWS = """
+    DELETE FROM Review
+    WHERE anime_id IN (SELECT anime_id FROM temp.AnimeUpdate WHERE replace_reviews = 1)
+"""
+
+
+def _timestamp(value):
+    """Перетворення datetime у рядок ISO-8601, як його зберігає SQLite."""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+
+class SQLiteDatabase(RelationalDatabase):
+    # Старі збірки SQLite обмежують запит 999 параметрами
+    IN_CLAUSE_CHUNK_SIZE = 900
+
+    def __init__(self, database_path='anime_benchmark.db', wal=True, pool_size=5, cached_statements=256, seed=None,
+                 indexes=True, dataset=None):
+        """
+        Локальний бекенд на SQLite з тим самим інтерфейсом, що й MSSQLDatabase.
+
+        Args:
+            database_path (str): шлях до файлу бази даних
+            wal (bool): чи вмикати журнал WAL
+            pool_size (int): максимальна кількість з'єднань у пулі
+            cached_statements (int): розмір кешу підготовлених запитів на з'єднання
+            seed (int): зерно генератора тестових даних
+            indexes (bool): чи створювати індекси з INDEXES
+            dataset (BenchmarkDataset): спільний набір даних на диску; якщо заданий, generate_entities
+                повертає його перші сутності замість нових випадкових
+        """
+        self.database_path = database_path
+        self.wal = wal
+        self.cached_statements = cached_statements
+        self.performance_metrics = PerformanceMetrics()
+        self.entity_generator = EntityGenerator(seed)
+        self.dataset = dataset
+        self._init_reference_data(seed)
+        # Метрики пулу (очікування з'єднання, влучання) - окремо від часу операцій
+        self.pool_metrics = PerformanceMetrics()
+        self.pool = ConnectionPool(self._create_connection, max_size=pool_size, metrics=self.pool_metrics)
+        self._create_schema()
+        if indexes:
+            self.create_indexes()
+
+    @staticmethod
+    def _parameter(value):
+        return _timestamp(value)
+
+    def _create_connection(self):
+        """Відкриття нового з'єднання з налаштуванням PRAGMA."""
+        conn = sqlite3.connect(
+            self.database_path,
+            cached_statements=self.cached_statements,
+            check_same_thread=False
+        )
+        if self.wal:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _connect(self):
+        """Підключення до бази даних через пул з'єднань."""
+        return self.pool.connection()
+
+    def _create_schema(self):
+        """Створення таблиць та заповнення довідкових даних, якщо їх ще немає."""
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            if conn.execute("SELECT COUNT(*) FROM Users").fetchone()[0] == 0:
+                now = _timestamp(datetime.datetime.now())
+                conn.executemany(
+                    "INSERT INTO Users (username, email, password_hash, last_login) VALUES (?, ?, ?, ?)",
+                    [(username, email, password_hash, now) for username, email, password_hash in SEED_USERS]
+                )
+            if conn.execute("SELECT COUNT(*) FROM Genre").fetchone()[0] == 0:
+                conn.executemany("INSERT INTO Genre (name, description) VALUES (?, ?)", SEED_GENRES)
+
+    def close(self):
+        """Закриття всіх з'єднань пулу."""
+        self.pool.close_all()
+
+    def create_indexes(self):
+        """Створення індексів з INDEXES, яких ще немає."""
+        with self._connect() as conn:
+            for name, (table, columns) in INDEXES.items():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+
+    def drop_indexes(self):
+        """Видалення індексів з INDEXES."""
+        with self._connect() as conn:
+            for name in INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def get_performance_stats(self) -> Dict[str, Dict[str, float]]:
+        return self.performance_metrics.get_statistics()
+
+    # READ операції
+    @staticmethod
+    def _build_fetch_simple_query(filters=None, limit=10, ordered=False):
+        """Побудова запиту для простого читання записів з таблиці Anime."""
+        query = "SELECT * FROM Anime"
+        params = []
+        if filters:
+            filter_clauses = []
+            for column, value in filters.items():
+                if value is not None:
+                    filter_clauses.append(f"{column} = ?")
+                    params.append(value)
+            if filter_clauses:
+                query += " WHERE " + " AND ".join(filter_clauses)
+        if ordered:
+            query += " ORDER BY id"
+        query += " LIMIT ?"
+        params.append(limit)
+        return query, params
+
+    @staticmethod
+    def _build_fetch_with_relations_query(filters=None, limit=10):
+        """Побудова запиту для читання записів з таблиці Anime з пов'язаними даними."""
+        query = """
+            SELECT
+                a.*,
+                GROUP_CONCAT(g.id || ':' || g.name, ';') as genres,
+                GROUP_CONCAT(r.id || ':' || r.rating || ':' || r.content, ';') as reviews
+            FROM Anime a
+            LEFT JOIN AnimeGenre ag ON a.id = ag.anime_id
+            LEFT JOIN Genre g ON ag.genre_id = g.id
+            LEFT JOIN Review r ON a.id = r.anime_id
+        """
+
+        params = []
+        if filters:
+            filter_clauses = []
+            for column, value in filters.items():
+                if value is not None:
+                    filter_clauses.append(f"a.{column} = ?")
+                    params.append(value)
+            if filter_clauses:
+                query += " WHERE " + " AND ".join(filter_clauses)
+
+        query += " GROUP BY a.id LIMIT ?"
+        params.append(limit)
+        return query, params
+
+    @measure_execution_time
+    def fetch_anime_simple(self, filters=None, limit=10):
+        """Простий варіант читання записів з таблиці Anime."""
+        query, params = self._build_fetch_simple_query(filters, limit)
+
+        with self._connect() as conn:
+            return conn.execute(query, params).fetchall()
+
+    @measure_execution_time
+    def fetch_anime_with_relations(self, filters=None, limit=10):
+        """
+        Складний варіант читання записів з таблиці Anime з пов'язаними даними одним запитом з GROUP_CONCAT.
+        Залишений для порівняння з fetch_anime_documents: два LEFT JOIN дають декартовий добуток жанри x відгуки.
+        Жанри та відгуки повертаються рядками, закодованими через ';' і ':'.
+        """
+        query, params = self._build_fetch_with_relations_query(filters, limit)
+
+        with self._connect() as conn:
+            return conn.execute(query, params).fetchall()
+
+    @measure_execution_time
+    def fetch_anime_records(self, filters=None, limit=10):
+        """
+        Читання записів з таблиці Anime з пов'язаними даними, як fetch_anime_documents,
+        але у вигляді AnimeRecord зі списками GenreRecord/ReviewRecord.
+        """
+        query, params = self._build_fetch_simple_query(filters, limit, ordered=True)
+
+        with self._connect() as conn:
+            return load_anime_records(conn.cursor(), query, params, self.IN_CLAUSE_CHUNK_SIZE)
+
+    @measure_execution_time
+    def fetch_anime_documents(self, filters=None, limit=10):
+        """
+        Читання записів з таблиці Anime з пов'язаними даними без декартового добутку:
+        спочатку сторінка аніме, потім жанри та відгуки двома запитами по списку id.
+
+        Returns:
+            list: словники з полями Anime та списками 'genres' і 'reviews', як документи MongoDB
+        """
+        query, params = self._build_fetch_simple_query(filters, limit, ordered=True)
+
+        with self._connect() as conn:
+            return load_anime_documents(conn.cursor(), query, params, self.IN_CLAUSE_CHUNK_SIZE)
+
+    @measure_stream(variant_flags=('with_relations',))
+    def iter_anime(self, filters=None, limit=10, with_relations=False, batch_size=1000):
+        """
+        Потокове читання записів з таблиці Anime порціями по batch_size рядків через fetchmany.
+
+        Args:
+            filters (dict): фільтри за колонками Anime
+            limit (int): максимальна кількість записів
+            with_relations (bool): чи читати жанри та відгуки (як fetch_anime_with_relations)
+            batch_size (int): кількість рядків, що отримуються за один fetchmany
+
+        Yields:
+            tuple: по одному рядку результату
+        """
+        if with_relations:
+            query, params = self._build_fetch_with_relations_query(filters, limit)
+        else:
+            query, params = self._build_fetch_simple_query(filters, limit)
+
+        with self._connect() as conn:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+
+    @measure_execution_time
+    def paginate_anime(self, page_size=100, after_id=None, filters=None):
+        """
+        Keyset-пагінація по таблиці Anime: сторінка читається пошуком по первинному ключу
+        (id > after_id), тому її вартість не залежить від глибини.
+
+        Args:
+            page_size (int): кількість записів на сторінці
+            after_id (int): id останнього запису попередньої сторінки (None - перша сторінка)
+            filters (dict): додаткові фільтри за колонками Anime
+
+        Returns:
+            tuple: (список рядків сторінки, after_id для наступної сторінки або None, якщо сторінок більше немає)
+        """
+        filter_clauses = []
+        params = []
+        if after_id is not None:
+            filter_clauses.append("id > ?")
+            params.append(after_id)
+        if filters:
+            for column, value in filters.items():
+                if value is not None:
+                    filter_clauses.append(f"{column} = ?")
+                    params.append(value)
+
+        query = "SELECT * FROM Anime"
+        if filter_clauses:
+            query += " WHERE " + " AND ".join(filter_clauses)
+        query += " ORDER BY id LIMIT ?"
+        params.append(page_size)
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        next_after_id = rows[-1][0] if len(rows) == page_size else None
+        return rows, next_after_id
+
+    # CREATE операції
+    @measure_execution_time
+    def insert_anime_simple(self, anime_data):
+        """Простий варіант додавання запису в таблицю Anime."""
+        with self._connect() as conn:
+            now = _timestamp(datetime.datetime.now())
+            cursor = conn.execute(
+                INSERT_ANIME,
+                (anime_data['title'], anime_data['original_title'], anime_data['year'],
+                 anime_data['synopsis'], anime_data['episodes'], anime_data['duration'],
+                 anime_data.get('is_deleted', False), now, now,
+                 anime_data['updated_by'])
+            )
+            return cursor.lastrowid
+
+    @measure_execution_time
+    def insert_anime_with_relations(self, anime_data, genres, reviews):
+        """Складний варіант додавання запису в таблицю Anime з пов'язаними даними."""
+        with self._connect() as conn:
+            now = _timestamp(datetime.datetime.now())
+            cursor = conn.execute(
+                INSERT_ANIME,
+                (anime_data['title'], anime_data['original_title'], anime_data['year'],
+                 anime_data['synopsis'], anime_data['episodes'], anime_data['duration'],
+                 anime_data.get('is_deleted', False), now, now,
+                 anime_data['updated_by'])
+            )
+            anime_id = cursor.lastrowid
+
+            conn.executemany(INSERT_ANIME_GENRE, [(anime_id, genre_id) for genre_id in genres])
+            conn.executemany(INSERT_REVIEW, [
+                (anime_id, review['user_id'], review['rating'], review['content'], now, now)
+                for review in reviews
+            ])
+            return anime_id
+
+    # UPDATE операції
+    @measure_execution_time
+    def update_anime_simple(self, anime_id, updates):
+        """Простий варіант оновлення запису в таблиці Anime."""
+        with self._connect() as conn:
+            set_clause = ", ".join([f"{col} = ?" for col in updates.keys()])
+            params = [_timestamp(value) for value in updates.values()] + [anime_id]
+            conn.execute(f"UPDATE Anime SET {set_clause} WHERE id = ?", params)
+
+    @measure_execution_time
+    def update_anime_with_relations(self, anime_id, anime_updates=None, genres=None, reviews=None):
+        """Складний варіант оновлення запису в таблиці Anime з пов'язаними даними."""
+        with self._connect() as conn:
+            if anime_updates:
+                set_clause = ", ".join([f"{col} = ?" for col in anime_updates.keys()])
+                params = [_timestamp(value) for value in anime_updates.values()] + [anime_id]
+                conn.execute(f"UPDATE Anime SET {set_clause} WHERE id = ?", params)
+
+            if genres is not None:
+                conn.execute("DELETE FROM AnimeGenre WHERE anime_id = ?", (anime_id,))
+                conn.executemany(INSERT_ANIME_GENRE, [(anime_id, genre_id) for genre_id in genres])
+
+            if reviews is not None:
+                now = _timestamp(datetime.datetime.now())
+                conn.execute("DELETE FROM Review WHERE anime_id = ?", (anime_id,))
+                conn.executemany(INSERT_REVIEW, [
+                    (anime_id, review['user_id'], review['rating'], review['content'], now, now)
+                    for review in reviews
+                ])
+
+    # DELETE операції
+    @measure_execution_time
+    def delete_anime_simple(self, anime_ids=None):
+        """Простий варіант видалення записів з таблиці Anime."""
+        with self._connect() as conn:
+            if anime_ids:
+                query = "DELETE FROM Anime WHERE id IN ({})".format(",".join("?" for _ in anime_ids))
+                conn.execute(query, anime_ids)
+            else:
+                conn.execute("DELETE FROM Anime")
+
+    @measure_execution_time
+    def delete_anime_with_relations(self, anime_ids=None):
+        """Складний варіант видалення записів з таблиці Anime з пов'язаними даними."""
+        with self._connect() as conn:
+            if anime_ids:
+                placeholders = ",".join("?" for _ in anime_ids)
+                conn.execute(f"DELETE FROM Review WHERE anime_id IN ({placeholders})", anime_ids)
+                conn.execute(f"DELETE FROM AnimeGenre WHERE anime_id IN ({placeholders})", anime_ids)
+                conn.execute(f"DELETE FROM Anime WHERE id IN ({placeholders})", anime_ids)
+            else:
+                conn.execute("DELETE FROM Review")
+                conn.execute("DELETE FROM AnimeGenre")
+                conn.execute("DELETE FROM Anime")
+
+    # Скидання стану між повтореннями тестів
+    RESET_STRATEGIES = ('truncate', 'delete')
+
+    def reset(self, strategy='truncate'):
+        """
+        Очищення Anime, AnimeGenre та Review між повтореннями тестів (не вимірюється performance_metrics).
+
+        Args:
+            strategy (str): 'truncate' - DELETE FROM без WHERE з вимкненими зовнішніми ключами:
+                тоді SQLite застосовує truncate-оптимізацію (таблиця звільняється цілком, без обходу рядків),
+                а лічильники AUTOINCREMENT скидаються, як після TRUNCATE;
+                'delete' - построкове DELETE FROM з перевіркою ключів, як у delete_anime_with_relations
+        """
+        if strategy not in self.RESET_STRATEGIES:
+            raise ValueError(f"Невідома стратегія очищення: {strategy}")
+
+        with self._connect() as conn:
+            if strategy == 'delete':
+                for table in ('Review', 'AnimeGenre', 'Anime'):
+                    conn.execute(f"DELETE FROM {table}")
+                return
+
+            # PRAGMA foreign_keys не діє всередині транзакції, тому перемикається до її початку і після завершення
+            conn.execute("PRAGMA foreign_keys=OFF")
+            try:
+                for table in ('Review', 'AnimeGenre', 'Anime'):
+                    conn.execute(f"DELETE FROM {table}")
+                conn.execute("DELETE FROM sqlite_sequence WHERE name IN ('Review', 'Anime')")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                conn.execute("PRAGMA foreign_keys=ON")
+
+    # Допоміжні методи
+    def fetch_existing_genres(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT id, name FROM Genre").fetchall()
+
+    def fetch_existing_users(self):
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT id FROM Users").fetchall()]
+
+    def _insert_genres(self, genres):
+        with self._connect() as conn:
+            return [
+                conn.execute("INSERT INTO Genre (name, description) VALUES (?, ?)",
+                             (genre['name'], genre['description'])).lastrowid
+                for genre in genres
+            ]
+
+    def _allocate_anime_ids(self, conn, count):
+        """
+        Резервує діапазон ID для пакетної вставки. Викликається всередині BEGIN IMMEDIATE,
+        тому жодне інше з'єднання не може вставити аніме паралельно.
+        """
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM Anime").fetchone()[0]
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'Anime'").fetchone()
+        first_id = max(max_id, row[0] if row else 0) + 1
+        return range(first_id, first_id + count)
+
+    @measure_execution_time
+    def insert_entities_batch(self, entities, batch_size=1000):
+        """
+        Пакетна вставка аніме-сутностей в одній транзакції.
+
+        Args:
+            entities (list): список сутностей для вставки
+            batch_size (int): розмір пакету для executemany
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            anime_ids = self._allocate_anime_ids(conn, len(entities))
+
+            for i in range(0, len(entities), batch_size):
+                batch = entities[i:i + batch_size]
+                batch_ids = anime_ids[i:i + batch_size]
+
+                conn.executemany(INSERT_ANIME_WITH_ID, [
+                    (anime_id,) + row for anime_id, row in zip(batch_ids, self._anime_rows(batch))])
+                genre_data, review_data = self._batch_relation_rows(batch, dict(enumerate(batch_ids)))
+                conn.executemany(INSERT_ANIME_GENRE, genre_data)
+                conn.executemany(INSERT_REVIEW, review_data)
+
+    @measure_execution_time
+    def insert_entities_batch_simple(self, entities, batch_size=1000):
+        """
+        Пакетна вставка аніме-сутностей без пов'язаних даних в одній транзакції.
+
+        Args:
+            entities (list): список сутностей для вставки
+            batch_size (int): розмір пакету для executemany
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for i in range(0, len(entities), batch_size):
+                conn.executemany(INSERT_ANIME, self._anime_rows(entities[i:i + batch_size]))
+
+    @measure_execution_time
+    def update_entities_batch(self, updates, batch_size=1000):
+        """
+        Пакетне оновлення аніме-сутностей з пов'язаними даними в одній транзакції
+        (див. MSSQLDatabase.update_entities_batch): тимчасова таблиця, один UPDATE ... FROM на пакет
+        і заміна жанрів та відгуків.
+
+        Args:
+            updates (dict): результат generate_updates
+            batch_size (int): кількість аніме в одному пакеті
+        """
+        items = list(updates.items())
+        now = datetime.datetime.now()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(CREATE_TEMP_ANIME_UPDATE)
+            for i in range(0, len(items), batch_size):
+                anime_rows, genre_rows, review_rows = self._update_rows(dict(items[i:i + batch_size]), now)
+                conn.execute("DELETE FROM temp.AnimeUpdate")
+                conn.executemany(INSERT_TEMP_ANIME_UPDATE, anime_rows)
+                conn.execute(UPDATE_ANIME_FROM_TEMP)
+                conn.execute(DELETE_REPLACED_GENRES)
+                conn.executemany(INSERT_ANIME_GENRE, genre_rows)
+                conn.execute(DELETE_REPLACED_REVIEWS)
+                conn.executemany(INSERT_REVIEW, review_rows)
+            conn.execute("DELETE FROM temp.AnimeUpdate")
+
+    @measure_execution_time
+    def get_top_rated_anime(self, n=10):
+        """
+        Отримує топ N аніме за середнім рейтингом (аналог функції GetTopRatedAnime).
+
+        Args:
+            n (int): кількість аніме для виведення
+
+        Returns:
+            list: список кортежів (id, title, avg_rating)
+        """
+        with self._connect() as conn:
+            return conn.execute("""
+                SELECT a.id, a.title, AVG(r.rating) AS avg_rating
+                FROM Anime a
+                JOIN Review r ON a.id = r.anime_id
+                GROUP BY a.id, a.title
+                ORDER BY avg_rating DESC
+                LIMIT ?
+            """, (n,)).fetchall()
+
+    @measure_execution_time
+    def get_average_anime_rating(self, anime_id):
+        """
+        Отримує середній рейтинг для конкретного аніме (аналог функції GetAverageAnimeRating).
+
+        Args:
+            anime_id (int): ID аніме
+
+        Returns:
+            float: середній рейтинг або None, якщо рейтингів немає
+        """
+        with self._connect() as conn:
+            result = conn.execute("SELECT AVG(rating) FROM Review WHERE anime_id = ?", (anime_id,)).fetchone()
+            return result[0] if result else None
+
+    @measure_execution_time
+    def get_anime_by_genre(self, genre_name):
+        """
+        Отримує список аніме за назвою жанру (аналог функції GetAnimeByGenre).
+
+        Args:
+            genre_name (str): назва жанру для пошуку
+
+        Returns:
+            list: список кортежів (id, title, year)
+        """
+        with self._connect() as conn:
+            return conn.execute("""
+                SELECT a.id, a.title, a.year
+                FROM Anime a
+                JOIN AnimeGenre ag ON a.id = ag.anime_id
+                JOIN Genre g ON ag.genre_id = g.id
+                WHERE g.name LIKE '%' || ? || '%'
+            """, (genre_name,)).fetchall()
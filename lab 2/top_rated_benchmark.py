@@ -0,0 +1,92 @@
+from datetime import datetime
+from typing import Any, Dict, List, Sequence
+
+from result_sink import JsonLinesSink
+
+
+# Пари (варіант зі зведенням рейтингу, попередній варіант через $unwind)
+COMPARED_OPERATIONS = {
+    'get_top_rated_anime': 'get_top_rated_anime_pipeline',
+    'get_average_anime_rating': 'get_average_anime_rating_pipeline'
+}
+
+
+def benchmark_top_rated(db, sizes: Sequence[int] = (10000, 100000), repeats: int = 20, n: int = 10,
+                        batch_size: int = 10000,
+                        output_file=f"db_top_rated_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+                        ) -> List[Dict[str, Any]]:
+    """
+    Порівнює запити рейтингу зі зведенням rating_sum/rating_count/avg_rating (MongoDatabase.get_top_rated_anime,
+    get_average_anime_rating) з попередніми конвеєрами $unwind на колекціях з sizes документів.
+
+    Args:
+        db: MongoDatabase
+        sizes: кількості документів у колекції
+        repeats (int): кількість викликів кожного запиту на розмір
+        n (int): розмір топу
+        batch_size (int): розмір пакету вставки при заповненні колекції
+        output_file: файл результатів у форматі JSON Lines (один запис на розмір)
+
+    Returns:
+        list: записи результатів
+    """
+    sink = JsonLinesSink(output_file)
+    results = []
+    try:
+        for size in sizes:
+            print(f"\nPreparing {size} documents...")
+            db.reset()
+            db.insert_entities_batch(db.generate_entities(size), batch_size=batch_size)
+            sample_ids = [str(document['_id']) for document in db.fetch_anime_simple(limit=repeats)]
+
+            # Обидва варіанти мають повертати однакові рейтинги (порядок рівних рейтингів може відрізнятися)
+            summary_top = [round(row['avg_rating'], 9) for row in db.get_top_rated_anime(n)]
+            pipeline_top = [round(row['avg_rating'], 9) for row in db.get_top_rated_anime_pipeline(n)]
+
+            db.performance_metrics.clear()
+            for i in range(repeats):
+                db.get_top_rated_anime(n)
+                db.get_top_rated_anime_pipeline(n)
+                anime_id = sample_ids[i % len(sample_ids)]
+                db.get_average_anime_rating(anime_id)
+                db.get_average_anime_rating_pipeline(anime_id)
+
+            stats = db.get_performance_stats()
+            comparison = {
+                operation: {
+                    'median': stats[operation]['median'],
+                    'pipeline_median': stats[pipeline]['median'],
+                    'speedup': stats[pipeline]['median'] / stats[operation]['median']
+                    if stats[operation]['median'] > 0 else None
+                }
+                for operation, pipeline in COMPARED_OPERATIONS.items()
+            }
+            result = {
+                'test_info': {
+                    'data_size': size,
+                    'repeats': repeats,
+                    'n': n,
+                    'backend': type(db).__name__,
+                    'results_match': summary_top == pipeline_top,
+                    'timestamp': datetime.now().isoformat()
+                },
+                'performance_stats': {
+                    operation: stats[operation]
+                    for pair in COMPARED_OPERATIONS.items() for operation in pair
+                },
+                'rating_summary_comparison': comparison,
+                'histograms': db.performance_metrics.get_histograms()
+            }
+            sink.write(result)
+            results.append(result)
+
+            print(f"Size {size}: top-{n} results match: {summary_top == pipeline_top}")
+            for operation, values in comparison.items():
+                speedup = values['speedup']
+                print(f"  {operation}: {values['median']:.4f} s vs pipeline {values['pipeline_median']:.4f} s, "
+                      + (f"speedup x{speedup:.1f}" if speedup is not None else "speedup n/a"))
+    finally:
+        db.reset()
+
+    print(f"\nResults saved to {output_file}")
+    return results